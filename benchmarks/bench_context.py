@@ -0,0 +1,275 @@
+"""
+Micro-benchmarks for the per-call overhead of `SQLAlchemyTransactionContext`.
+
+Every scenario is measured twice against the same in-memory SQLite engine:
+once using a raw `AsyncSession` and once through the context manager API.
+The difference is the overhead added by the library.
+
+Usage::
+
+    python -m benchmarks.bench_context --output bench.json
+    python -m benchmarks.bench_context --compare bench.json --max-regression 10
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import statistics
+import sys
+import time
+
+from collections.abc import Awaitable, Callable, Sequence
+from dataclasses import asdict, dataclass
+from typing import Any, Optional
+
+import sqlalchemy
+
+from sqlalchemy import literal, select
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+import sqlalchemy_tx_context
+
+from sqlalchemy_tx_context import SQLAlchemyTransactionContext
+
+SELECT_ONE = select(literal(1))
+
+
+@dataclass
+class ScenarioResult:
+    name: str
+    iterations: int
+    rounds: int
+    baseline_us: float
+    context_us: float
+    overhead_us: float
+    overhead_pct: float
+
+
+@dataclass
+class Scenario:
+    name: str
+    baseline: Callable[[], Awaitable[None]]
+    context: Callable[[], Awaitable[None]]
+
+
+def build_scenarios(
+    session_maker: async_sessionmaker[AsyncSession],
+    db: SQLAlchemyTransactionContext,
+    auto_db: SQLAlchemyTransactionContext,
+) -> list[Scenario]:
+    async def raw_session() -> None:
+        async with session_maker():
+            pass
+
+    async def ctx_session() -> None:
+        async with db.session():
+            pass
+
+    async def raw_nested_transaction() -> None:
+        async with (
+            session_maker() as session,
+            session.begin(),
+            session.begin_nested(),
+        ):
+            pass
+
+    async def ctx_nested_transaction() -> None:
+        async with db.transaction(), db.transaction():
+            pass
+
+    async def raw_execute() -> None:
+        async with session_maker() as session:
+            await session.execute(SELECT_ONE)
+
+    async def ctx_execute() -> None:
+        await auto_db.execute(SELECT_ONE)
+
+    async def raw_execute_in_session() -> None:
+        async with session_maker() as session:
+            for _ in range(10):
+                await session.execute(SELECT_ONE)
+
+    async def ctx_execute_in_session() -> None:
+        async with db.session():
+            for _ in range(10):
+                await db.execute(SELECT_ONE)
+
+    async def raw_new_transaction() -> None:
+        async with session_maker() as session, session.begin():
+            pass
+
+    async def ctx_new_transaction() -> None:
+        async with db.new_transaction():
+            pass
+
+    return [
+        Scenario("session", raw_session, ctx_session),
+        Scenario("nested_transaction", raw_nested_transaction, ctx_nested_transaction),
+        Scenario("auto_context_execute", raw_execute, ctx_execute),
+        Scenario(
+            "execute_in_session_x10",
+            raw_execute_in_session,
+            ctx_execute_in_session,
+        ),
+        Scenario("new_transaction", raw_new_transaction, ctx_new_transaction),
+    ]
+
+
+async def measure(
+    fn: Callable[[], Awaitable[None]],
+    iterations: int,
+    rounds: int,
+) -> float:
+    """
+    Return the median time of a single call in microseconds.
+    """
+
+    for _ in range(min(iterations, 100)):
+        await fn()
+
+    samples: list[float] = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            await fn()
+        samples.append((time.perf_counter() - started) / iterations * 1_000_000)
+    return statistics.median(samples)
+
+
+async def run(
+    iterations: int,
+    rounds: int,
+    only: Optional[Sequence[str]] = None,
+) -> list[ScenarioResult]:
+    engine: AsyncEngine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    try:
+        session_maker = async_sessionmaker(engine, expire_on_commit=False)
+        db = SQLAlchemyTransactionContext(engine, default_session_maker=session_maker)
+        auto_db = SQLAlchemyTransactionContext(
+            engine,
+            default_session_maker=session_maker,
+            auto_context_on_execute=True,
+        )
+
+        results: list[ScenarioResult] = []
+        for scenario in build_scenarios(session_maker, db, auto_db):
+            if only and scenario.name not in only:
+                continue
+            baseline = await measure(scenario.baseline, iterations, rounds)
+            context = await measure(scenario.context, iterations, rounds)
+            results.append(
+                ScenarioResult(
+                    name=scenario.name,
+                    iterations=iterations,
+                    rounds=rounds,
+                    baseline_us=round(baseline, 3),
+                    context_us=round(context, 3),
+                    overhead_us=round(context - baseline, 3),
+                    overhead_pct=round((context - baseline) / baseline * 100, 2),
+                ),
+            )
+        return results
+    finally:
+        await engine.dispose()
+
+
+def build_report(results: Sequence[ScenarioResult]) -> dict[str, Any]:
+    return {
+        "meta": {
+            "library_version": sqlalchemy_tx_context.__version__,
+            "sqlalchemy_version": sqlalchemy.__version__,
+            "python_version": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+        },
+        "results": [asdict(result) for result in results],
+    }
+
+
+def compare(
+    report: dict[str, Any],
+    previous: dict[str, Any],
+    max_regression: float,
+) -> list[str]:
+    """
+    Compare the context timings against a previous report.
+
+    :return: Names of scenarios whose context time grew by more than `max_regression` percent.
+    """
+
+    previous_results = {item["name"]: item for item in previous["results"]}
+    regressions: list[str] = []
+    for item in report["results"]:
+        before = previous_results.get(item["name"])
+        if before is None:
+            continue
+        change = (
+            (item["context_us"] - before["context_us"]) / before["context_us"] * 100
+        )
+        item["change_pct"] = round(change, 2)
+        if change > max_regression:
+            regressions.append(item["name"])
+    return regressions
+
+
+def format_table(report: dict[str, Any]) -> str:
+    lines = [
+        f"{'scenario':<26}{'raw, us':>12}{'context, us':>14}{'overhead, us':>15}{'overhead':>10}",
+    ]
+    for item in report["results"]:
+        line = (
+            f"{item['name']:<26}{item['baseline_us']:>12.2f}{item['context_us']:>14.2f}"
+            f"{item['overhead_us']:>15.2f}{item['overhead_pct']:>9.1f}%"
+        )
+        if "change_pct" in item:
+            line += f"  ({item['change_pct']:+.1f}% vs previous)"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Micro-benchmarks for the per-call overhead of `SQLAlchemyTransactionContext`.",
+    )
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--scenario", action="append", dest="scenarios")
+    parser.add_argument("--output", help="Write the JSON report to this file.")
+    parser.add_argument("--compare", help="Previous JSON report to compare against.")
+    parser.add_argument(
+        "--max-regression",
+        type=float,
+        default=10.0,
+        help="Allowed growth of context time in percent when using --compare.",
+    )
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(run(args.iterations, args.rounds, args.scenarios))
+    report = build_report(results)
+
+    regressions: list[str] = []
+    if args.compare:
+        with open(args.compare) as file:
+            regressions = compare(report, json.load(file), args.max_regression)
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+        sys.stdout.write(format_table(report) + "\n")
+    else:
+        sys.stdout.write(json.dumps(report, indent=2) + "\n")
+
+    if regressions:
+        sys.stderr.write(f"Regressions detected: {', '.join(regressions)}\n")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
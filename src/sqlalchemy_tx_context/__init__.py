@@ -1,5 +1,63 @@
 __version__ = "1.0.1"
 
-__all__ = ("SQLAlchemyTransactionContext",)
+__all__ = (
+    "AdmissionController",
+    "AppliedTransactionOptions",
+    "ChunkIterator",
+    "CompiledCacheStats",
+    "ConsistentHashRing",
+    "ContextEvent",
+    "ContextEventKind",
+    "ContextListener",
+    "InMemoryResultCache",
+    "LatencyAggregator",
+    "LatencyHistogram",
+    "LeastInFlightPolicy",
+    "NPlusOneDetector",
+    "NPlusOneReport",
+    "OpenContext",
+    "PrimaryKeyLoader",
+    "Priority",
+    "ReplicaBalancingPolicy",
+    "ResultCacheBackend",
+    "ResultStream",
+    "RetryPolicy",
+    "RoundRobinPolicy",
+    "SQLAlchemyTransactionContext",
+    "SQLTransactionContext",
+    "ShardResolver",
+    "SlowQuery",
+    "SlowQueryProfiler",
+    "TransactionOptions",
+    "TransactionWatchdog",
+    "WatchdogReport",
+    "WeightedPolicy",
+)
 
+from .admission import AdmissionController, Priority
+from .caching import InMemoryResultCache, ResultCacheBackend
+from .chunking import ChunkIterator
 from .context import SQLAlchemyTransactionContext
+from .detection import NPlusOneDetector, NPlusOneReport
+from .instrumentation import (
+    ContextEvent,
+    ContextEventKind,
+    ContextListener,
+    LatencyAggregator,
+    LatencyHistogram,
+)
+from .loader import PrimaryKeyLoader
+from .options import AppliedTransactionOptions, TransactionOptions
+from .profiling import SlowQuery, SlowQueryProfiler
+from .retry import RetryPolicy
+from .routing import (
+    LeastInFlightPolicy,
+    ReplicaBalancingPolicy,
+    RoundRobinPolicy,
+    WeightedPolicy,
+)
+from .sharding import ConsistentHashRing, ShardResolver
+from .streaming import ResultStream
+from .sync import SQLTransactionContext
+from .warmup import CompiledCacheStats
+from .watchdog import OpenContext, TransactionWatchdog, WatchdogReport
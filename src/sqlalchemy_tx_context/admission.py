@@ -0,0 +1,179 @@
+import asyncio
+
+from collections.abc import Sequence
+from enum import IntEnum
+from heapq import heapify, heappop, heappush
+from itertools import count
+from time import perf_counter
+from typing import Any, Optional
+
+from sqlalchemy_tx_context.exceptions import AdmissionTimeoutError
+from sqlalchemy_tx_context.instrumentation import (
+    DEFAULT_LATENCY_BUCKETS,
+    LatencyHistogram,
+)
+
+
+class Priority(IntEnum):
+    """
+    Admission priority classes. Lower values are admitted first.
+    """
+
+    INTERACTIVE = 0
+    NORMAL = 1
+    BACKGROUND = 2
+
+
+class AdmissionController:
+    """
+    Caps the number of concurrently open sessions and queues excess callers.
+
+    Waiting callers are admitted by priority, then in arrival order. Set `limit` below the pool size
+    (`pool_size + max_overflow`) so callers queue in-process instead of all racing for pooled
+    connections and failing together on `pool_timeout`.
+
+    Lower priority classes are only admitted while no higher priority caller waits, so sustained
+    interactive load can delay background work indefinitely; use `timeout` to bound that wait.
+    """
+
+    __slots__ = (
+        "limit",
+        "timeout",
+        "in_use",
+        "admitted",
+        "timed_out",
+        "wait_times",
+        "_bounds",
+        "_waiters",
+        "_sequence",
+    )
+
+    limit: int
+    timeout: Optional[float]
+    in_use: int
+    admitted: int
+    timed_out: int
+    wait_times: dict[int, LatencyHistogram]
+    _bounds: tuple[float, ...]
+    _waiters: list[tuple[int, int, "asyncio.Future[None]"]]
+    _sequence: "count[int]"
+
+    def __init__(
+        self,
+        limit: int,
+        *,
+        timeout: Optional[float] = None,
+        buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS,
+    ) -> None:
+        """
+        :param limit: Maximum number of sessions open at the same time.
+        :param timeout: Maximum time in seconds a caller waits for admission; None waits indefinitely.
+        :param buckets: Upper bounds of the wait time histogram buckets, in seconds.
+
+        :raise ValueError: If `limit` is less than 1.
+        """
+
+        if limit < 1:
+            raise ValueError("limit must be at least 1")
+        self.limit = limit
+        self.timeout = timeout
+        self.in_use = 0
+        self.admitted = 0
+        self.timed_out = 0
+        self.wait_times = {}
+        self._bounds = tuple(buckets)
+        self._waiters = []
+        self._sequence = count()
+
+    @property
+    def waiting(self) -> int:
+        """
+        Number of callers currently queued.
+        """
+
+        return len(self._waiters)
+
+    async def acquire(self, priority: int = Priority.NORMAL) -> float:
+        """
+        Wait for a free slot.
+
+        :param priority: Priority class; lower values are admitted first.
+
+        :return: Time spent waiting, in seconds.
+
+        :raise AdmissionTimeoutError: If no slot became free within `timeout`.
+        """
+
+        if self.in_use < self.limit and not self._waiters:
+            self.in_use += 1
+            self._admit(priority, 0.0)
+            return 0.0
+
+        started = perf_counter()
+        future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        waiter = (priority, next(self._sequence), future)
+        heappush(self._waiters, waiter)
+        try:
+            if self.timeout is None:
+                await future
+            else:
+                await asyncio.wait_for(future, self.timeout)
+        except BaseException as exc:
+            if future.done() and not future.cancelled():
+                # The slot was handed over just before the wait was interrupted.
+                self.release()
+            elif waiter in self._waiters:
+                # A cancelled waiter may already have been skipped and popped by `release()`.
+                self._waiters.remove(waiter)
+                heapify(self._waiters)
+            if isinstance(exc, asyncio.TimeoutError):
+                self.timed_out += 1
+                raise AdmissionTimeoutError() from exc
+            raise
+
+        waited = perf_counter() - started
+        self._admit(priority, waited)
+        return waited
+
+    def release(self) -> None:
+        """
+        Free a slot, handing it over to the next waiting caller if there is one.
+        """
+
+        while self._waiters:
+            *_, future = heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self.in_use -= 1
+
+    def snapshot(self) -> dict[str, Any]:
+        """
+        Return the current counters and the wait time histograms per priority class.
+        """
+
+        return {
+            "limit": self.limit,
+            "in_use": self.in_use,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "timed_out": self.timed_out,
+            "wait_times": {
+                _priority_name(priority): histogram.as_dict()
+                for priority, histogram in sorted(self.wait_times.items())
+            },
+        }
+
+    def _admit(self, priority: int, waited: float) -> None:
+        self.admitted += 1
+        histogram = self.wait_times.get(priority)
+        if histogram is None:
+            histogram = self.wait_times[priority] = LatencyHistogram(self._bounds)
+        histogram.observe(waited)
+
+
+def _priority_name(priority: int) -> str:
+    try:
+        return Priority(priority).name.lower()
+    except ValueError:
+        return str(priority)
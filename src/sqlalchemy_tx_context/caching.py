@@ -0,0 +1,290 @@
+import hashlib
+
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from collections.abc import Callable, Collection, Iterable, Mapping
+from itertools import chain
+from time import monotonic
+from typing import Any, Optional, cast
+
+from sqlalchemy import Executable, event
+from sqlalchemy.engine import Dialect
+from sqlalchemy.engine.result import FrozenResult
+from sqlalchemy.orm import ORMExecuteState, Session, object_mapper
+from sqlalchemy.sql import ClauseElement
+from sqlalchemy.sql.util import find_tables
+from sqlalchemy.util import LRUCache
+
+# `Session.info` key holding the set of tables written by the current outermost `transaction()`.
+WRITTEN_TABLES_KEY = "sqlalchemy_tx_context_written_tables"
+
+# Execution option enabling the result cache for a statement.
+RESULT_CACHE_OPTION = "result_cache"
+
+# SQL of the statements seen by `result_cache_key`, by dialect and SQLAlchemy cache key.
+_statement_sql: "LRUCache[tuple[Dialect, Any], str]" = LRUCache(500)
+
+
+class ResultCacheBackend(ABC):
+    """
+    Storage for cached `Select` results.
+
+    Values are `FrozenResult` objects; keys are hex digests of the SQL of the statement and its parameters.
+    Each entry is associated with the names of the tables the statement reads from, so it can be dropped
+    when one of those tables is written.
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[FrozenResult[Any]]:
+        """
+        Return the cached result or None if it is missing or expired.
+
+        :param key: Cache key.
+        """
+
+    @abstractmethod
+    async def set(
+        self,
+        key: str,
+        value: FrozenResult[Any],
+        tables: Collection[str],
+    ) -> None:
+        """
+        Store a result.
+
+        :param key: Cache key.
+        :param value: Result to store.
+        :param tables: Names of the tables the result depends on.
+        """
+
+    @abstractmethod
+    async def invalidate(self, tables: Collection[str]) -> None:
+        """
+        Drop all entries depending on any of the tables.
+
+        :param tables: Names of written tables.
+        """
+
+    @abstractmethod
+    async def clear(self) -> None:
+        """
+        Drop all entries.
+        """
+
+
+class _CacheEntry:
+    __slots__ = ("value", "tables", "expires_at")
+
+    value: FrozenResult[Any]
+    tables: Collection[str]
+    expires_at: float
+
+    def __init__(
+        self,
+        value: FrozenResult[Any],
+        tables: Collection[str],
+        expires_at: float,
+    ) -> None:
+        self.value = value
+        self.tables = tables
+        self.expires_at = expires_at
+
+
+class InMemoryResultCache(ResultCacheBackend):
+    """
+    Process-local LRU cache with a time-to-live for every entry.
+    """
+
+    max_size: int
+    ttl: float
+    hits: int
+    misses: int
+    _clock: Callable[[], float]
+    _entries: "OrderedDict[str, _CacheEntry]"
+    _keys_by_table: dict[str, set[str]]
+
+    def __init__(
+        self,
+        *,
+        max_size: int = 1024,
+        ttl: float = 60.0,
+        clock: Optional[Callable[[], float]] = None,
+    ) -> None:
+        """
+        :param max_size: Maximum number of entries; the least recently used entry is evicted first.
+        :param ttl: Lifetime of an entry in seconds.
+        :param clock: Monotonic clock returning seconds. Defaults to `time.monotonic`.
+
+        :raise ValueError: If `max_size` or `ttl` is not positive.
+        """
+
+        if max_size < 1:
+            raise ValueError("max_size must be positive")
+        if ttl <= 0:
+            raise ValueError("ttl must be positive")
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._clock = clock or monotonic
+        self._entries = OrderedDict()
+        self._keys_by_table = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, key: str) -> Optional[FrozenResult[Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry.expires_at <= self._clock():
+            self._remove(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry.value
+
+    async def set(
+        self,
+        key: str,
+        value: FrozenResult[Any],
+        tables: Collection[str],
+    ) -> None:
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = _CacheEntry(value, tables, self._clock() + self.ttl)
+        for table in tables:
+            self._keys_by_table.setdefault(table, set()).add(key)
+        while len(self._entries) > self.max_size:
+            self._remove(next(iter(self._entries)))
+
+    async def invalidate(self, tables: Collection[str]) -> None:
+        for table in tables:
+            for key in self._keys_by_table.pop(table, ()):
+                self._remove(key)
+
+    async def clear(self) -> None:
+        self._entries.clear()
+        self._keys_by_table.clear()
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for table in entry.tables:
+            keys = self._keys_by_table.get(table)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_table[table]
+
+
+def result_cache_key(
+    statement: Executable,
+    params: Optional[Mapping[str, Any]],
+    dialect: Dialect,
+) -> str:
+    """
+    Build a cache key from the SQL of the statement for `dialect` and its parameters.
+
+    The statement is identified by its SQLAlchemy cache key, so it is compiled only the first time its
+    structure is seen; later executions only extract the values of its bound parameters.
+
+    :param statement: Select statement.
+    :param params: Parameters passed along with the statement.
+    :param dialect: Dialect the statement is compiled with.
+
+    :return: Hex digest.
+    """
+
+    element = cast(ClauseElement, statement)
+    cache_key = element._generate_cache_key()  # type: ignore[reportPrivateUsage]
+    sql: Optional[str]
+    if cache_key is None:
+        compiled = element.compile(dialect=dialect)
+        sql = str(compiled)
+        values: list[Any] = sorted((compiled.params or {}).items())
+    else:
+        structure = (dialect, cache_key.key)
+        sql = _statement_sql.get(structure)
+        if sql is None:
+            sql = _statement_sql[structure] = str(element.compile(dialect=dialect))
+        values = [bind.effective_value for bind in cache_key.bindparams]
+    passed = sorted(params.items()) if params else []
+    source = f"{sql}\n{values!r}\n{passed!r}"
+    return hashlib.sha256(source.encode()).hexdigest()
+
+
+def statement_tables(statement: Executable) -> frozenset[str]:
+    """
+    Return the names of all tables a statement reads from, including subqueries.
+
+    :param statement: Select statement.
+    """
+
+    return frozenset(
+        table.fullname for table in find_tables(cast(ClauseElement, statement))
+    )
+
+
+def _record_written_tables(session: Session, tables: Iterable[Any]) -> None:
+    written: Optional[set[str]] = session.info.get(WRITTEN_TABLES_KEY)
+    if written is not None:
+        written.update(table.fullname for table in tables)
+
+
+def _on_orm_execute(orm_execute_state: ORMExecuteState) -> None:
+    if WRITTEN_TABLES_KEY not in orm_execute_state.session.info:
+        return
+    if (
+        orm_execute_state.is_insert
+        or orm_execute_state.is_update
+        or orm_execute_state.is_delete
+    ):
+        statement: Any = orm_execute_state.statement
+        _record_written_tables(orm_execute_state.session, (statement.table,))
+
+
+def _on_after_flush(session: Session, flush_context: Any) -> None:  # noqa: ARG001
+    if WRITTEN_TABLES_KEY not in session.info:
+        return
+    _record_written_tables(
+        session,
+        chain.from_iterable(
+            object_mapper(instance).tables
+            for instance in chain(session.new, session.dirty, session.deleted)
+        ),
+    )
+
+
+def install_write_tracking() -> None:
+    """
+    Register session events recording written tables into `Session.info[WRITTEN_TABLES_KEY]`.
+
+    Only sessions that have the key set (by an outermost `transaction()` while a result cache
+    is configured) are tracked. Safe to call more than once.
+    """
+
+    if not event.contains(Session, "do_orm_execute", _on_orm_execute):
+        event.listen(Session, "do_orm_execute", _on_orm_execute)
+    if not event.contains(Session, "after_flush", _on_after_flush):
+        event.listen(Session, "after_flush", _on_after_flush)
+
+
+def is_cacheable(
+    statement: Executable,
+    execution_options: Mapping[str, Any],
+) -> bool:
+    """
+    Check whether the statement opted into the result cache.
+
+    :param statement: Select statement.
+    :param execution_options: Execution options passed along with the statement.
+    """
+
+    option = execution_options.get(RESULT_CACHE_OPTION)
+    if option is None:
+        option = statement.get_execution_options().get(RESULT_CACHE_OPTION)
+    return bool(option)
@@ -0,0 +1,116 @@
+import asyncio
+import inspect
+
+from collections.abc import Callable, Sequence
+from typing import Any, Optional
+
+TransactionCallback = Callable[[], Any]
+
+# `Session.info` key holding the callbacks of the current outermost `transaction()`.
+CALLBACKS_KEY = "sqlalchemy_tx_context_callbacks"
+
+
+class TransactionCallbacks:
+    """
+    Commit and rollback callbacks of one outermost transaction, with one frame per active savepoint.
+
+    Callbacks registered inside a savepoint move to the enclosing frame when the savepoint is released.
+    When the savepoint is rolled back, its commit callbacks are dropped and its rollback callbacks
+    are kept to run when the outermost transaction ends, whatever its outcome.
+    """
+
+    __slots__ = ("_frames", "_rolled_back")
+
+    _frames: list[tuple[list[TransactionCallback], list[TransactionCallback]]]
+    _rolled_back: list[TransactionCallback]
+
+    def __init__(self) -> None:
+        self._frames = [([], [])]
+        self._rolled_back = []
+
+    def add(self, callback: TransactionCallback, *, on_commit: bool) -> None:
+        """
+        Register a callback in the innermost frame.
+
+        :param callback: Callable taking no arguments; may return an awaitable.
+        :param on_commit: True for a commit callback, False for a rollback callback.
+        """
+
+        self._frames[-1][0 if on_commit else 1].append(callback)
+
+    def push(self) -> None:
+        """
+        Open a frame for a savepoint.
+        """
+
+        self._frames.append(([], []))
+
+    def pop(self, committed: bool) -> None:
+        """
+        Close the frame of a savepoint.
+
+        :param committed: Whether the savepoint was released (True) or rolled back (False).
+        """
+
+        on_commit, on_rollback = self._frames.pop()
+        if committed:
+            parent_on_commit, parent_on_rollback = self._frames[-1]
+            parent_on_commit.extend(on_commit)
+            parent_on_rollback.extend(on_rollback)
+        else:
+            self._rolled_back.extend(on_rollback)
+
+    def take(self, committed: bool) -> list[TransactionCallback]:
+        """
+        Return the callbacks to run when the outermost transaction ends.
+
+        :param committed: Whether the outermost transaction was committed.
+        """
+
+        on_commit, on_rollback = self._frames[0]
+        return self._rolled_back + (on_commit if committed else on_rollback)
+
+
+async def _call(callback: TransactionCallback) -> None:
+    result = callback()
+    if inspect.isawaitable(result):
+        await result
+
+
+async def run_callbacks(
+    callbacks: Sequence[TransactionCallback],
+    concurrency: int,
+) -> None:
+    """
+    Run callbacks, at most `concurrency` at a time.
+
+    Every callback runs even if another one fails; the first error is raised afterwards.
+
+    :param callbacks: Callbacks in registration order.
+    :param concurrency: Maximum number of callbacks running at the same time.
+    """
+
+    error: Optional[BaseException] = None
+    if concurrency == 1 or len(callbacks) == 1:
+        for callback in callbacks:
+            try:
+                await _call(callback)
+            except Exception as exc:
+                error = error or exc
+    else:
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def bounded(callback: TransactionCallback) -> None:
+            async with semaphore:
+                await _call(callback)
+
+        results = await asyncio.gather(
+            *(bounded(callback) for callback in callbacks),
+            return_exceptions=True,
+        )
+        error = next(
+            (result for result in results if isinstance(result, BaseException)),
+            None,
+        )
+    if error is not None:
+        raise error
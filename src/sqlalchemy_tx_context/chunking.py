@@ -0,0 +1,53 @@
+from collections.abc import AsyncGenerator, Sequence
+from types import TracebackType
+from typing import Any, Optional
+
+from sqlalchemy import Row
+
+# Label of the keyset column appended to the statement by `iterate_chunks(...)`.
+KEYSET_LABEL = "sqlalchemy_tx_context_keyset"
+
+
+class ChunkIterator:
+    """
+    Async iterator over the chunks of `iterate_chunks(...)`.
+
+    A chunk may keep a session or transaction of the context open until the next chunk is requested.
+    Prefer the `async with` form when the loop may be left early (`break`, `return`), so that they are
+    closed deterministically in the iterating task.
+    """
+
+    __slots__ = ("_chunks",)
+
+    _chunks: AsyncGenerator[Sequence[Row[Any]], None]
+
+    def __init__(self, chunks: AsyncGenerator[Sequence[Row[Any]], None]) -> None:
+        """
+        :param chunks: Async generator producing the chunks.
+        """
+
+        self._chunks = chunks
+
+    async def __aenter__(self) -> "ChunkIterator":
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        await self.aclose()
+
+    def __aiter__(self) -> "ChunkIterator":
+        return self
+
+    async def __anext__(self) -> Sequence[Row[Any]]:
+        return await self._chunks.__anext__()
+
+    async def aclose(self) -> None:
+        """
+        Stop the iteration, closing the session or transaction of the current chunk.
+        """
+
+        await self._chunks.aclose()
@@ -0,0 +1,167 @@
+import asyncio
+
+from collections.abc import Callable
+from contextlib import AbstractAsyncContextManager
+from typing import Any, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+class _CoalescedSession:
+    """
+    A session shared by consecutive auto-context reads of one task.
+    """
+
+    __slots__ = ("session", "context", "replica_index", "in_use", "last_used", "timer")
+
+    session: AsyncSession
+    context: AbstractAsyncContextManager[AsyncSession]
+    replica_index: Optional[int]
+    in_use: bool
+    last_used: float
+    timer: Optional[asyncio.TimerHandle]
+
+    def __init__(
+        self,
+        session: AsyncSession,
+        context: AbstractAsyncContextManager[AsyncSession],
+        replica_index: Optional[int],
+    ) -> None:
+        self.session = session
+        self.context = context
+        self.replica_index = replica_index
+        self.in_use = True
+        self.last_used = 0.0
+        self.timer = None
+
+
+class TaskSessionCoalescer:
+    """
+    Keeps at most one lazily created read session per asyncio task.
+
+    A session is closed when its task finishes or when it has not been used
+    for `idle_timeout` seconds, whichever comes first.
+    """
+
+    __slots__ = ("_idle_timeout", "_on_close", "_entries", "_closing")
+
+    _idle_timeout: float
+    _on_close: Callable[[Optional[int]], None]
+    _entries: dict["asyncio.Task[Any]", _CoalescedSession]
+    _closing: set["asyncio.Task[None]"]
+
+    def __init__(
+        self,
+        idle_timeout: float,
+        on_close: Callable[[Optional[int]], None],
+    ) -> None:
+        """
+        :param idle_timeout: Seconds of inactivity after which a session is closed.
+        :param on_close: Called with the replica index of every closed session.
+        """
+
+        self._idle_timeout = idle_timeout
+        self._on_close = on_close
+        self._entries = {}
+        self._closing = set()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def acquire(self, task: "asyncio.Task[Any]") -> Optional[AsyncSession]:
+        """
+        Return the session of the task and mark it as in use until `release(...)`.
+
+        :param task: Current task.
+
+        :return: Session or None if the task has no open session.
+        """
+
+        entry = self._entries.get(task)
+        if entry is None:
+            return None
+        entry.in_use = True
+        return entry.session
+
+    def release(self, task: "asyncio.Task[Any]") -> None:
+        """
+        Mark the session of the task as idle, starting its idle timeout.
+
+        :param task: Current task.
+        """
+
+        entry = self._entries.get(task)
+        if entry is not None:
+            entry.in_use = False
+            entry.last_used = asyncio.get_running_loop().time()
+
+    def add(
+        self,
+        task: "asyncio.Task[Any]",
+        session: AsyncSession,
+        context: AbstractAsyncContextManager[AsyncSession],
+        replica_index: Optional[int],
+    ) -> None:
+        """
+        Register a freshly opened session for the task. The session is marked as in use.
+
+        :param task: Current task.
+        :param session: Opened session.
+        :param context: Context manager that opened the session; exited on close.
+        :param replica_index: Replica the session is bound to, if any.
+        """
+
+        loop = asyncio.get_running_loop()
+        entry = _CoalescedSession(session, context, replica_index)
+        entry.last_used = loop.time()
+        entry.timer = loop.call_later(self._idle_timeout, self._on_idle, task)
+        self._entries[task] = entry
+        task.remove_done_callback(self.discard)
+        task.add_done_callback(self.discard)
+
+    def discard(self, task: "asyncio.Task[Any]") -> None:
+        """
+        Close the session of the task in the background, if it has one.
+
+        :param task: Task whose session should be closed.
+        """
+
+        entry = self._entries.pop(task, None)
+        if entry is None:
+            return
+        if entry.timer is not None:
+            entry.timer.cancel()
+        closing = asyncio.get_running_loop().create_task(self._close(entry))
+        self._closing.add(closing)
+        closing.add_done_callback(self._closing.discard)
+
+    async def close_all(self) -> None:
+        """
+        Close all sessions and wait until they are closed.
+        """
+
+        for task in list(self._entries):
+            self.discard(task)
+        if self._closing:
+            await asyncio.gather(*self._closing, return_exceptions=True)
+
+    def _on_idle(self, task: "asyncio.Task[Any]") -> None:
+        entry = self._entries.get(task)
+        if entry is None:
+            return
+        loop = asyncio.get_running_loop()
+        if entry.in_use:
+            entry.timer = loop.call_later(self._idle_timeout, self._on_idle, task)
+            return
+        deadline = entry.last_used + self._idle_timeout
+        if deadline > loop.time():
+            entry.timer = loop.call_at(deadline, self._on_idle, task)
+            return
+        entry.timer = None
+        self.discard(task)
+
+    async def _close(self, entry: _CoalescedSession) -> None:
+        try:
+            await entry.context.__aexit__(None, None, None)
+        finally:
+            self._on_close(entry.replica_index)
@@ -1,34 +1,142 @@
-from collections.abc import AsyncIterator, Callable
-from contextlib import AbstractAsyncContextManager, asynccontextmanager
+import asyncio
+
+from collections.abc import (
+    AsyncGenerator,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Collection,
+    Iterable,
+    Iterator,
+    Mapping,
+    Sequence,
+)
+from contextlib import (
+    AbstractAsyncContextManager,
+    AsyncExitStack,
+    asynccontextmanager,
+)
 from contextvars import ContextVar
-from typing import Any, Optional, TypeVar, cast
+from functools import partial, wraps
+from itertools import chain, islice
+from time import perf_counter, time
+from typing import Any, Optional, TypeVar, Union, cast
 
 from sqlalchemy import (
-    CompoundSelect,
+    ColumnElement,
     CursorResult,
     Executable,
+    Row,
     Select,
     UpdateBase,
     util,
 )
-from sqlalchemy.engine import Result
+from sqlalchemy.engine import Connection, Engine, Result
 from sqlalchemy.engine.interfaces import (
+    IsolationLevel,
     _CoreAnyExecuteParams,  # type: ignore[reportPrivateUsage]
+    _CoreSingleExecuteParams,  # type: ignore[reportPrivateUsage]
 )
-from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+from sqlalchemy.engine.result import FrozenResult
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import (
+    AsyncConnection,
+    AsyncEngine,
+    AsyncResult,
+    AsyncScalarResult,
+    AsyncSession,
+    async_sessionmaker,
+)
+from sqlalchemy.orm import QueryableAttribute, Session, loading
 from sqlalchemy.orm._typing import (
     OrmExecuteOptionsParameter,  # type: ignore[reportPrivateUsage]
 )
 from sqlalchemy.sql.selectable import TypedReturnsRows
-from typing_extensions import Literal, overload
-
+from typing_extensions import Concatenate, Literal, ParamSpec, Unpack, overload
+
+from sqlalchemy_tx_context.admission import AdmissionController, Priority
+from sqlalchemy_tx_context.caching import (
+    RESULT_CACHE_OPTION,
+    WRITTEN_TABLES_KEY,
+    ResultCacheBackend,
+    install_write_tracking,
+    is_cacheable,
+    result_cache_key,
+    statement_tables,
+)
+from sqlalchemy_tx_context.callbacks import (
+    CALLBACKS_KEY,
+    TransactionCallback,
+    TransactionCallbacks,
+    run_callbacks,
+)
+from sqlalchemy_tx_context.chunking import KEYSET_LABEL, ChunkIterator
+from sqlalchemy_tx_context.coalescing import TaskSessionCoalescer
+from sqlalchemy_tx_context.deadline import (
+    DeadlineScope,
+    install_statement_timeouts,
+    link_session,
+)
+from sqlalchemy_tx_context.detection import NPlusOneDetector
 from sqlalchemy_tx_context.exceptions import (
+    ConnectionActiveError,
     NoSessionError,
-    SessionAlreadyActiveError,
+    NoTransactionError,
     TransactionAlreadyActiveError,
 )
+from sqlalchemy_tx_context.instrumentation import (
+    _ROOT_SCOPE,  # type: ignore[reportPrivateUsage]
+    ContextEvent,
+    ContextEventKind,
+    ContextListener,
+    _Scope,  # type: ignore[reportPrivateUsage]
+)
+from sqlalchemy_tx_context.loader import PrimaryKeyLoader
+from sqlalchemy_tx_context.managers import (
+    ConnectionContextManager,
+    ConnectionTransactionContextManager,
+    SavepointMode,
+    SessionContextManager,
+    TimedSessionContextManager,
+    TimedTransactionContextManager,
+    TransactionContextManager,
+)
+from sqlalchemy_tx_context.options import (
+    TRANSACTION_OPTIONS_KEY,
+    AppliedTransactionOptions,
+    TransactionOptions,
+)
+from sqlalchemy_tx_context.profiling import (
+    SlowQuery,
+    SlowQueryProfiler,
+    compile_for_profile,
+    explain,
+    parameters_shape,
+)
+from sqlalchemy_tx_context.retry import RetryPolicy
+from sqlalchemy_tx_context.routing import ReplicaBalancingPolicy, RoundRobinPolicy
+from sqlalchemy_tx_context.sharding import (
+    SHARD_ID_KEY,
+    ConsistentHashRing,
+    ShardResolver,
+)
+from sqlalchemy_tx_context.statements import is_readonly_statement
+from sqlalchemy_tx_context.streaming import ResultStream
+from sqlalchemy_tx_context.warmup import (
+    CompiledCacheStats,
+    WarmupStatement,
+    ping_connections,
+    precompile,
+)
+from sqlalchemy_tx_context.watchdog import TransactionWatchdog
 
 _T = TypeVar("_T", covariant=True, bound=Any)
+_R = TypeVar("_R")
+_M = TypeVar("_M")
+_P = ParamSpec("_P")
+
+# Connection execution options of sessions created by `auto_context_autocommit`.
+_AUTOCOMMIT_OPTIONS: dict[str, Any] = {"isolation_level": "AUTOCOMMIT"}
 
 
 class SQLAlchemyTransactionContext:
@@ -42,7 +150,28 @@ class SQLAlchemyTransactionContext:
     _default_session_maker: async_sessionmaker[AsyncSession]
     _auto_context_on_execute: bool
     _auto_context_force_transaction: bool
+    _auto_context_autocommit: bool
+    _replica_session_makers: tuple[async_sessionmaker[AsyncSession], ...]
+    _replica_policy: ReplicaBalancingPolicy
+    _listeners: list[ContextListener]
+    _retry_policy: RetryPolicy
+    _read_coalescer: Optional[TaskSessionCoalescer]
+    _loaders: dict[tuple[type[Any], int], PrimaryKeyLoader[Any]]
+    _result_cache: Optional[ResultCacheBackend]
+    _result_cache_generation: int
+    _compiled_cache_stats: Optional[CompiledCacheStats]
+    _savepoint: SavepointMode
+    _callback_concurrency: int
+    _admission: Optional[AdmissionController]
+    _watchdog: Optional[TransactionWatchdog]
+    _statement_timeouts: bool
+    _shard_session_makers: dict[str, async_sessionmaker[AsyncSession]]
+    _shard_resolver: Optional[ShardResolver]
+    _profiler: Optional[SlowQueryProfiler]
+    _query_detector: Optional[NPlusOneDetector]
     _session_var: ContextVar[AsyncSession]
+    _connection_var: ContextVar[AsyncConnection]
+    _scope_var: ContextVar[_Scope]
 
     def __init__(
         self,
@@ -51,6 +180,27 @@ class SQLAlchemyTransactionContext:
         default_session_maker: Optional[async_sessionmaker[AsyncSession]] = None,
         auto_context_on_execute: bool = False,
         auto_context_force_transaction: bool = False,
+        replica_engines: Optional[Sequence[AsyncEngine]] = None,
+        replica_session_makers: Optional[
+            Sequence[async_sessionmaker[AsyncSession]]
+        ] = None,
+        replica_policy: Optional[ReplicaBalancingPolicy] = None,
+        listeners: Optional[Sequence[ContextListener]] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        auto_context_coalesce_reads: bool = False,
+        auto_context_coalesce_idle_timeout: float = 0.1,
+        result_cache: Optional[ResultCacheBackend] = None,
+        savepoint: SavepointMode = "always",
+        callback_concurrency: int = 1,
+        admission_control: Optional[AdmissionController] = None,
+        watchdog: Optional[TransactionWatchdog] = None,
+        shards: Optional[
+            Mapping[str, Union[AsyncEngine, async_sessionmaker[AsyncSession]]]
+        ] = None,
+        shard_resolver: Optional[ShardResolver] = None,
+        profiler: Optional[SlowQueryProfiler] = None,
+        query_detector: Optional[NPlusOneDetector] = None,
+        auto_context_autocommit: bool = False,
     ):
         """
         Initialize a transaction context manager.
@@ -74,6 +224,89 @@ class SQLAlchemyTransactionContext:
                 and `.transaction()` for all others including raw SQL (`text(...)`), DML, and custom executable objects.
 
             This option has no effect unless `auto_context_on_execute=True`.
+        :param replica_engines:
+            Optional read replica engines. Sessions for them are created with the same defaults
+            as the primary session maker.
+        :param replica_session_makers:
+            Optional read replica session factories. Used together with `replica_engines`,
+            which come first in the replica order.
+        :param replica_policy:
+            Balancing policy used to pick a replica for read-only sessions.
+            Defaults to `RoundRobinPolicy()`.
+
+            Replicas serve `session(read_only=True)` blocks and read-only statements executed
+            through the auto-context of `execute(...)`. Writes and everything inside `transaction()`
+            always use the primary.
+        :param listeners:
+            Optional lifecycle listeners receiving timed `ContextEvent`s for session open/close,
+            transaction begin/commit/rollback, savepoint begin/release/rollback and `execute(...)` calls.
+            See also `add_listener(...)`.
+        :param retry_policy:
+            Default retry policy of `run_in_transaction(...)` and `@transactional`.
+            Defaults to `RetryPolicy()`.
+        :param auto_context_coalesce_reads:
+            If True, consecutive read-only statements executed through the auto-context
+            in the same asyncio task share one lazily created session (and its pooled connection)
+            instead of opening a session per statement. The shared session is not bound to the context
+            and is closed when the task finishes or after `auto_context_coalesce_idle_timeout` seconds
+            without statements. Its connection runs in `AUTOCOMMIT` isolation, so no transaction
+            (and no snapshot) is held open between reads. Statements that use a transaction are not affected.
+
+            This option has no effect unless `auto_context_on_execute=True`.
+        :param auto_context_coalesce_idle_timeout:
+            Idle timeout in seconds of sessions shared by `auto_context_coalesce_reads`.
+        :param result_cache:
+            Optional backend caching results of `Select` statements executed with `execute(...)`
+            and the `result_cache=True` execution option, e.g. `InMemoryResultCache()`.
+            Tables written inside `transaction()` are invalidated when the outermost transaction commits.
+        :param savepoint:
+            Default savepoint mode of nested `transaction()` blocks:
+
+            - `"always"` (default): every nested block runs in a savepoint (`SAVEPOINT` / `RELEASE` round trips)
+              and can be rolled back on its own.
+            - `"never"`: nested blocks join the outer transaction without a savepoint. An exception
+              escaping a nested block does not undo its changes; if the outer block handles the exception,
+              those changes are committed with the rest of the transaction.
+            - `"on_error_handling"`: nested blocks join the outer transaction without a savepoint.
+              If an exception escapes a nested block and is handled, the outermost block rolls back
+              and raises `TransactionRollbackOnlyError` instead of committing.
+        :param callback_concurrency:
+            Maximum number of `on_commit(...)` / `on_rollback(...)` callbacks of one transaction
+            running at the same time. Defaults to 1 (callbacks run one by one, in registration order).
+        :param admission_control:
+            Optional `AdmissionController` capping the number of concurrently open sessions.
+            Excess callers queue by the `priority=...` passed to `session()`, `transaction()`,
+            `new_session()` and `new_transaction()`; sessions opened by `execute(...)`, `stream(...)`
+            and `auto_context_coalesce_reads` use `Priority.NORMAL`.
+        :param watchdog:
+            Optional `TransactionWatchdog` tracking open `session()` / `transaction()` blocks
+            and reporting long-running blocks and sessions idling inside a transaction.
+            Sessions opened by `execute(...)`, `stream(...)` and `auto_context_coalesce_reads` are not tracked.
+        :param shards:
+            Optional mapping of shard ids to shard engines or session factories. Sessions for engines
+            are created with the same defaults as the primary session maker. Shards serve blocks entered
+            with `shard_key=...` and `execute_on_all_shards(...)`; everything else uses the primary engine.
+        :param shard_resolver:
+            Callable mapping a shard key to a shard id.
+            Defaults to a `ConsistentHashRing` over the ids of `shards`.
+        :param profiler:
+            Optional `SlowQueryProfiler` recording statements run through `execute(...)` that exceed
+            its threshold, together with their query plans.
+        :param query_detector:
+            Optional `NPlusOneDetector` counting statements run through `execute(...)` in each
+            `session()` / `transaction()` context by statement shape and reporting repeated shapes.
+        :param auto_context_autocommit:
+            If True, `execute(...)` without an active session runs the statement in a temporary session
+            on an `AUTOCOMMIT` connection instead of a temporary transaction, saving the `BEGIN` and `COMMIT`
+            round trips; reads run without an implicit transaction. Tables written this way are invalidated
+            in the result cache right after the statement. `force_transaction=True` passed to `execute(...)`,
+            or `auto_context_force_transaction=True` unless overridden per call, still uses a transaction,
+            and reads coalesced by `auto_context_coalesce_reads` keep their shared session.
+
+            This option has no effect unless `auto_context_on_execute=True`.
+
+        :raise ValueError: If `callback_concurrency` is less than 1,
+            or if `replica_policy` does not fit the configured replicas.
         """
 
         self._engine = engine
@@ -86,76 +319,236 @@ class SQLAlchemyTransactionContext:
         self._default_session_maker = default_session_maker
         self._auto_context_on_execute = auto_context_on_execute
         self._auto_context_force_transaction = auto_context_force_transaction
+        self._auto_context_autocommit = auto_context_autocommit
+        self._replica_session_makers = tuple(
+            async_sessionmaker(
+                replica_engine,
+                class_=AsyncSession,
+                expire_on_commit=False,
+            )
+            for replica_engine in replica_engines or ()
+        ) + tuple(replica_session_makers or ())
+        self._replica_policy = replica_policy or RoundRobinPolicy()
+        self._replica_policy.attach(len(self._replica_session_makers))
+        self._listeners = list(listeners or ())
+        self._retry_policy = retry_policy or RetryPolicy()
+        self._read_coalescer = (
+            TaskSessionCoalescer(
+                auto_context_coalesce_idle_timeout,
+                self._close_coalesced,
+            )
+            if auto_context_coalesce_reads
+            else None
+        )
+        self._loaders = {}
+        self._result_cache = result_cache
+        self._result_cache_generation = 0
+        if result_cache is not None:
+            install_write_tracking()
+        self._compiled_cache_stats = None
+        self._savepoint = savepoint
+        if callback_concurrency < 1:
+            raise ValueError("callback_concurrency must be at least 1")
+        self._callback_concurrency = callback_concurrency
+        self._admission = admission_control
+        self._statement_timeouts = False
+        self._shard_session_makers = {
+            shard_id: (
+                shard
+                if isinstance(shard, async_sessionmaker)
+                else async_sessionmaker(
+                    shard,
+                    class_=AsyncSession,
+                    expire_on_commit=False,
+                )
+            )
+            for shard_id, shard in (shards or {}).items()
+        }
+        self._shard_resolver = shard_resolver or (
+            ConsistentHashRing(self._shard_session_makers)
+            if self._shard_session_makers
+            else None
+        )
+        self._watchdog = watchdog
+        if watchdog is not None:
+            for watched_engine in self._engines():
+                watchdog.attach(watched_engine)
+        self._profiler = profiler
+        self._query_detector = query_detector
         self._session_var = ContextVar("sqlalchemy_tx_context_session")
+        self._connection_var = ContextVar("sqlalchemy_tx_context_connection")
+        self._scope_var = ContextVar("sqlalchemy_tx_context_scope", default=_ROOT_SCOPE)
 
-    @asynccontextmanager
-    async def session(
+    def add_listener(self, listener: ContextListener) -> None:
+        """
+        Register a lifecycle listener.
+
+        Listeners should be registered before any context is entered,
+        otherwise nesting depth reported for already open blocks is not accurate.
+
+        :param listener: Listener to add.
+        """
+
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: ContextListener) -> None:
+        """
+        Unregister a previously added lifecycle listener.
+
+        :param listener: Listener to remove.
+
+        :raise ValueError: If the listener is not registered.
+        """
+
+        self._listeners.remove(listener)
+
+    def session(
         self,
         *,
         session_maker: Optional[async_sessionmaker[AsyncSession]] = None,
         reuse_if_exists: bool = False,
-    ) -> AsyncIterator[AsyncSession]:
+        read_only: bool = False,
+        name: Optional[str] = None,
+        priority: int = Priority.NORMAL,
+        shard_key: Optional[Any] = None,
+        timeout: Optional[float] = None,
+    ) -> SessionContextManager:
         """
         Enter a new session context or reuse the current one.
 
         :param session_maker: Optional custom session maker to use.
         :param reuse_if_exists: If True, reuses existing context-local session if present.
-
-        :return: AsyncSession instance.
+        :param read_only:
+            If True and read replicas are configured, a newly created session is bound
+            to a replica chosen by the balancing policy. Ignored when `session_maker` is given
+            or when the current session is reused.
+        :param name: Optional label reported to listeners. Ignored when the current session is reused.
+        :param priority: Admission priority class when `admission_control` is configured,
+            e.g. `Priority.BACKGROUND`. Ignored when the current session is reused.
+        :param shard_key:
+            If given, a newly created session is bound to the shard the resolver maps the key to.
+            A reused session must be bound to the same shard.
+        :param timeout:
+            Wall-clock deadline of the whole block in seconds, including admission and session open.
+            On expiry, the block is cancelled, its session closed, and `DeadlineExceededError` raised.
+            On PostgreSQL, the remaining budget is also set as `statement_timeout` before every statement.
+
+        :return: Async context manager yielding an AsyncSession instance.
 
         :raise SessionAlreadyActiveError: If session already exists and `reuse_if_exists` is False.
+        :raise ShardMismatchError: If the reused session is bound to another shard than `shard_key`.
+        :raise AdmissionTimeoutError: If the admission controller did not admit the session in time.
+        :raise DeadlineExceededError: If the block runs past `timeout`.
+        :raise ValueError: If `shard_key` is combined with `session_maker` or no shards are configured.
         """
 
-        current_session = self._session_var.get(None)
-
-        if current_session is not None:
-            if reuse_if_exists:
-                yield current_session
-                return
-            raise SessionAlreadyActiveError()
-
-        async with self._resolve_session_maker(session_maker) as session:
-            token = self._session_var.set(session)
-            try:
-                yield session
-            finally:
-                self._session_var.reset(token)
+        shard_id = None
+        if shard_key is not None:
+            shard_id, session_maker = self._resolve_shard(shard_key, session_maker)
+        if timeout is not None:
+            self._install_statement_timeouts()
+            return TimedSessionContextManager(
+                self,
+                session_maker,
+                reuse_if_exists,
+                read_only,
+                name,
+                False,
+                priority,
+                shard_id,
+                timeout,
+            )
+        return SessionContextManager(
+            self,
+            session_maker,
+            reuse_if_exists,
+            read_only,
+            name,
+            False,
+            priority,
+            shard_id,
+        )
 
-    @asynccontextmanager
-    async def transaction(
+    def transaction(
         self,
         *,
         session_maker: Optional[async_sessionmaker[AsyncSession]] = None,
         reuse_if_exists: bool = True,
         allow_nested_transactions: bool = True,
-    ) -> AsyncIterator[AsyncSession]:
+        name: Optional[str] = None,
+        savepoint: Optional[SavepointMode] = None,
+        read_only: bool = False,
+        isolation_level: Optional[IsolationLevel] = None,
+        deferrable: bool = False,
+        priority: int = Priority.NORMAL,
+        shard_key: Optional[Any] = None,
+        timeout: Optional[float] = None,
+    ) -> TransactionContextManager:
         """
         Enter a transaction context. Creates a new session if needed.
 
         If a transaction is already active, creates a nested transaction unless explicitly forbidden.
+        A current session bound to a read replica by `session(read_only=True)` is never reused:
+        the transaction runs in a new primary session that overrides it for the duration of the block.
 
         :param session_maker: Optional custom session maker.
         :param reuse_if_exists: Whether to reuse current session if available.
         :param allow_nested_transactions: Whether to allow nested transactions.
-
-        :return: AsyncSession with active transaction.
+        :param name: Optional label reported to listeners, e.g. `transaction(name="checkout")`.
+        :param savepoint: Savepoint mode of this block when it is nested; overrides the constructor default.
+        :param read_only:
+            Declare the transaction read-only (`SET TRANSACTION READ ONLY` on PostgreSQL, MySQL, MariaDB
+            and Oracle). Blocks nested in a read-only transaction, or declared read-only themselves,
+            join the outer transaction without a savepoint.
+        :param isolation_level: Isolation level of the transaction, applied as a connection execution option.
+        :param deferrable: Make a serializable read-only transaction deferrable (PostgreSQL only).
+
+            Options unsupported by the dialect are ignored; `isolation_level` and `deferrable`
+            only apply to the outermost transaction. See `get_transaction_options()`.
+        :param priority: Admission priority class of a newly created session.
+        :param shard_key: Shard key of a newly created session, see `session(...)`.
+        :param timeout:
+            Wall-clock deadline of the whole block in seconds, see `session(...)`. On expiry,
+            the transaction (or savepoint) is rolled back and `DeadlineExceededError` raised.
+
+        :return: Async context manager yielding an AsyncSession with active transaction.
 
         :raise SessionAlreadyActiveError: If session already exists and `reuse_if_exists` is False.
+        :raise ShardMismatchError: If the reused session is bound to another shard than `shard_key`.
         :raise TransactionAlreadyActiveError: If transaction is already active and nesting is disabled.
+        :raise TransactionRollbackOnlyError:
+            On leaving the outermost block normally after a flattened nested block failed
+            in `"on_error_handling"` mode.
+        :raise DeadlineExceededError: If the block runs past `timeout`.
         """
 
-        async with self.session(
+        session_context = self.session(
             session_maker=session_maker,
             reuse_if_exists=reuse_if_exists,
-        ) as session:
-            if session.in_transaction():
-                if allow_nested_transactions is False:
-                    raise TransactionAlreadyActiveError()
-                async with session.begin_nested():
-                    yield session
-            else:
-                async with session.begin():
-                    yield session
+            name=name,
+            priority=priority,
+            shard_key=shard_key,
+        )
+        session_context.primary = True
+        if timeout is not None:
+            self._install_statement_timeouts()
+            return TimedTransactionContextManager(
+                self,
+                session_context,
+                allow_nested_transactions,
+                name,
+                savepoint or self._savepoint,
+                self._transaction_options(read_only, isolation_level, deferrable),
+                timeout,
+            )
+        return TransactionContextManager(
+            self,
+            session_context,
+            allow_nested_transactions,
+            name,
+            savepoint or self._savepoint,
+            self._transaction_options(read_only, isolation_level, deferrable),
+        )
 
     @overload
     async def execute(
@@ -164,6 +557,7 @@ class SQLAlchemyTransactionContext:
         params: Optional[_CoreAnyExecuteParams] = None,
         *,
         force_transaction: Optional[bool] = None,
+        timeout: Optional[float] = None,
         execution_options: OrmExecuteOptionsParameter = util.EMPTY_DICT,
         bind_arguments: Optional[dict[str, Any]] = None,
         _parent_execute_state: Optional[Any] = None,
@@ -177,6 +571,7 @@ class SQLAlchemyTransactionContext:
         params: Optional[_CoreAnyExecuteParams] = None,
         *,
         force_transaction: Optional[bool] = None,
+        timeout: Optional[float] = None,
         execution_options: OrmExecuteOptionsParameter = util.EMPTY_DICT,
         bind_arguments: Optional[dict[str, Any]] = None,
         _parent_execute_state: Optional[Any] = None,
@@ -190,6 +585,7 @@ class SQLAlchemyTransactionContext:
         params: Optional[_CoreAnyExecuteParams] = None,
         *,
         force_transaction: Optional[bool] = None,
+        timeout: Optional[float] = None,
         execution_options: OrmExecuteOptionsParameter = util.EMPTY_DICT,
         bind_arguments: Optional[dict[str, Any]] = None,
         _parent_execute_state: Optional[Any] = None,
@@ -202,6 +598,7 @@ class SQLAlchemyTransactionContext:
         params: Optional[_CoreAnyExecuteParams] = None,
         *,
         force_transaction: Optional[bool] = None,
+        timeout: Optional[float] = None,
         execution_options: OrmExecuteOptionsParameter = util.EMPTY_DICT,
         bind_arguments: Optional[dict[str, Any]] = None,
         **kw: Any,
@@ -209,13 +606,17 @@ class SQLAlchemyTransactionContext:
         """
         Execute a SQLAlchemy statement using the current context-bound session.
 
-        If auto_context_on_execute is True and no session is active, a new session or transaction
+        If no session is active, the statement runs on the connection of the current `connection()` block.
+        Otherwise, if auto_context_on_execute is True and no session is active, a new session or transaction
         will be created depending on the statement type.
 
         :param statement: SQLAlchemy Executable (e.g., select, insert, update).
         :param params: Optional bound parameters.
         :param force_transaction: Overrides the default behavior defined by `auto_context_force_transaction`
                for this specific call.
+        :param timeout:
+            Wall-clock deadline of the call in seconds. A session or transaction created for the call
+            gets the deadline as `timeout=...`, see `transaction(...)`.
         :param execution_options: SQLAlchemy execution options.
         :param bind_arguments: Additional bind arguments.
         :param kw: Additional arguments passed to `session.execute`.
@@ -223,11 +624,53 @@ class SQLAlchemyTransactionContext:
         :return: SQLAlchemy Result object.
 
         :raise NoSessionError: If no session is currently active.
+        :raise DeadlineExceededError: If the call runs past `timeout`.
+        :raise NPlusOneQueryError: If the query detector is set to raise and the statement shape repeats too often.
+        :raise ValueError: If `bind_arguments` or `kw` are passed inside a `connection()` block.
         """
 
-        session: Optional[AsyncSession] = self.get_session(
-            strict=not self._auto_context_on_execute,
-        )
+        if (
+            self._result_cache is not None
+            and self._is_readonly_statement(statement)
+            and is_cacheable(statement, execution_options)
+        ):
+            return await self._execute_cached(
+                self._result_cache,
+                statement,
+                params,
+                force_transaction=force_transaction,
+                timeout=timeout,
+                execution_options=execution_options,
+                bind_arguments=bind_arguments,
+                **kw,
+            )
+
+        session: Optional[AsyncSession] = self.get_session(strict=False)
+        if session is None:
+            connection = self._connection_var.get(None)
+            if connection is not None:
+                self._check_connection_arguments(bind_arguments, kw)
+                return await self._execute_on_connection(
+                    connection,
+                    statement,
+                    params,
+                    timeout=timeout,
+                    execution_options=execution_options,
+                )
+            if not self._auto_context_on_execute:
+                raise NoSessionError()
+        if timeout is not None and session is not None:
+            self._install_statement_timeouts()
+            async with DeadlineScope(timeout, session):
+                return await self.execute(
+                    statement,
+                    params,
+                    force_transaction=force_transaction,
+                    execution_options=execution_options,
+                    bind_arguments=bind_arguments,
+                    **kw,
+                )
+
         if session is None:
             if self._need_force_transaction_on_context_execute(force_transaction):
                 session_factory = cast(
@@ -235,7 +678,54 @@ class SQLAlchemyTransactionContext:
                     self.transaction,
                 )
             else:
-                session_factory = self._get_context_for_statement(statement)
+                if self._read_coalescer is not None and self._is_readonly_statement(
+                    statement,
+                ):
+                    task = asyncio.current_task()
+                    if task is not None:
+                        coalesced = self._execute_coalesced(
+                            task,
+                            statement,
+                            params,
+                            execution_options=execution_options,
+                            bind_arguments=bind_arguments,
+                            **kw,
+                        )
+                        if timeout is None:
+                            return await coalesced
+                        async with DeadlineScope(timeout, None):
+                            return await coalesced
+                if self._auto_context_autocommit:
+                    session_factory = cast(
+                        Callable[..., AbstractAsyncContextManager[AsyncSession]],
+                        partial(
+                            self._autocommit_session,
+                            self._is_readonly_statement(statement),
+                        ),
+                    )
+                else:
+                    session_factory = self._get_context_for_statement(statement)
+            if timeout is not None:
+                session_factory = partial(session_factory, timeout=timeout)
+
+            if self._instrumented:
+                scope = self._scope_var.get()
+                scope_token = self._scope_var.set(
+                    _Scope(scope.depth, scope.label, True),
+                )
+                try:
+                    async with session_factory() as session:
+                        return await self._instrumented_execute(
+                            session,
+                            statement,
+                            params,
+                            execution_options=execution_options,
+                            bind_arguments=bind_arguments,
+                            **kw,
+                        )
+                finally:
+                    self._scope_var.reset(scope_token)
+
             async with session_factory() as session:
                 return await session.execute(
                     statement,
@@ -244,6 +734,18 @@ class SQLAlchemyTransactionContext:
                     bind_arguments=bind_arguments,
                     **kw,
                 )
+
+        if self._query_detector is not None:
+            self._query_detector.observe(session, statement)
+        if self._instrumented:
+            return await self._instrumented_execute(
+                session,
+                statement,
+                params,
+                execution_options=execution_options,
+                bind_arguments=bind_arguments,
+                **kw,
+            )
         return await session.execute(
             statement,
             params,
@@ -252,129 +754,1691 @@ class SQLAlchemyTransactionContext:
             **kw,
         )
 
-    @overload
-    def get_session(self, strict: Literal[True] = True) -> AsyncSession: ...
+    async def execute_many(
+        self,
+        statement: Executable,
+        rows: Iterable[Mapping[str, Any]],
+        *,
+        chunk_size: int = 1000,
+        transaction_per_chunk: bool = False,
+        execution_options: OrmExecuteOptionsParameter = util.EMPTY_DICT,
+        bind_arguments: Optional[dict[str, Any]] = None,
+    ) -> int:
+        """
+        Execute a statement for a large list of parameter sets, split into chunks.
+
+        Each chunk is executed as a single executemany / insertmanyvalues call through `execute(...)`.
+        `rows` is consumed lazily, so a generator keeps at most one chunk in memory.
+
+        Without an active session the same auto-context rules as `execute(...)` apply;
+        as the statement is a write, a transaction is always used.
+        Inside a `connection()` block the chunks run on the block's connection.
+
+        :param statement: SQLAlchemy Executable, usually `insert(...)`, `update(...)` or `text(...)`.
+        :param rows: Parameter sets, one mapping per row.
+        :param chunk_size: Maximum number of parameter sets per executemany call.
+        :param transaction_per_chunk:
+            If True, every chunk runs in its own `transaction()`: a separate transaction
+            when no transaction is active, or a savepoint inside an active one.
+            Inside a `connection()` block `connection_transaction()` is used instead.
+            If False, all chunks run in the current context, or in a single transaction
+            created by the auto-context.
+        :param execution_options: SQLAlchemy execution options.
+        :param bind_arguments: Additional bind arguments.
 
-    @overload
-    def get_session(self, strict: Literal[False]) -> Optional[AsyncSession]: ...
+        :return: Number of parameter sets executed.
 
-    @overload
-    def get_session(self, strict: bool) -> Optional[AsyncSession]: ...
+        :raise NoSessionError: If no session is active and `auto_context_on_execute` is False.
+        :raise ValueError: If `chunk_size` is not positive, or if `bind_arguments` are given
+            inside a `connection()` block.
+        """
 
-    def get_session(self, strict: bool = True) -> Optional[AsyncSession]:
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be positive")
+
+        chunks = self._iter_chunks(rows, chunk_size)
+        if self._block_connection() is not None:
+            # The chunks run in the transaction of the `connection()` block.
+            return await self._execute_chunks(
+                statement,
+                chunks,
+                transaction_per_chunk=transaction_per_chunk,
+                execution_options=execution_options,
+                bind_arguments=bind_arguments,
+            )
+
+        session = self.get_session(strict=not self._auto_context_on_execute)
+
+        if session is None and not transaction_per_chunk:
+            first_chunk = next(chunks, None)
+            if first_chunk is None:
+                return 0
+            async with self.transaction():
+                return await self._execute_chunks(
+                    statement,
+                    chain((first_chunk,), chunks),
+                    transaction_per_chunk=False,
+                    execution_options=execution_options,
+                    bind_arguments=bind_arguments,
+                )
+
+        return await self._execute_chunks(
+            statement,
+            chunks,
+            transaction_per_chunk=transaction_per_chunk,
+            execution_options=execution_options,
+            bind_arguments=bind_arguments,
+        )
+
+    async def execute_on_all_shards(
+        self,
+        statement: Executable,
+        params: Optional[_CoreAnyExecuteParams] = None,
+        *,
+        execution_options: OrmExecuteOptionsParameter = util.EMPTY_DICT,
+        **kw: Any,
+    ) -> Result[Any]:
         """
-        Return the current context-local session, or raise if none exists.
+        Execute a statement on every shard concurrently and merge the results.
 
-        :param strict: If True, raises NoSessionError if session is not set.
+        Each shard runs the statement in a new session, bound to the context for the duration
+        of the statement; statements other than `Select` and `CompoundSelect` run in a transaction
+        per shard, committed independently. Rows are merged in shard order; for DML,
+        `rowcount` of the merged result is the sum over all shards.
 
-        :return: AsyncSession or None.
+        :param statement: SQLAlchemy Executable.
+        :param params: Optional bound parameters.
+        :param execution_options: SQLAlchemy execution options.
+        :param kw: Additional arguments passed to `execute(...)`.
 
-        :raise NoSessionError: If no session is active and `strict=True`.
+        :return: Merged SQLAlchemy Result object.
+
+        :raise ValueError: If no shards are configured.
         """
 
-        session = self._session_var.get(None)
-        if session is None and strict is True:
-            raise NoSessionError()
-        return session
+        if not self._shard_session_makers:
+            raise ValueError("no shards are configured")
 
-    @asynccontextmanager
-    async def new_session(
+        transactional = not self._is_readonly_statement(statement)
+
+        async def run(shard_id: str) -> Result[Any]:
+            async with self._shard_context(shard_id, transactional):
+                return await self.execute(
+                    statement,
+                    params,
+                    execution_options=execution_options,
+                    **kw,
+                )
+
+        first, *others = await asyncio.gather(
+            *(run(shard_id) for shard_id in self._shard_session_makers),
+        )
+        return first.merge(*others) if others else first
+
+    async def run_sync(
         self,
-        *,
-        session_maker: Optional[async_sessionmaker[AsyncSession]] = None,
-    ) -> AsyncIterator[AsyncSession]:
+        fn: Callable[Concatenate[Session, _P], _R],
+        *args: _P.args,
+        **kwargs: _P.kwargs,
+    ) -> _R:
         """
-        Start a new independent session, even if another is already active.
+        Call a synchronous function with the current session in a single greenlet hop (`AsyncSession.run_sync`).
 
-        This overrides the current context-local session during the block.
+        Inside `fn`, ORM attribute access, lazy loads, flushes and `session.execute(...)` calls run without
+        awaiting each operation, which saves the per-statement coroutine and greenlet switching of `execute(...)`
+        in tight loops. Do not call back into the context from `fn`.
 
-        :param session_maker: Optional custom session factory.
+        If `auto_context_on_execute` is True and no session is active, `fn` runs in a new `transaction()`.
 
-        :return: New AsyncSession.
+        :param fn: Function receiving the synchronous `Session` as its first argument.
+        :param args: Positional arguments passed to `fn`.
+        :param kwargs: Keyword arguments passed to `fn`.
+
+        :return: Return value of `fn`.
+
+        :raise NoSessionError: If no session is currently active and `auto_context_on_execute` is False.
+        :raise ConnectionActiveError: If called inside a `connection()` block without an active session.
         """
 
-        async with self._resolve_session_maker(session_maker) as session:
-            token = self._session_var.set(session)
-            try:
-                yield session
-            finally:
-                self._session_var.reset(token)
+        if self._block_connection() is not None:
+            raise ConnectionActiveError()
+        session = self.get_session(strict=not self._auto_context_on_execute)
+        if session is None:
+            async with self.transaction() as session:
+                return await session.run_sync(fn, *args, **kwargs)
+        return await session.run_sync(fn, *args, **kwargs)
 
-    @asynccontextmanager
-    async def new_transaction(
+    def iterate_chunks(
         self,
+        statement: "Select[Unpack[tuple[Any, ...]]]",
+        params: Optional[Mapping[str, Any]] = None,
         *,
-        session_maker: Optional[async_sessionmaker[AsyncSession]] = None,
-    ) -> AsyncIterator[AsyncSession]:
+        key: Union[ColumnElement[Any], QueryableAttribute[Any]],
+        chunk_size: int = 1000,
+        commit_per_chunk: bool = False,
+        expunge: bool = False,
+        transaction_per_chunk: bool = False,
+        execution_options: OrmExecuteOptionsParameter = util.EMPTY_DICT,
+    ) -> ChunkIterator:
         """
-        Start a new transaction in a fresh, independent session.
+        Walk a large result with keyset pagination, one chunk of rows at a time.
 
-        Overrides the current session in the context for the duration.
+        Every chunk is a separate query ordered by `key` and filtered by `key > <last key of the previous chunk>`,
+        so the database never skips over already read rows and no cursor stays open between chunks.
+        `key` must be unique and not NULL, typically the primary key; the order of `statement` is replaced.
 
-        :param session_maker: Optional custom session factory.
+        Usage::
+
+            async with db.iterate_chunks(select(User), key=User.id, transaction_per_chunk=True) as chunks:
+                async for chunk in chunks:
+                    for (user,) in chunk:
+                        user.score = compute(user)
+
+        Uses the current session. Without an active session and with `auto_context_on_execute=True`,
+        a `session()` spanning the iteration is created.
+
+        :param statement: Select statement without `LIMIT`.
+        :param params: Optional bound parameters.
+        :param key: Unique column the rows are paginated by, e.g. `User.id`.
+        :param chunk_size: Maximum number of rows per chunk.
+        :param commit_per_chunk:
+            If True, the session is committed after each chunk has been processed, i.e. when the next one
+            is requested. Not allowed inside a `transaction()` block.
+        :param expunge:
+            If True, pending changes are flushed and `expunge_all()` is called on the session after each chunk,
+            so the identity map does not grow with the number of rows read.
+        :param transaction_per_chunk:
+            If True, every chunk is read and processed in its own `new_transaction()`, committed when
+            the next chunk is requested; the fresh session also keeps the identity map small.
+        :param execution_options: SQLAlchemy execution options.
 
-        :return: New AsyncSession with active transaction.
+        :return: ChunkIterator yielding sequences of rows.
+
+        :raise NoSessionError: When iteration starts, if no session is active and auto-context is disabled.
+        :raise ConnectionActiveError: When iteration starts, inside a `connection()` block without
+            an active session.
+        :raise TransactionAlreadyActiveError: When iteration starts, if `commit_per_chunk` is used
+            inside a `transaction()` block.
+        :raise ValueError: If `chunk_size` is not positive or `transaction_per_chunk` is combined with
+            `commit_per_chunk` or `expunge`.
         """
 
-        async with self.new_session(  # noqa: SIM117
-            session_maker=session_maker,
-        ) as session:
-            async with session.begin():
-                yield session
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be positive")
+        if transaction_per_chunk and (commit_per_chunk or expunge):
+            raise ValueError(
+                "transaction_per_chunk cannot be combined with commit_per_chunk or expunge",
+            )
+        return ChunkIterator(
+            self._iterate_chunks(
+                statement.add_columns(key.label(KEYSET_LABEL))
+                .order_by(None)
+                .order_by(key),
+                params,
+                key=key,
+                chunk_size=chunk_size,
+                commit_per_chunk=commit_per_chunk,
+                expunge=expunge,
+                transaction_per_chunk=transaction_per_chunk,
+                execution_options=execution_options,
+            ),
+        )
 
-    @staticmethod
-    def _is_readonly_statement(statement: Executable) -> bool:
+    def stream(
+        self,
+        statement: Executable,
+        params: Optional[_CoreAnyExecuteParams] = None,
+        *,
+        yield_per: Optional[int] = None,
+        force_transaction: Optional[bool] = None,
+        execution_options: OrmExecuteOptionsParameter = util.EMPTY_DICT,
+        bind_arguments: Optional[dict[str, Any]] = None,
+        **kw: Any,
+    ) -> ResultStream[Row[Any]]:
         """
-        Check whether the statement is read-only (e.g., SELECT).
+        Execute a statement with a server-side cursor and iterate over the rows.
 
-        This method is used to determine when a transaction is optional
-        during automatic context creation.
+        Uses the current context-bound session if one is active. Otherwise, when `auto_context_on_execute`
+        is True, a temporary session is created following the same rules as `execute(...)`.
+        That session is not bound to the context and lives exactly as long as the stream:
+        it is closed when iteration ends, fails, or the `async with` block exits.
+        Inside a `connection()` block the statement is streamed on the block's connection.
 
-        :return: True if statement is considered read-only.
+        Usage::
+
+            async with db.stream(select(User), yield_per=1000) as rows:
+                async for row in rows:
+                    ...
+
+        :param statement: SQLAlchemy Executable.
+        :param params: Optional bound parameters.
+        :param yield_per: Number of rows fetched from the cursor at a time.
+        :param force_transaction: Overrides `auto_context_force_transaction` for this call.
+        :param execution_options: SQLAlchemy execution options.
+        :param bind_arguments: Additional bind arguments.
+        :param kw: Additional arguments passed to `session.stream`.
+
+        :return: ResultStream yielding rows.
+
+        :raise NoSessionError: When iteration starts, if no session is active and auto-context is disabled.
+        :raise ValueError: When iteration starts, if `bind_arguments` or `kw` are given
+            inside a `connection()` block.
         """
 
-        return isinstance(statement, (Select, CompoundSelect))
+        return ResultStream(
+            partial(
+                self._open_stream,
+                statement,
+                params,
+                scalars=False,
+                yield_per=yield_per,
+                force_transaction=force_transaction,
+                execution_options=execution_options,
+                bind_arguments=bind_arguments,
+                **kw,
+            ),
+        )
 
-    def _need_force_transaction_on_context_execute(
+    def stream_scalars(
         self,
-        force_transaction: Optional[bool],
-    ) -> bool:
+        statement: Executable,
+        params: Optional[_CoreAnyExecuteParams] = None,
+        *,
+        yield_per: Optional[int] = None,
+        force_transaction: Optional[bool] = None,
+        execution_options: OrmExecuteOptionsParameter = util.EMPTY_DICT,
+        bind_arguments: Optional[dict[str, Any]] = None,
+        **kw: Any,
+    ) -> ResultStream[Any]:
         """
-        Determine whether a transactional context is required based on the call-specific and global flags.
+        Same as `stream(...)`, but yields the first column of every row.
 
-        :param force_transaction: Optional per-call override of auto-context behavior.
+        :return: ResultStream yielding scalar values.
+        """
 
-        :return: True if a transactional context should be created, False otherwise.
+        return ResultStream(
+            partial(
+                self._open_stream,
+                statement,
+                params,
+                scalars=True,
+                yield_per=yield_per,
+                force_transaction=force_transaction,
+                execution_options=execution_options,
+                bind_arguments=bind_arguments,
+                **kw,
+            ),
+        )
+
+    async def run_in_transaction(
+        self,
+        fn: Callable[..., Awaitable[_R]],
+        *args: Any,
+        retry: Optional[RetryPolicy] = None,
+        new_session: bool = False,
+        name: Optional[str] = None,
+        **kwargs: Any,
+    ) -> _R:
         """
+        Run `fn(*args, **kwargs)` in a transaction, re-running it on transient errors.
 
-        if force_transaction is not None:
-            return force_transaction
-        else:
-            return self._auto_context_force_transaction
+        The whole unit of work is repeated with a fresh transaction when the driver reports
+        a serialization failure, deadlock or lock timeout, as defined by the retry policy
+        for the dialect of the primary engine.
 
-    def _get_context_for_statement(
+        If a transaction is already active in the context, `fn` runs in a nested `transaction()`
+        without retries: a transient error invalidates the outer transaction, so only the
+        outermost unit of work can be safely retried.
+
+        Errors raised after the commit, e.g. by `on_commit(...)` callbacks, are never retried.
+
+        :param fn: Coroutine function implementing the unit of work. It must be safe to call repeatedly.
+        :param args: Positional arguments for `fn`.
+        :param retry: Retry policy for this call. Defaults to the `retry_policy` of the context.
+        :param new_session: If True, every attempt runs in `new_transaction()` instead of `transaction()`.
+        :param name: Optional label reported to listeners.
+        :param kwargs: Keyword arguments for `fn`. `retry`, `new_session` and `name` are reserved;
+            use `@transactional` or `functools.partial` to pass arguments with these names.
+
+        :return: Result of `fn`.
+        """
+
+        return await self._run_with_retry(
+            partial(fn, *args, **kwargs),
+            retry,
+            new_session,
+            name,
+        )
+
+    @overload
+    def transactional(
         self,
-        statement: Executable,
-    ) -> Callable[..., AbstractAsyncContextManager[AsyncSession]]:
+        fn: Callable[_P, Awaitable[_R]],
+    ) -> Callable[_P, Awaitable[_R]]: ...
+
+    @overload
+    def transactional(
+        self,
+        *,
+        retry: Optional[RetryPolicy] = None,
+        new_session: bool = False,
+        name: Optional[str] = None,
+    ) -> Callable[[Callable[_P, Awaitable[_R]]], Callable[_P, Awaitable[_R]]]: ...
+
+    def transactional(
+        self,
+        fn: Optional[Callable[_P, Awaitable[_R]]] = None,
+        *,
+        retry: Optional[RetryPolicy] = None,
+        new_session: bool = False,
+        name: Optional[str] = None,
+    ) -> Any:
         """
-        Returns a context factory (`self.session` or `self.transaction`) appropriate for the given statement.
+        Decorate a coroutine function to run through `run_in_transaction(...)`.
 
-        Used to select `.session` or `.transaction` based on statement type during automatic context creation.
+        Can be used both as `@db.transactional` and `@db.transactional(retry=RetryPolicy(...))`.
 
-        :return: `.session` if the statement is a read-only query (instances of `Select` or `CompoundSelect`).
-                 `.transaction` for all other statement types (e.g., `Insert`, `Update`, `Delete`, `text(...)`).
+        :param fn: Coroutine function to wrap.
+        :param retry: Retry policy. Defaults to the `retry_policy` of the context.
+        :param new_session: If True, every call runs in `new_transaction()`.
+        :param name: Optional label reported to listeners. Defaults to the function's qualified name.
+
+        :return: Wrapped coroutine function or a decorator.
         """
 
-        if self._is_readonly_statement(statement):
-            return cast(
-                Callable[..., AbstractAsyncContextManager[AsyncSession]],
-                self.session,
-            )
-        else:
-            return cast(
-                Callable[..., AbstractAsyncContextManager[AsyncSession]],
-                self.transaction,
-            )
+        def decorator(
+            func: Callable[_P, Awaitable[_R]],
+        ) -> Callable[_P, Awaitable[_R]]:
+            label = name or getattr(func, "__qualname__", None)
+
+            @wraps(func)
+            async def wrapper(*args: _P.args, **kwargs: _P.kwargs) -> _R:
+                return await self._run_with_retry(
+                    partial(func, *args, **kwargs),
+                    retry,
+                    new_session,
+                    label,
+                )
+
+            return wrapper
+
+        if fn is not None:
+            return decorator(fn)
+        return decorator
+
+    def on_commit(self, callback: TransactionCallback) -> None:
+        """
+        Run a callback after the outermost `transaction()` of the current session commits.
+
+        Callbacks run after the connection has been released, outside the transaction,
+        so locks are not held while they run. A callback registered inside a savepoint
+        is dropped if the savepoint is rolled back. Errors raised by callbacks propagate
+        from the `transaction()` block after all callbacks have run; the transaction stays committed.
+
+        :param callback: Callable taking no arguments; coroutine functions are awaited.
+
+        :raise NoSessionError: If no session is active.
+        :raise NoTransactionError: If the current session is not inside a `transaction()` block.
+        """
+
+        self._get_callbacks().add(callback, on_commit=True)
+
+    def on_rollback(self, callback: TransactionCallback) -> None:
+        """
+        Run a callback after the outermost `transaction()` of the current session rolls back.
+
+        A callback registered inside a savepoint that is rolled back runs when the outermost
+        transaction ends, whether it commits or not.
+
+        :param callback: Callable taking no arguments; coroutine functions are awaited.
+
+        :raise NoSessionError: If no session is active.
+        :raise NoTransactionError: If the current session is not inside a `transaction()` block.
+        """
+
+        self._get_callbacks().add(callback, on_commit=False)
+
+    def loader(
+        self,
+        entity: type[_M],
+        *,
+        max_batch_size: int = 1000,
+    ) -> PrimaryKeyLoader[_M]:
+        """
+        Return a loader that batches concurrent primary key lookups of `entity`.
+
+        Loaders are shared per entity and batch size, so concurrent callers
+        obtaining the loader independently are still batched together:
+
+            users = await asyncio.gather(*(db.loader(User).load(user_id) for user_id in ids))
+
+        Loading needs an AsyncSession: `load(...)` raises `ConnectionActiveError`
+        inside a `connection()` block without an active session.
+
+        :param entity: ORM mapped class with a single-column primary key.
+        :param max_batch_size: Maximum number of keys per IN query.
+
+        :return: PrimaryKeyLoader for the entity.
+
+        :raise ValueError: If the entity has a composite primary key.
+        """
+
+        key = (entity, max_batch_size)
+        loader = self._loaders.get(key)
+        if loader is None:
+            loader = self._loaders[key] = PrimaryKeyLoader(
+                self,
+                entity,
+                max_batch_size=max_batch_size,
+            )
+        return loader
+
+    async def warmup(
+        self,
+        *,
+        statements: Iterable[WarmupStatement] = (),
+        connections: int = 1,
+    ) -> int:
+        """
+        Prepare the primary and replica engines for traffic, e.g. on application startup.
+
+        Opens `connections` pooled connections per engine at the same time and pings each,
+        then compiles `statements` into the compiled cache of every engine, so the first requests
+        skip both connection setup and SQL compilation. Also starts `compiled_cache_stats`.
+
+        `connections` should not exceed `pool_size + max_overflow`, otherwise the call waits
+        for the pool timeout.
+
+        :param statements: Statements to pre-compile. Pair a statement with example parameters,
+            e.g. `(insert(User), {"name": ""})`, when its SQL depends on the parameter names.
+        :param connections: Number of connections to open per engine.
+
+        :return: Number of statements compiled into a cache, summed over engines.
+
+        :raise ValueError: If `connections` is less than 1.
+        """
+
+        if connections < 1:
+            raise ValueError("connections must be at least 1")
+
+        self._start_compiled_cache_stats()
+        engines = self._engines()
+        await asyncio.gather(
+            *(ping_connections(engine, connections) for engine in engines),
+        )
+        statements = list(statements)
+        return sum(precompile(engine, statements) for engine in engines)
+
+    @property
+    def compiled_cache_stats(self) -> CompiledCacheStats:
+        """
+        Compiled-cache hit and miss counters of the primary and replica engines.
+
+        Counting starts on first access (or on `warmup(...)`).
+        """
+
+        return self._start_compiled_cache_stats()
+
+    async def close_coalesced_sessions(self) -> None:
+        """
+        Close all sessions shared by `auto_context_coalesce_reads` and wait until they are closed.
+
+        Useful on application shutdown, before disposing the engine.
+        """
+
+        if self._read_coalescer is not None:
+            await self._read_coalescer.close_all()
+
+    @overload
+    def get_session(self, strict: Literal[True] = True) -> AsyncSession: ...
+
+    @overload
+    def get_session(self, strict: Literal[False]) -> Optional[AsyncSession]: ...
+
+    @overload
+    def get_session(self, strict: bool) -> Optional[AsyncSession]: ...
+
+    def get_session(self, strict: bool = True) -> Optional[AsyncSession]:
+        """
+        Return the current context-local session, or raise if none exists.
+
+        :param strict: If True, raises NoSessionError if session is not set.
+
+        :return: AsyncSession or None.
+
+        :raise NoSessionError: If no session is active and `strict=True`.
+        """
+
+        session = self._session_var.get(None)
+        if session is None and strict is True:
+            raise NoSessionError()
+        return session
+
+    def get_transaction_options(self) -> Optional[AppliedTransactionOptions]:
+        """
+        Return the options applied to the outermost transaction of the current session.
+
+        :return: AppliedTransactionOptions, or None if no session is active or its transaction
+            was started without `read_only`, `isolation_level` or `deferrable`.
+        """
+
+        session = self._session_var.get(None)
+        if session is None:
+            return None
+        return session.info.get(TRANSACTION_OPTIONS_KEY)
+
+    def get_shard_id(self) -> Optional[str]:
+        """
+        Return the id of the shard the current session is bound to.
+
+        :return: Shard id, or None if no session is active or it was not opened with `shard_key=...`.
+        """
+
+        session = self._session_var.get(None)
+        if session is None:
+            return None
+        return session.info.get(SHARD_ID_KEY)
+
+    def new_session(
+        self,
+        *,
+        session_maker: Optional[async_sessionmaker[AsyncSession]] = None,
+        read_only: bool = False,
+        name: Optional[str] = None,
+        priority: int = Priority.NORMAL,
+        shard_key: Optional[Any] = None,
+        timeout: Optional[float] = None,
+    ) -> SessionContextManager:
+        """
+        Start a new independent session, even if another is already active.
+
+        This overrides the current context-local session during the block.
+
+        :param session_maker: Optional custom session factory.
+        :param read_only: If True, binds the session to a read replica when replicas are configured.
+        :param name: Optional label reported to listeners.
+        :param priority: Admission priority class when `admission_control` is configured.
+        :param shard_key: If given, binds the session to the shard the resolver maps the key to.
+        :param timeout: Wall-clock deadline of the whole block in seconds, see `session(...)`.
+
+        :return: Async context manager yielding a new AsyncSession.
+
+        :raise AdmissionTimeoutError: If the admission controller did not admit the session in time.
+        :raise DeadlineExceededError: If the block runs past `timeout`.
+        :raise ValueError: If `shard_key` is combined with `session_maker` or no shards are configured.
+        """
+
+        shard_id = None
+        if shard_key is not None:
+            shard_id, session_maker = self._resolve_shard(shard_key, session_maker)
+        if timeout is not None:
+            self._install_statement_timeouts()
+            return TimedSessionContextManager(
+                self,
+                session_maker,
+                False,
+                read_only,
+                name,
+                True,
+                priority,
+                shard_id,
+                timeout,
+            )
+        return SessionContextManager(
+            self,
+            session_maker,
+            False,
+            read_only,
+            name,
+            True,
+            priority,
+            shard_id,
+        )
+
+    def new_transaction(
+        self,
+        *,
+        session_maker: Optional[async_sessionmaker[AsyncSession]] = None,
+        name: Optional[str] = None,
+        read_only: bool = False,
+        isolation_level: Optional[IsolationLevel] = None,
+        deferrable: bool = False,
+        priority: int = Priority.NORMAL,
+        shard_key: Optional[Any] = None,
+        timeout: Optional[float] = None,
+    ) -> TransactionContextManager:
+        """
+        Start a new transaction in a fresh, independent session.
+
+        Overrides the current session in the context for the duration.
+
+        :param session_maker: Optional custom session factory.
+        :param name: Optional label reported to listeners.
+        :param read_only: Declare the transaction read-only, see `transaction(...)`.
+        :param isolation_level: Isolation level of the transaction.
+        :param deferrable: Make a serializable read-only transaction deferrable (PostgreSQL only).
+        :param priority: Admission priority class when `admission_control` is configured.
+        :param shard_key: If given, binds the session to the shard the resolver maps the key to.
+        :param timeout: Wall-clock deadline of the whole block in seconds, see `transaction(...)`.
+
+        :return: Async context manager yielding a new AsyncSession with active transaction.
+
+        :raise DeadlineExceededError: If the block runs past `timeout`.
+        """
+
+        session_context = self.new_session(
+            session_maker=session_maker,
+            name=name,
+            priority=priority,
+            shard_key=shard_key,
+        )
+        if timeout is not None:
+            self._install_statement_timeouts()
+            return TimedTransactionContextManager(
+                self,
+                session_context,
+                True,
+                name,
+                self._savepoint,
+                self._transaction_options(read_only, isolation_level, deferrable),
+                timeout,
+            )
+        return TransactionContextManager(
+            self,
+            session_context,
+            True,
+            name,
+            self._savepoint,
+            self._transaction_options(read_only, isolation_level, deferrable),
+        )
+
+    def connection(
+        self,
+        *,
+        reuse_if_exists: bool = False,
+        priority: int = Priority.NORMAL,
+    ) -> ConnectionContextManager:
+        """
+        Enter a Core-only context holding an `AsyncConnection` of the primary engine instead of a session.
+
+        `execute(...)` runs statements directly on the connection while no session is active, skipping
+        the unit of work, identity map and session events. Like `engine.connect()`, the connection
+        rolls back on exit anything not committed with `await connection.commit()`.
+
+        :param reuse_if_exists: If True, reuses the existing context-local connection if present.
+        :param priority: Admission priority class when an admission controller is configured.
+
+        :return: Async context manager yielding an AsyncConnection.
+
+        :raise SessionAlreadyActiveError:
+            If a session is active, or a connection is active and `reuse_if_exists` is False.
+        :raise AdmissionTimeoutError: If the admission controller did not admit the connection in time.
+        """
+
+        return ConnectionContextManager(self, reuse_if_exists, priority)
+
+    def connection_transaction(
+        self,
+        *,
+        reuse_if_exists: bool = True,
+        allow_nested_transactions: bool = True,
+        priority: int = Priority.NORMAL,
+    ) -> ConnectionTransactionContextManager:
+        """
+        Enter a Core-only transaction context. Opens a new connection if needed, see `connection()`.
+
+        If the connection already has an active transaction, begins a savepoint unless explicitly forbidden.
+
+        :param reuse_if_exists: Whether to reuse the current connection if available.
+        :param allow_nested_transactions: Whether to allow nested transactions.
+        :param priority: Admission priority class of a newly opened connection.
+
+        :return: Async context manager yielding an AsyncConnection with active transaction.
+
+        :raise SessionAlreadyActiveError:
+            If a session is active, or a connection is active and `reuse_if_exists` is False.
+        :raise TransactionAlreadyActiveError: If transaction is already active and nesting is disabled.
+        """
+
+        return ConnectionTransactionContextManager(
+            self.connection(reuse_if_exists=reuse_if_exists, priority=priority),
+            allow_nested_transactions,
+        )
+
+    @overload
+    def get_connection(self, strict: Literal[True] = True) -> AsyncConnection: ...
+
+    @overload
+    def get_connection(self, strict: Literal[False]) -> Optional[AsyncConnection]: ...
+
+    @overload
+    def get_connection(self, strict: bool) -> Optional[AsyncConnection]: ...
+
+    def get_connection(self, strict: bool = True) -> Optional[AsyncConnection]:
+        """
+        Return the current context-local connection of a `connection()` block.
+
+        :param strict: If True, raises NoSessionError if no connection is set.
+
+        :return: AsyncConnection or None.
+
+        :raise NoSessionError: If no connection is active and `strict=True`.
+        """
+
+        connection = self._connection_var.get(None)
+        if connection is None and strict is True:
+            raise NoSessionError()
+        return connection
+
+    async def _execute_cached(
+        self,
+        cache: ResultCacheBackend,
+        statement: Executable,
+        params: Optional[_CoreAnyExecuteParams],
+        *,
+        execution_options: OrmExecuteOptionsParameter,
+        **kw: Any,
+    ) -> Result[Any]:
+        """
+        Execute a read-only statement through the result cache.
+
+        The cache is bypassed for executemany parameters, for sessions with uncommitted changes,
+        so a transaction always reads its own writes, and inside `connection()` blocks.
+        Cached ORM instances are merged into the current session, or into a fresh one without a session.
+
+        :param cache: Result cache backend.
+        :param statement: SQLAlchemy Executable.
+        :param params: Optional bound parameters.
+        :param execution_options: SQLAlchemy execution options.
+        :param kw: Additional arguments passed to `execute(...)`.
+
+        :return: SQLAlchemy Result object.
+
+        :raise NoSessionError: If no session is active and `auto_context_on_execute` is disabled.
+        """
+
+        uncached_options = {**execution_options, RESULT_CACHE_OPTION: False}
+        session = self.get_session(strict=False)
+        if (
+            session is None
+            and self._connection_var.get(None) is None
+            and not self._auto_context_on_execute
+        ):
+            raise NoSessionError()
+        if (
+            (params is not None and not isinstance(params, Mapping))
+            or (session is None and self._connection_var.get(None) is not None)
+        ) or (
+            session is not None
+            and (
+                session.info.get(WRITTEN_TABLES_KEY)
+                or session.new
+                or session.deleted
+                or session.dirty
+            )
+        ):
+            return await self.execute(
+                statement,
+                params,
+                execution_options=uncached_options,
+                **kw,
+            )
+
+        key = result_cache_key(statement, params, self._engine.dialect)
+        shard_id = None if session is None else session.info.get(SHARD_ID_KEY)
+        if shard_id is not None:
+            key = f"{shard_id}:{key}"
+        frozen = await cache.get(key)
+        if frozen is None:
+            generation = self._result_cache_generation
+            result = await self.execute(
+                statement,
+                params,
+                execution_options=uncached_options,
+                **kw,
+            )
+            frozen = result.freeze()
+            # Skip storing results that may predate a commit finished in the meantime.
+            if generation == self._result_cache_generation:
+                await cache.set(key, frozen, statement_tables(statement))
+
+        # Merging copies cached ORM instances, so no two callers share them.
+        target = Session() if session is None else session.sync_session
+        try:
+            merged = cast(
+                FrozenResult[Any],
+                loading.merge_frozen_result(  # type: ignore[reportUnknownMemberType]
+                    target,
+                    statement,
+                    frozen,
+                    load=False,
+                ),
+            )
+            return merged()
+        finally:
+            if session is None:
+                target.close()
+
+    async def _invalidate_result_cache(self, tables: Collection[str]) -> None:
+        """
+        Drop cached results depending on tables written by a committed transaction.
+
+        :param tables: Names of written tables.
+        """
+
+        if self._result_cache is not None:
+            self._result_cache_generation += 1
+            await self._result_cache.invalidate(tables)
+
+    async def _execute_coalesced(
+        self,
+        task: "asyncio.Task[Any]",
+        statement: Executable,
+        params: Optional[_CoreAnyExecuteParams],
+        **kw: Any,
+    ) -> Result[Any]:
+        """
+        Execute a read-only statement on the session shared by the current task.
+
+        The session is emptied after every statement, so objects returned by one read are detached
+        and never flushed or reused by the next one.
+
+        :param task: Current task.
+        :param statement: SQLAlchemy Executable.
+        :param params: Optional bound parameters.
+        :param kw: Additional arguments passed to `session.execute`.
+
+        :return: SQLAlchemy Result object.
+        """
+
+        coalescer = self._read_coalescer
+        assert coalescer is not None
+
+        session = coalescer.acquire(task)
+        opened = session is None
+        if session is None:
+            if self._admission is not None:
+                await self._admission.acquire()
+            replica_index = self._acquire_replica()
+            context = self._resolve_session_maker(
+                (
+                    None
+                    if replica_index is None
+                    else self._replica_session_makers[replica_index]
+                ),
+            )
+            try:
+                session = await context.__aenter__()
+            except BaseException:
+                self._close_coalesced(replica_index)
+                raise
+            coalescer.add(task, session, context, replica_index)
+
+        try:
+            if opened:
+                # The session outlives the statement, so it must not hold a transaction open in between.
+                await session.connection(execution_options=_AUTOCOMMIT_OPTIONS)
+            if self._instrumented:
+                scope = self._scope_var.get()
+                scope_token = self._scope_var.set(
+                    _Scope(scope.depth, scope.label, True),
+                )
+                try:
+                    result = await self._instrumented_execute(
+                        session,
+                        statement,
+                        params,
+                        **kw,
+                    )
+                finally:
+                    self._scope_var.reset(scope_token)
+            else:
+                result = await session.execute(statement, params, **kw)
+        except BaseException:
+            coalescer.discard(task)
+            raise
+
+        # Loaded objects must not be flushed by, nor served stale to, the next read of the task.
+        session.expunge_all()
+        coalescer.release(task)
+        return result
+
+    async def _run_with_retry(
+        self,
+        unit_of_work: Callable[[], Awaitable[_R]],
+        retry: Optional[RetryPolicy],
+        new_session: bool,
+        name: Optional[str],
+    ) -> _R:
+        """
+        Run a unit of work in a transaction, re-running it on retryable errors.
+
+        See `run_in_transaction(...)`.
+
+        :param unit_of_work: Coroutine function without arguments.
+        :param retry: Retry policy or None for the default one.
+        :param new_session: Whether to use `new_transaction()` for every attempt.
+        :param name: Optional label reported to listeners.
+
+        :return: Result of the unit of work.
+        """
+
+        if not new_session:
+            current_session = self._session_var.get(None)
+            if current_session is not None and current_session.in_transaction():
+                async with self.transaction(name=name):
+                    return await unit_of_work()
+
+        policy = retry or self._retry_policy
+        dialect_name = self._engine.dialect.name
+        attempt = 0
+        while True:
+            context = (
+                self.new_transaction(name=name)
+                if new_session
+                else self.transaction(name=name)
+            )
+            try:
+                async with context:
+                    return await unit_of_work()
+            except DBAPIError as exc:
+                # Errors of `on_commit` callbacks come after the commit; re-running would repeat the work.
+                if (
+                    context.committed
+                    or attempt >= policy.retries
+                    or not policy.is_retryable(exc, dialect_name)
+                ):
+                    raise
+            attempt += 1
+            await asyncio.sleep(policy.delay(attempt))
+
+    async def _open_stream(
+        self,
+        statement: Executable,
+        params: Optional[_CoreAnyExecuteParams],
+        stack: AsyncExitStack,
+        *,
+        scalars: bool,
+        yield_per: Optional[int],
+        force_transaction: Optional[bool],
+        execution_options: OrmExecuteOptionsParameter,
+        bind_arguments: Optional[dict[str, Any]],
+        **kw: Any,
+    ) -> Union[AsyncResult[Any], AsyncScalarResult[Any]]:
+        """
+        Start streaming a statement for a `ResultStream`.
+
+        :param statement: SQLAlchemy Executable.
+        :param params: Optional bound parameters.
+        :param stack: Exit stack owned by the stream; a temporary session is registered on it.
+
+        :return: Streaming result.
+        """
+
+        if yield_per is not None:
+            execution_options = {**execution_options, "yield_per": yield_per}
+
+        connection = self._block_connection()
+        if connection is not None:
+            self._check_connection_arguments(bind_arguments, kw)
+            # A server-side cursor streams a single parameter set.
+            single_params = cast(Optional[_CoreSingleExecuteParams], params)
+            if scalars:
+                return await connection.stream_scalars(
+                    statement,
+                    single_params,
+                    execution_options=execution_options,
+                )
+            return await connection.stream(
+                statement,
+                single_params,
+                execution_options=execution_options,
+            )
+
+        session = self.get_session(strict=not self._auto_context_on_execute)
+        if session is None:
+            session = await stack.enter_async_context(
+                self._detached_session(statement, force_transaction),
+            )
+
+        if scalars:
+            return await session.stream_scalars(
+                statement,
+                params,
+                execution_options=execution_options,
+                bind_arguments=bind_arguments,
+                **kw,
+            )
+        return await session.stream(
+            statement,
+            params,
+            execution_options=execution_options,
+            bind_arguments=bind_arguments,
+            **kw,
+        )
+
+    async def _execute_chunks(
+        self,
+        statement: Executable,
+        chunks: Iterable[list[Mapping[str, Any]]],
+        *,
+        transaction_per_chunk: bool,
+        execution_options: OrmExecuteOptionsParameter,
+        bind_arguments: Optional[dict[str, Any]],
+    ) -> int:
+        """
+        Execute the statement once per chunk of parameter sets.
+
+        :param statement: SQLAlchemy Executable.
+        :param chunks: Chunks of parameter sets.
+        :param transaction_per_chunk: Whether to wrap every chunk in `transaction()`,
+            or `connection_transaction()` inside a `connection()` block.
+        :param execution_options: SQLAlchemy execution options.
+        :param bind_arguments: Additional bind arguments.
+
+        :return: Number of parameter sets executed.
+        """
+
+        transaction = cast(
+            Callable[[], AbstractAsyncContextManager[Any]],
+            (
+                self.connection_transaction
+                if self._block_connection() is not None
+                else self.transaction
+            ),
+        )
+        count = 0
+        for chunk in chunks:
+            if transaction_per_chunk:
+                async with transaction():
+                    await self.execute(
+                        statement,
+                        chunk,
+                        execution_options=execution_options,
+                        bind_arguments=bind_arguments,
+                    )
+            else:
+                await self.execute(
+                    statement,
+                    chunk,
+                    execution_options=execution_options,
+                    bind_arguments=bind_arguments,
+                )
+            count += len(chunk)
+        return count
+
+    async def _iterate_chunks(
+        self,
+        statement: "Select[Unpack[tuple[Any, ...]]]",
+        params: Optional[Mapping[str, Any]],
+        *,
+        key: Union[ColumnElement[Any], QueryableAttribute[Any]],
+        chunk_size: int,
+        commit_per_chunk: bool,
+        expunge: bool,
+        transaction_per_chunk: bool,
+        execution_options: OrmExecuteOptionsParameter,
+    ) -> AsyncGenerator[Sequence[Row[Any]], None]:
+        """
+        Produce the chunks of `iterate_chunks(...)`.
+
+        :param statement: Ordered select statement with the keyset column appended.
+        """
+
+        if self._block_connection() is not None:
+            raise ConnectionActiveError()
+        async with AsyncExitStack() as stack:
+            session: Optional[AsyncSession] = None
+            if not transaction_per_chunk:
+                session = self.get_session(strict=not self._auto_context_on_execute)
+                if session is None:
+                    session = await stack.enter_async_context(self.session())
+                elif commit_per_chunk and CALLBACKS_KEY in session.info:
+                    raise TransactionAlreadyActiveError()
+
+            last_key: Any = None
+            while True:
+                page = (
+                    statement if last_key is None else statement.where(key > last_key)
+                )
+                page = page.limit(chunk_size)
+                async with AsyncExitStack() as chunk_stack:
+                    if transaction_per_chunk:
+                        await chunk_stack.enter_async_context(self.new_transaction())
+                    result = await self.execute(
+                        page,
+                        params,
+                        execution_options=execution_options,
+                    )
+                    frozen = result.freeze()
+                    if not frozen.data:
+                        return
+                    width = len(frozen.metadata.keys) - 1
+                    last_key = frozen.data[-1][width]
+                    yield frozen().columns(*range(width)).all()
+
+                if session is not None:
+                    if commit_per_chunk:
+                        await session.commit()
+                    elif expunge:
+                        await session.flush()
+                    if expunge:
+                        session.expunge_all()
+                if len(frozen.data) < chunk_size:
+                    return
+
+    @staticmethod
+    def _iter_chunks(
+        rows: Iterable[Mapping[str, Any]],
+        chunk_size: int,
+    ) -> Iterator[list[Mapping[str, Any]]]:
+        """
+        Lazily split parameter sets into lists of at most `chunk_size` items.
+        """
+
+        iterator = iter(rows)
+        while chunk := list(islice(iterator, chunk_size)):
+            yield chunk
+
+    @staticmethod
+    def _is_readonly_statement(statement: Executable) -> bool:
+        """
+        Check whether the statement is read-only (e.g., SELECT).
+
+        This method is used to determine when a transaction is optional
+        during automatic context creation.
+
+        :return: True if statement is considered read-only.
+        """
+
+        return is_readonly_statement(statement)
+
+    def _block_connection(self) -> Optional[AsyncConnection]:
+        """
+        Return the connection of the current `connection()` block, unless a session is active.
+        """
+
+        if self._session_var.get(None) is not None:
+            return None
+        return self._connection_var.get(None)
+
+    @staticmethod
+    def _check_connection_arguments(
+        bind_arguments: Optional[dict[str, Any]],
+        kw: Mapping[str, Any],
+    ) -> None:
+        """
+        Reject `Session.execute` arguments that an `AsyncConnection` cannot take.
+
+        :raise ValueError: If `bind_arguments` or `kw` are given.
+        """
+
+        if bind_arguments or kw:
+            raise ValueError(
+                "bind_arguments and additional execute arguments are not supported "
+                "inside connection()",
+            )
+
+    def _need_force_transaction_on_context_execute(
+        self,
+        force_transaction: Optional[bool],
+    ) -> bool:
+        """
+        Determine whether a transactional context is required based on the call-specific and global flags.
+
+        :param force_transaction: Optional per-call override of auto-context behavior.
+
+        :return: True if a transactional context should be created, False otherwise.
+        """
+
+        if force_transaction is not None:
+            return force_transaction
+        else:
+            return self._auto_context_force_transaction
+
+    def _get_context_for_statement(
+        self,
+        statement: Executable,
+    ) -> Callable[..., AbstractAsyncContextManager[AsyncSession]]:
+        """
+        Returns a context factory (`self.session` or `self.transaction`) appropriate for the given statement.
+
+        Used to select `.session` or `.transaction` based on statement type during automatic context creation.
+
+        :return: `.session` if the statement is a read-only query (instances of `Select` or `CompoundSelect`),
+                 bound to a read replica when replicas are configured.
+                 `.transaction` for all other statement types (e.g., `Insert`, `Update`, `Delete`, `text(...)`).
+        """
+
+        if self._is_readonly_statement(statement):
+            return cast(
+                Callable[..., AbstractAsyncContextManager[AsyncSession]],
+                partial(self.session, read_only=True),
+            )
+        else:
+            return cast(
+                Callable[..., AbstractAsyncContextManager[AsyncSession]],
+                self.transaction,
+            )
+
+    async def _execute_on_connection(
+        self,
+        connection: AsyncConnection,
+        statement: Executable,
+        params: Optional[_CoreAnyExecuteParams],
+        *,
+        timeout: Optional[float],
+        execution_options: OrmExecuteOptionsParameter,
+    ) -> Result[Any]:
+        """
+        Execute a statement on the connection of a `connection()` block, recording written tables
+        for the result cache, counting it for the query detector, reporting its timing to listeners
+        and passing it to the profiler when it is slow.
+
+        :param connection: Context-local connection.
+        :param statement: SQLAlchemy Executable.
+        :param params: Optional bound parameters.
+        :param timeout: Optional wall-clock deadline of the call in seconds.
+        :param execution_options: SQLAlchemy execution options.
+
+        :return: SQLAlchemy Result object.
+        """
+
+        if timeout is not None:
+            async with DeadlineScope(timeout, None):
+                return await self._execute_on_connection(
+                    connection,
+                    statement,
+                    params,
+                    timeout=None,
+                    execution_options=execution_options,
+                )
+
+        if isinstance(statement, UpdateBase):
+            written: Optional[set[str]] = connection.info.get(WRITTEN_TABLES_KEY)
+            if written is not None:
+                written.add(cast(Any, statement).table.fullname)
+        if self._query_detector is not None:
+            self._query_detector.observe(connection, statement)
+        if not self._instrumented:
+            return await connection.execute(
+                statement,
+                params,
+                execution_options=execution_options,
+            )
+        started = perf_counter()
+        try:
+            result = await connection.execute(
+                statement,
+                params,
+                execution_options=execution_options,
+            )
+        finally:
+            duration = perf_counter() - started
+            self._emit(ContextEventKind.EXECUTE, duration)
+        profiler = self._profiler
+        if profiler is not None and duration >= profiler.threshold:
+            await self._profile(
+                profiler,
+                connection.sync_engine,
+                statement,
+                params,
+                duration,
+            )
+        return result
+
+    @asynccontextmanager
+    async def _autocommit_session(
+        self,
+        read_only: bool,
+        **kw: Any,
+    ) -> AsyncIterator[AsyncSession]:
+        """
+        Enter a new session whose connection runs in `AUTOCOMMIT` isolation, for `auto_context_autocommit`.
+
+        :param read_only: Whether the session may be bound to a read replica.
+        :param kw: Additional arguments passed to `session(...)`.
+
+        :return: AsyncSession holding an autocommit connection.
+        """
+
+        async with self.session(read_only=read_only, **kw) as session:
+            await session.connection(execution_options=_AUTOCOMMIT_OPTIONS)
+            if self._result_cache is None:
+                yield session
+                return
+            # Every statement commits on its own, so the tables it writes are invalidated right after it.
+            written: set[str] = set()
+            session.info[WRITTEN_TABLES_KEY] = written
+            try:
+                yield session
+            finally:
+                session.info.pop(WRITTEN_TABLES_KEY, None)
+                if written:
+                    await self._invalidate_result_cache(written)
+
+    @asynccontextmanager
+    async def _detached_session(
+        self,
+        statement: Executable,
+        force_transaction: Optional[bool],
+    ) -> AsyncIterator[AsyncSession]:
+        """
+        Create a temporary session that is not bound to the context.
+
+        Follows the auto-context rules of `execute(...)`: read-only statements may be routed
+        to a replica, other statements run in a transaction committed when the block exits.
+
+        :param statement: Statement the session is created for.
+        :param force_transaction: Optional per-call override of `auto_context_force_transaction`.
+
+        :return: New AsyncSession.
+        """
+
+        transactional = self._need_force_transaction_on_context_execute(
+            force_transaction,
+        ) or not self._is_readonly_statement(statement)
+
+        if self._admission is not None:
+            await self._admission.acquire()
+        try:
+            replica_index = None if transactional else self._acquire_replica()
+            session_maker = (
+                None
+                if replica_index is None
+                else self._replica_session_makers[replica_index]
+            )
+
+            try:
+                async with self._resolve_session_maker(session_maker) as session:
+                    if transactional:
+                        async with session.begin():
+                            yield session
+                    else:
+                        yield session
+            finally:
+                self._release_replica(replica_index)
+        finally:
+            if self._admission is not None:
+                self._admission.release()
+
+    def _resolve_shard(
+        self,
+        shard_key: Any,
+        session_maker: Optional[async_sessionmaker[AsyncSession]],
+    ) -> tuple[str, async_sessionmaker[AsyncSession]]:
+        """
+        Map a shard key to the shard id and its session maker.
+        """
+
+        if session_maker is not None:
+            raise ValueError("shard_key cannot be combined with session_maker")
+        if self._shard_resolver is None:
+            raise ValueError("no shards are configured")
+        shard_id = self._shard_resolver(shard_key)
+        try:
+            return shard_id, self._shard_session_makers[shard_id]
+        except KeyError:
+            raise ValueError(f"unknown shard id {shard_id!r}") from None
+
+    def _shard_context(
+        self,
+        shard_id: str,
+        transactional: bool,
+    ) -> AbstractAsyncContextManager[AsyncSession]:
+        """
+        Create a new session context bound to a shard, optionally running a transaction.
+        """
+
+        session_context = SessionContextManager(
+            self,
+            self._shard_session_makers[shard_id],
+            False,
+            False,
+            None,
+            True,
+            Priority.NORMAL,
+            shard_id,
+        )
+        if not transactional:
+            return session_context
+        return TransactionContextManager(
+            self,
+            session_context,
+            True,
+            None,
+            self._savepoint,
+            None,
+        )
+
+    @staticmethod
+    def _transaction_options(
+        read_only: bool,
+        isolation_level: Optional[IsolationLevel],
+        deferrable: bool,
+    ) -> Optional[TransactionOptions]:
+        """
+        Build transaction options, or None when all defaults are requested.
+        """
+
+        if read_only or isolation_level is not None or deferrable:
+            return TransactionOptions(read_only, isolation_level, deferrable)
+        return None
+
+    def _get_callbacks(self) -> TransactionCallbacks:
+        """
+        Return the callbacks of the outermost transaction of the current session.
+
+        :raise NoSessionError: If no session is active.
+        :raise NoTransactionError: If the current session is not inside a `transaction()` block.
+        """
+
+        callbacks: Optional[TransactionCallbacks] = self.get_session().info.get(
+            CALLBACKS_KEY,
+        )
+        if callbacks is None:
+            raise NoTransactionError()
+        return callbacks
+
+    async def _run_callbacks(self, callbacks: Sequence[TransactionCallback]) -> None:
+        """
+        Run the callbacks of a finished transaction with the configured concurrency.
+        """
+
+        await run_callbacks(callbacks, self._callback_concurrency)
+
+    def _start_compiled_cache_stats(self) -> CompiledCacheStats:
+        """
+        Create the compiled-cache statistics and attach them to all engines, once.
+        """
+
+        stats = self._compiled_cache_stats
+        if stats is None:
+            stats = self._compiled_cache_stats = CompiledCacheStats()
+            for engine in self._engines():
+                stats.attach(engine)
+        return stats
+
+    def _install_statement_timeouts(self) -> None:
+        """
+        Register the statement timeout events on the engines of the context on first use of a deadline.
+        """
+
+        if self._statement_timeouts:
+            return
+        self._statement_timeouts = True
+        for engine in self._engines():
+            install_statement_timeouts(engine)
+        # The transaction of the current session began before the events were registered.
+        session = self._session_var.get(None)
+        if session is not None:
+            link_session(session)
+
+    def _engines(self) -> list[AsyncEngine]:
+        """
+        Return the primary engine followed by the distinct engines of replica and shard session makers.
+        """
+
+        engines = [self._engine]
+        for session_maker in chain(
+            self._replica_session_makers,
+            self._shard_session_makers.values(),
+        ):
+            bind = session_maker.kw.get("bind")
+            if isinstance(bind, AsyncEngine) and bind not in engines:
+                engines.append(bind)
+        return engines
+
+    def _close_coalesced(self, replica_index: Optional[int]) -> None:
+        """
+        Release the replica and the admission slot of a closed coalesced session.
+        """
+
+        self._release_replica(replica_index)
+        if self._admission is not None:
+            self._admission.release()
+
+    def _release_replica(self, replica_index: Optional[int]) -> None:
+        """
+        Return a replica acquired with `_acquire_replica()` to the balancing policy.
+
+        :param replica_index: Index of the replica, or None.
+        """
+
+        if replica_index is not None:
+            self._replica_policy.on_release(replica_index)
+
+    def _acquire_replica(self) -> Optional[int]:
+        """
+        Choose a replica with the balancing policy and mark it as in use.
+
+        :return: Index of the replica, or None if no replicas are configured.
+        """
+
+        if not self._replica_session_makers:
+            return None
+        replica_index = self._replica_policy.choose(len(self._replica_session_makers))
+        self._replica_policy.on_acquire(replica_index)
+        return replica_index
+
+    async def _instrumented_execute(
+        self,
+        session: AsyncSession,
+        statement: Executable,
+        params: Optional[_CoreAnyExecuteParams],
+        **kw: Any,
+    ) -> Result[Any]:
+        """
+        Execute a statement on the given session, report its timing to listeners
+        and pass it to the profiler when it is slow.
+
+        :param session: Session to execute the statement on.
+        :param statement: SQLAlchemy Executable.
+        :param params: Optional bound parameters.
+        :param kw: Additional arguments passed to `session.execute`.
+
+        :return: SQLAlchemy Result object.
+        """
+
+        started = perf_counter()
+        try:
+            result = await session.execute(statement, params, **kw)
+        finally:
+            duration = perf_counter() - started
+            self._emit(ContextEventKind.EXECUTE, duration)
+        profiler = self._profiler
+        if profiler is not None and duration >= profiler.threshold:
+            await self._profile(
+                profiler,
+                session.get_bind(),
+                statement,
+                params,
+                duration,
+            )
+        return result
+
+    async def _profile(
+        self,
+        profiler: SlowQueryProfiler,
+        bind: Union[Engine, Connection],
+        statement: Executable,
+        params: Optional[_CoreAnyExecuteParams],
+        duration: float,
+    ) -> None:
+        """
+        Record a slow statement, capturing its plan on a new connection of the engine it ran on.
+
+        Failures to capture the plan are recorded instead of raised.
+
+        :param profiler: Profiler receiving the record.
+        :param bind: Engine or connection the statement ran on.
+        :param statement: SQLAlchemy Executable.
+        :param params: Bound parameters the statement ran with.
+        :param duration: Execution time in seconds.
+        """
+
+        sql, bound, positions, rows = compile_for_profile(
+            statement,
+            params,
+            bind.dialect,
+        )
+        plan = None
+        explain_error = None
+        if profiler.explain:
+            try:
+                # A raw connection: admission control, the watchdog and listeners would count EXPLAIN
+                # against the block being profiled, which may hold the last admission slot.
+                engine = bind if isinstance(bind, Engine) else bind.engine
+                async with AsyncEngine(engine).connect() as connection:
+                    plan = await explain(connection, sql, bound, positions)
+            except Exception as exc:
+                explain_error = repr(exc)
+        profiler.record(
+            SlowQuery(
+                sql=sql,
+                parameters=parameters_shape(bound),
+                rows=rows,
+                duration=duration,
+                label=self._scope_var.get().label,
+                plan=plan,
+                explain_error=explain_error,
+                recorded_at=time(),
+            ),
+        )
+
+    @property
+    def _instrumented(self) -> bool:
+        """
+        Whether block scopes and statement timings are tracked, for listeners or the profiler.
+        """
+
+        return bool(self._listeners) or self._profiler is not None
+
+    def _emit(
+        self,
+        kind: ContextEventKind,
+        duration: float,
+        elapsed: Optional[float] = None,
+    ) -> None:
+        """
+        Deliver an event described by the current scope to all listeners.
+
+        :param kind: Event kind.
+        :param duration: Duration of the operation in seconds.
+        :param elapsed: Lifetime of the block in seconds, for closing events.
+        """
+
+        scope = self._scope_var.get()
+        event = ContextEvent(
+            kind=kind,
+            duration=duration,
+            depth=scope.depth,
+            auto_context=scope.auto_context,
+            label=scope.label,
+            elapsed=elapsed,
+        )
+        for listener in self._listeners:
+            listener.on_event(event)
 
     def _resolve_session_maker(
         self,
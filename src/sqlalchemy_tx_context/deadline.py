@@ -0,0 +1,272 @@
+import asyncio
+
+from time import monotonic
+from types import TracebackType
+from typing import Any, Optional, cast
+from weakref import WeakKeyDictionary
+
+from sqlalchemy import event
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import Session
+
+from sqlalchemy_tx_context.exceptions import DeadlineExceededError
+
+# `Session.info` key holding the `time.monotonic()` deadline of the innermost timed block of the session.
+DEADLINE_KEY = "sqlalchemy_tx_context_deadline"
+
+# Dialects receiving the remaining budget as `SET LOCAL statement_timeout` before every statement.
+_STATEMENT_TIMEOUT_DIALECTS = frozenset(("postgresql",))
+
+
+class Deadline:
+    """
+    Wall-clock deadline of a block: cancels the task that entered the block when it expires.
+
+    The resulting `CancelledError` unwinds the block like any other exception, rolling back its transaction
+    and closing its session, and is then translated into `DeadlineExceededError` by `stop(...)`.
+    """
+
+    __slots__ = ("timeout", "expires_at", "expired", "_handle", "_session", "_previous")
+
+    timeout: float
+    expires_at: float
+    expired: bool
+    _handle: Optional[asyncio.TimerHandle]
+    _session: Optional[AsyncSession]
+    _previous: Optional[float]
+
+    def __init__(self, timeout: float) -> None:
+        """
+        :param timeout: Time budget in seconds.
+
+        :raise ValueError: If `timeout` is not positive.
+        """
+
+        if timeout <= 0:
+            raise ValueError("timeout must be positive")
+        self.timeout = timeout
+        self.expires_at = 0.0
+        self.expired = False
+        self._handle = None
+        self._session = None
+        self._previous = None
+
+    def start(self) -> None:
+        """
+        Start the timer for the current task.
+        """
+
+        task = asyncio.current_task()
+        assert task is not None
+        self.expires_at = monotonic() + self.timeout
+        self._handle = asyncio.get_running_loop().call_later(
+            self.timeout,
+            self._expire,
+            task,
+        )
+
+    def bind(self, session: AsyncSession) -> None:
+        """
+        Publish the deadline in `Session.info` unless an enclosing block has an earlier one.
+
+        :param session: Session of the block.
+        """
+
+        previous: Optional[float] = session.info.get(DEADLINE_KEY)
+        self._session = session
+        self._previous = previous
+        if previous is None or self.expires_at < previous:
+            session.info[DEADLINE_KEY] = self.expires_at
+
+    def unbind(self) -> None:
+        """
+        Restore the deadline of the enclosing block in `Session.info`.
+        """
+
+        session, self._session = self._session, None
+        if session is None:
+            return
+        if self._previous is None:
+            session.info.pop(DEADLINE_KEY, None)
+        else:
+            session.info[DEADLINE_KEY] = self._previous
+
+    def stop(self, exc: Optional[BaseException]) -> Optional[DeadlineExceededError]:
+        """
+        Stop the timer and translate the cancellation caused by its expiry.
+
+        :param exc: Exception that left the block, if any.
+
+        :return: DeadlineExceededError to raise instead of `exc`, or None.
+        """
+
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        if not self.expired or not isinstance(exc, asyncio.CancelledError):
+            return None
+        task = asyncio.current_task()
+        uncancel = getattr(task, "uncancel", None)
+        if uncancel is not None:
+            uncancel()
+        return DeadlineExceededError()
+
+    def _expire(self, task: "asyncio.Task[Any]") -> None:
+        self.expired = True
+        task.cancel()
+
+
+class DeadlineScope:
+    """
+    Async context manager applying a `Deadline` to a block without a session of its own,
+    e.g. a single `execute(...)` call in the current session.
+    """
+
+    __slots__ = ("_deadline", "_session")
+
+    _deadline: Deadline
+    _session: Optional[AsyncSession]
+
+    def __init__(self, timeout: float, session: Optional[AsyncSession]) -> None:
+        """
+        :param timeout: Time budget in seconds.
+        :param session: Current session, whose `Session.info` receives the deadline.
+        """
+
+        self._deadline = Deadline(timeout)
+        self._session = session
+
+    async def __aenter__(self) -> None:
+        self._deadline.start()
+        if self._session is not None:
+            self._deadline.bind(self._session)
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self._deadline.unbind()
+        error = self._deadline.stop(exc_value)
+        if error is not None:
+            raise error from exc_value
+
+
+class _TimeoutLink:
+    """
+    Session of a connection in a PostgreSQL transaction, and the `statement_timeout` the transaction began
+    with, once the timeout has been pushed down.
+    """
+
+    __slots__ = ("info", "original")
+
+    info: dict[Any, Any]
+    original: Optional[str]
+
+    def __init__(self, info: dict[Any, Any]) -> None:
+        self.info = info
+        self.original = None
+
+
+# Sessions of the connections in transactions on `_STATEMENT_TIMEOUT_DIALECTS`, by connection.
+# A connection is released when its transaction ends, which also ends every `SET LOCAL`.
+_links: "WeakKeyDictionary[Connection, _TimeoutLink]" = WeakKeyDictionary()
+
+
+def _on_after_begin(
+    session: Session,
+    transaction: Any,  # noqa: ARG001
+    connection: Connection,
+) -> None:
+    if connection.dialect.name not in _STATEMENT_TIMEOUT_DIALECTS:
+        return
+    link = _links.get(connection)
+    # A connection bound to sessions by the application outlives their transactions.
+    if link is None or link.info is not session.info:
+        _links[connection] = _TimeoutLink(session.info)
+
+
+def _on_before_cursor_execute(
+    conn: Connection,
+    cursor: Any,  # noqa: ARG001
+    statement: str,  # noqa: ARG001
+    parameters: Any,  # noqa: ARG001
+    context: Any,  # noqa: ARG001
+    executemany: bool,  # noqa: ARG001
+) -> None:
+    link = _links.get(conn)
+    if link is None:
+        return
+    deadline: Optional[float] = link.info.get(DEADLINE_KEY)
+    if deadline is None:
+        if link.original is not None:
+            _set_statement_timeout(conn, link.original)
+            link.original = None
+        return
+    # `SET LOCAL` has no effect outside of a transaction.
+    if conn.get_execution_options().get("isolation_level") == "AUTOCOMMIT":
+        return
+    remaining = str(max(1, int((deadline - monotonic()) * 1000)))
+    original = _set_statement_timeout(conn, remaining)
+    if link.original is None:
+        link.original = original
+
+
+def _set_statement_timeout(conn: Connection, value: str) -> str:
+    """
+    Run the equivalent of `SET LOCAL statement_timeout` on a cursor of its own, bypassing the events
+    of the connection.
+
+    :return: Previous `statement_timeout`.
+    """
+
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute(
+            "SELECT current_setting('statement_timeout'), "
+            f"set_config('statement_timeout', '{value}', true)",
+        )
+        original, _ = cast(tuple[str, str], cursor.fetchone())
+    finally:
+        cursor.close()
+    return original
+
+
+def install_statement_timeouts(engine: AsyncEngine) -> None:
+    """
+    Register the events pushing the remaining budget of a timed block down to the database before every
+    statement executed on the engine in its session while the deadline is bound (PostgreSQL
+    `SET LOCAL statement_timeout`). Once no deadline is bound anymore, the `statement_timeout` the transaction
+    had before is restored before the next statement. Engines of other dialects are left alone.
+    Safe to call more than once.
+
+    :param engine: Engine to register the events on.
+    """
+
+    sync_engine = engine.sync_engine
+    if sync_engine.dialect.name not in _STATEMENT_TIMEOUT_DIALECTS:
+        return
+    if not event.contains(Session, "after_begin", _on_after_begin):
+        event.listen(Session, "after_begin", _on_after_begin)
+    if not event.contains(
+        sync_engine,
+        "before_cursor_execute",
+        _on_before_cursor_execute,
+    ):
+        event.listen(sync_engine, "before_cursor_execute", _on_before_cursor_execute)
+
+
+def link_session(session: AsyncSession) -> None:
+    """
+    Link the connections of a transaction that began before `install_statement_timeouts(...)` to its session.
+
+    :param session: Session of the transaction.
+    """
+
+    transaction = session.sync_session.get_transaction()
+    if transaction is None:
+        return
+    for connection, *_ in transaction._connections.values():  # type: ignore[reportPrivateUsage]
+        _on_after_begin(session.sync_session, transaction, connection)
@@ -0,0 +1,141 @@
+import logging
+
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any, Optional, Union, cast
+
+from sqlalchemy import Executable
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+from sqlalchemy.sql.elements import ClauseElement
+
+from sqlalchemy_tx_context.exceptions import NPlusOneQueryError
+from sqlalchemy_tx_context.watchdog import (
+    _call_site,  # type: ignore[reportPrivateUsage]
+)
+
+# `Session.info` / `AsyncConnection.info` key holding the `_ShapeCount` of every statement shape executed
+# in the current context of the session or connection; cleared when the outermost transaction begins
+# and when a `connection()` block exits.
+QUERY_SHAPES_KEY = "sqlalchemy_tx_context_query_shapes"
+
+_logger = logging.getLogger("sqlalchemy_tx_context")
+
+
+@dataclass(frozen=True)
+class NPlusOneReport:
+    """
+    A statement shape repeated more than `threshold` times in one context, found by `NPlusOneDetector`.
+
+    :ivar sql: Statement shape: the SQL rendered for the dialect, with bound parameter placeholders.
+    :ivar count: Number of executions of the shape in the context so far.
+    :ivar call_sites: Distinct `"file:line in function"` call sites of the executions, in order of appearance.
+    """
+
+    sql: str
+    count: int
+    call_sites: tuple[str, ...]
+
+
+class _ShapeCount:
+    __slots__ = ("count", "call_sites")
+
+    count: int
+    call_sites: dict[str, None]
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.call_sites = {}
+
+
+def log_n_plus_one(report: NPlusOneReport) -> None:
+    """
+    Default reporter logging a warning to the `sqlalchemy_tx_context` logger.
+
+    :param report: Report to log.
+    """
+
+    _logger.warning(
+        "Statement executed %d times in one context, called from %s: %s",
+        report.count,
+        ", ".join(report.call_sites) or "<unknown>",
+        report.sql,
+    )
+
+
+class NPlusOneDetector:
+    """
+    Development and CI aid counting statements run through `execute(...)` within each context,
+    grouped by statement shape, and reporting shapes repeated more than `threshold` times.
+
+    A context is the outermost `transaction()` of a session, a `session()` block outside of transactions,
+    or a `connection()` block. Statements executed without a session by the auto-context are not counted.
+    Every shape is reported once per context, when its count first exceeds `threshold`.
+    Counting compiles every statement, so keep the detector out of production.
+    """
+
+    __slots__ = ("threshold", "raise_error", "capture_call_site", "_reporter")
+
+    threshold: int
+    raise_error: bool
+    capture_call_site: bool
+    _reporter: Callable[[NPlusOneReport], Any]
+
+    def __init__(
+        self,
+        threshold: int = 10,
+        *,
+        raise_error: bool = False,
+        capture_call_site: bool = True,
+        reporter: Optional[Callable[[NPlusOneReport], Any]] = None,
+    ) -> None:
+        """
+        :param threshold: Number of executions of one shape allowed per context.
+        :param raise_error: If True, the execution exceeding `threshold` raises `NPlusOneQueryError`
+            after the report, instead of only reporting.
+        :param capture_call_site: Whether to record call sites. Costs a frame walk per statement.
+        :param reporter: Callable receiving every `NPlusOneReport`. Defaults to logging a warning.
+
+        :raise ValueError: If `threshold` is less than 1.
+        """
+
+        if threshold < 1:
+            raise ValueError("threshold must be at least 1")
+        self.threshold = threshold
+        self.raise_error = raise_error
+        self.capture_call_site = capture_call_site
+        self._reporter = reporter or log_n_plus_one
+
+    def observe(
+        self,
+        session: Union[AsyncSession, AsyncConnection],
+        statement: Executable,
+    ) -> None:
+        """
+        Count a statement about to be executed in the session. Called by `execute(...)`.
+
+        :param session: Session the statement runs in, or the connection of a `connection()` block.
+        :param statement: Statement to count.
+
+        :raise NPlusOneQueryError: If `raise_error` is set and the shape exceeds `threshold`.
+        """
+
+        shapes: Optional[dict[str, _ShapeCount]] = session.info.get(QUERY_SHAPES_KEY)
+        if shapes is None:
+            shapes = session.info[QUERY_SHAPES_KEY] = {}
+        bind = session.get_bind() if isinstance(session, AsyncSession) else session
+        sql = str(cast(ClauseElement, statement).compile(dialect=bind.dialect))
+        shape = shapes.get(sql)
+        if shape is None:
+            shape = shapes[sql] = _ShapeCount()
+        shape.count += 1
+        if self.capture_call_site:
+            call_site = _call_site()
+            if call_site is not None:
+                shape.call_sites[call_site] = None
+        if shape.count != self.threshold + 1:
+            return
+
+        report = NPlusOneReport(sql, shape.count, tuple(shape.call_sites))
+        self._reporter(report)
+        if self.raise_error:
+            raise NPlusOneQueryError(report.sql, report.count, report.call_sites)
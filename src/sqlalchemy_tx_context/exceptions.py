@@ -25,6 +25,20 @@ class SessionAlreadyActiveError(ContextStateError):
     """
 
 
+class ConnectionActiveError(ContextStateError):
+    """
+    Raised when an operation that needs an AsyncSession, such as `run_sync(...)`, `iterate_chunks(...)`
+    or a `PrimaryKeyLoader`, is used inside a `connection()` block while no session is active.
+    """
+
+
+class NoTransactionError(ContextStateError):
+    """
+    Raised when an operation requires an active `transaction()` block in the current context,
+    such as registering `on_commit(...)` or `on_rollback(...)` callbacks.
+    """
+
+
 class TransactionAlreadyActiveError(ContextStateError):
     """
     Raised when attempting to start a new transaction while a transaction
@@ -33,3 +47,54 @@ class TransactionAlreadyActiveError(ContextStateError):
     This can occur when `allow_nested_transactions=False` is passed
     to `transaction()`.
     """
+
+
+class TransactionRollbackOnlyError(ContextStateError):
+    """
+    Raised when leaving the outermost `transaction()` block normally after an exception escaped
+    one of its nested blocks that were flattened without a savepoint (`savepoint="on_error_handling"`).
+
+    The nested block's changes cannot be undone separately, so the whole transaction is rolled back
+    instead of committing them.
+    """
+
+
+class AdmissionTimeoutError(ContextStateError):
+    """
+    Raised when a session could not be opened because the admission controller
+    did not admit the caller within its `timeout`.
+    """
+
+
+class ShardMismatchError(ContextStateError):
+    """
+    Raised when entering `session(shard_key=...)` or `transaction(shard_key=...)` would reuse
+    the current session while it is bound to a different shard.
+    """
+
+
+class DeadlineExceededError(TimeoutError):
+    """
+    Raised when a block entered with `timeout=...`, or an `execute(..., timeout=...)` call,
+    runs past its deadline. The block's transaction is rolled back and its session closed.
+    """
+
+
+class NPlusOneQueryError(RuntimeError):
+    """
+    Raised by `NPlusOneDetector(raise_error=True)` when one statement shape is executed
+    more than `threshold` times in one context.
+    """
+
+    sql: str
+    count: int
+    call_sites: tuple[str, ...]
+
+    def __init__(self, sql: str, count: int, call_sites: tuple[str, ...]) -> None:
+        super().__init__(
+            f"Statement executed {count} times in one context, called from "
+            f"{', '.join(call_sites) or '<unknown>'}: {sql}",
+        )
+        self.sql = sql
+        self.count = count
+        self.call_sites = call_sites
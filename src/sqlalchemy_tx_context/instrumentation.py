@@ -0,0 +1,245 @@
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from collections.abc import Sequence
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Optional
+
+DEFAULT_LATENCY_BUCKETS: tuple[float, ...] = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+class ContextEventKind(str, Enum):
+    """
+    Lifecycle events reported to `ContextListener` instances.
+    """
+
+    SESSION_OPEN = "session_open"
+    SESSION_CLOSE = "session_close"
+    TRANSACTION_BEGIN = "transaction_begin"
+    TRANSACTION_COMMIT = "transaction_commit"
+    TRANSACTION_ROLLBACK = "transaction_rollback"
+    SAVEPOINT_BEGIN = "savepoint_begin"
+    SAVEPOINT_RELEASE = "savepoint_release"
+    SAVEPOINT_ROLLBACK = "savepoint_rollback"
+    EXECUTE = "execute"
+    ADMISSION_WAIT = "admission_wait"
+
+
+@dataclass(frozen=True)
+class ContextEvent:
+    """
+    A single timed lifecycle event.
+
+    :ivar kind: Type of the event.
+    :ivar duration: Time spent in the operation itself, in seconds
+        (e.g. opening the session, emitting COMMIT, executing the statement). The begin event
+        of an outermost transaction includes checking its connection out of the pool.
+    :ivar depth: Nesting depth of the context block that produced the event, starting at 1
+        for the outermost `session()` / `transaction()` block.
+    :ivar auto_context: True if the block was created implicitly by `execute(...)`.
+    :ivar label: Label passed as `name=...` to the block or inherited from an enclosing block.
+    :ivar elapsed: For closing events (close, commit, rollback, release), the total lifetime
+        of the block in seconds. None for other events.
+    """
+
+    kind: ContextEventKind
+    duration: float
+    depth: int
+    auto_context: bool
+    label: Optional[str]
+    elapsed: Optional[float] = None
+
+
+class ContextListener(ABC):
+    """
+    Receives lifecycle events from `SQLAlchemyTransactionContext`.
+
+    Listeners are called synchronously on the event loop and should not block.
+    """
+
+    @abstractmethod
+    def on_event(self, event: ContextEvent) -> None:
+        """
+        Handle a lifecycle event.
+
+        :param event: Event data.
+        """
+
+
+class LatencyHistogram:
+    """
+    Fixed-bucket latency histogram.
+    """
+
+    __slots__ = ("bounds", "counts", "count", "total", "min", "max")
+
+    bounds: tuple[float, ...]
+    counts: list[int]
+    count: int
+    total: float
+    min: float
+    max: float
+
+    def __init__(self, bounds: Sequence[float] = DEFAULT_LATENCY_BUCKETS) -> None:
+        """
+        :param bounds: Ascending upper bounds of the buckets, in seconds.
+            Values above the last bound are counted in an overflow bucket.
+        """
+
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        """
+        Record a single value.
+
+        :param value: Duration in seconds.
+        """
+
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimate a quantile as the upper bound of the bucket containing it.
+
+        :param q: Quantile in range [0, 1].
+
+        :return: Estimated value in seconds, or 0.0 if the histogram is empty.
+            Values in the overflow bucket are reported as the observed maximum.
+        """
+
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank and bucket_count:
+                if index == len(self.bounds):
+                    return self.max
+                return min(self.bounds[index], self.max)
+        return self.max
+
+    def as_dict(self) -> dict[str, Any]:
+        """
+        Return a JSON-serializable summary.
+        """
+
+        return {
+            "count": self.count,
+            "total": self.total,
+            "min": self.min if self.count else 0.0,
+            "max": self.max,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "buckets": dict(
+                zip([*map(str, self.bounds), "+Inf"], self.counts),
+            ),
+        }
+
+
+class LatencyAggregator(ContextListener):
+    """
+    In-process listener that keeps a latency histogram per label and event kind.
+    """
+
+    _bounds: tuple[float, ...]
+    _histograms: dict[tuple[Optional[str], ContextEventKind], LatencyHistogram]
+
+    def __init__(self, bounds: Sequence[float] = DEFAULT_LATENCY_BUCKETS) -> None:
+        """
+        :param bounds: Bucket upper bounds used for every histogram, in seconds.
+        """
+
+        self._bounds = tuple(bounds)
+        self._histograms = {}
+
+    def on_event(self, event: ContextEvent) -> None:
+        key = (event.label, event.kind)
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            histogram = self._histograms[key] = LatencyHistogram(self._bounds)
+        histogram.observe(event.duration)
+
+    def histogram(
+        self,
+        kind: ContextEventKind,
+        label: Optional[str] = None,
+    ) -> Optional[LatencyHistogram]:
+        """
+        Return the histogram for a label and event kind.
+
+        :param kind: Event kind.
+        :param label: Block label, or None for unlabeled blocks.
+
+        :return: Histogram or None if no such events were recorded.
+        """
+
+        return self._histograms.get((label, kind))
+
+    def snapshot(self) -> dict[Optional[str], dict[str, dict[str, Any]]]:
+        """
+        Return all histograms as nested dictionaries: label -> event kind -> summary.
+        """
+
+        result: dict[Optional[str], dict[str, dict[str, Any]]] = {}
+        for (label, kind), histogram in self._histograms.items():
+            result.setdefault(label, {})[kind.value] = histogram.as_dict()
+        return result
+
+    def reset(self) -> None:
+        """
+        Drop all recorded data.
+        """
+
+        self._histograms.clear()
+
+
+class _Scope:
+    """
+    Context-local description of the innermost instrumented block.
+    """
+
+    __slots__ = ("depth", "label", "auto_context")
+
+    depth: int
+    label: Optional[str]
+    auto_context: bool
+
+    def __init__(self, depth: int, label: Optional[str], auto_context: bool) -> None:
+        self.depth = depth
+        self.label = label
+        self.auto_context = auto_context
+
+    def child(self, label: Optional[str]) -> "_Scope":
+        return _Scope(self.depth + 1, label or self.label, self.auto_context)
+
+
+_ROOT_SCOPE = _Scope(0, None, False)
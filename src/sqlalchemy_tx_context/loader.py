@@ -0,0 +1,179 @@
+import asyncio
+
+from collections.abc import Hashable, Iterable
+from typing import TYPE_CHECKING, Any, Generic, Optional, TypeVar
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import class_mapper
+
+from sqlalchemy_tx_context.exceptions import ConnectionActiveError
+
+if TYPE_CHECKING:
+    from sqlalchemy_tx_context.context import SQLAlchemyTransactionContext
+
+_M = TypeVar("_M")
+
+_background_tasks: set["asyncio.Task[None]"] = set()
+
+
+class _Batch:
+    """
+    Keys requested for one session during one event loop tick.
+    """
+
+    __slots__ = ("futures",)
+
+    futures: dict[Hashable, "asyncio.Future[Any]"]
+
+    def __init__(self) -> None:
+        self.futures = {}
+
+
+class PrimaryKeyLoader(Generic[_M]):
+    """
+    Coalesces concurrent primary key lookups of one mapped class into `SELECT ... WHERE pk IN (...)`.
+
+    Loads requested in the same event loop tick, within the same context session
+    (or all without a session, when auto-context is used), are deduplicated and fetched
+    with one query per `max_batch_size` keys. Each caller receives its own object,
+    or None if no row exists.
+
+    Obtain instances with `SQLAlchemyTransactionContext.loader(...)`.
+    """
+
+    __slots__ = (
+        "_db",
+        "_entity",
+        "_column",
+        "_attribute",
+        "_max_batch_size",
+        "_pending",
+    )
+
+    _db: "SQLAlchemyTransactionContext"
+    _entity: type[_M]
+    _column: Any
+    _attribute: str
+    _max_batch_size: int
+    _pending: dict[Optional[AsyncSession], _Batch]
+
+    def __init__(
+        self,
+        db: "SQLAlchemyTransactionContext",
+        entity: type[_M],
+        *,
+        max_batch_size: int = 1000,
+    ) -> None:
+        """
+        :param db: Transaction context used to execute the batched queries.
+        :param entity: ORM mapped class with a single-column primary key.
+        :param max_batch_size: Maximum number of keys per IN query.
+
+        :raise ValueError: If the primary key has several columns or `max_batch_size` is not positive.
+        """
+
+        mapper = class_mapper(entity)
+        if len(mapper.primary_key) != 1:
+            raise ValueError(
+                f"{entity.__name__} must have a single-column primary key to be loaded by key",
+            )
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be positive")
+
+        self._db = db
+        self._entity = entity
+        self._column = mapper.primary_key[0]
+        self._attribute = mapper.get_property_by_column(self._column).key
+        self._max_batch_size = max_batch_size
+        self._pending = {}
+
+    async def load(self, key: Hashable) -> Optional[_M]:
+        """
+        Load an object by primary key, batched with concurrent loads.
+
+        :param key: Primary key value.
+
+        :return: Loaded object or None if it does not exist.
+
+        :raise ConnectionActiveError: If called inside a `connection()` block without an active session.
+        """
+
+        session = self._db.get_session(strict=False)
+        if session is None and self._db.get_connection(strict=False) is not None:
+            raise ConnectionActiveError()
+        batch = self._pending.get(session)
+        if batch is not None:
+            future = batch.futures.get(key)
+            if future is None:
+                future = batch.futures[key] = asyncio.get_running_loop().create_future()
+            # Shielded so that a cancelled caller does not cancel the result shared with others.
+            return await asyncio.shield(future)
+
+        batch = self._pending[session] = _Batch()
+        future = batch.futures[key] = asyncio.get_running_loop().create_future()
+        try:
+            # Let concurrent callers scheduled for this tick add their keys.
+            await asyncio.sleep(0)
+        except asyncio.CancelledError:
+            self._handover(batch, key)
+            raise
+        finally:
+            if self._pending.get(session) is batch:
+                del self._pending[session]
+        await self._dispatch(batch)
+        return future.result()
+
+    async def load_many(self, keys: Iterable[Hashable]) -> list[Optional[_M]]:
+        """
+        Load several objects by primary key, batched with concurrent loads.
+
+        :param keys: Primary key values.
+
+        :return: Objects in the order of `keys`, None for missing ones.
+        """
+
+        return list(await asyncio.gather(*(self.load(key) for key in keys)))
+
+    def _handover(self, batch: _Batch, key: Hashable) -> None:
+        """
+        Fetch the batch in a background task when the caller that owns it is cancelled.
+        """
+
+        batch.futures.pop(key).cancel()
+        if not batch.futures:
+            return
+        task = asyncio.get_running_loop().create_task(self._dispatch(batch))
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+
+    async def _dispatch(self, batch: _Batch) -> None:
+        """
+        Fetch all keys of the batch and resolve the waiting futures.
+        Errors are delivered through the futures.
+        """
+
+        futures = batch.futures
+        keys = list(futures)
+        try:
+            for offset in range(0, len(keys), self._max_batch_size):
+                chunk = keys[offset : offset + self._max_batch_size]
+                result = await self._db.execute(
+                    select(self._entity).where(self._column.in_(chunk)),
+                )
+                found = {
+                    getattr(instance, self._attribute): instance
+                    for instance in result.scalars()
+                }
+                for key in chunk:
+                    future = futures[key]
+                    if not future.done():
+                        future.set_result(found.get(key))
+        except asyncio.CancelledError:
+            for future in futures.values():
+                future.cancel()
+            raise
+        except Exception as exc:
+            for future in futures.values():
+                if not future.done():
+                    future.set_exception(exc)
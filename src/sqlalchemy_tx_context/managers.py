@@ -0,0 +1,882 @@
+# pyright: reportPrivateUsage=false
+# Context managers returned by `SQLAlchemyTransactionContext`; they are part of its implementation
+# and work directly with its context-local state.
+
+import sys
+
+from collections.abc import Coroutine
+from contextlib import AbstractAsyncContextManager, suppress
+from contextvars import Token
+from time import perf_counter
+from types import TracebackType
+from typing import TYPE_CHECKING, Any, Optional
+
+from sqlalchemy import text
+from sqlalchemy.exc import UnboundExecutionError
+from sqlalchemy.ext.asyncio import (
+    AsyncConnection,
+    AsyncSession,
+    AsyncSessionTransaction,
+    AsyncTransaction,
+    async_sessionmaker,
+)
+from typing_extensions import Literal
+
+from sqlalchemy_tx_context.caching import WRITTEN_TABLES_KEY
+from sqlalchemy_tx_context.callbacks import (
+    CALLBACKS_KEY,
+    TransactionCallback,
+    TransactionCallbacks,
+)
+from sqlalchemy_tx_context.deadline import Deadline
+from sqlalchemy_tx_context.detection import QUERY_SHAPES_KEY
+from sqlalchemy_tx_context.exceptions import (
+    SessionAlreadyActiveError,
+    ShardMismatchError,
+    TransactionAlreadyActiveError,
+    TransactionRollbackOnlyError,
+)
+from sqlalchemy_tx_context.instrumentation import ContextEventKind, _Scope
+from sqlalchemy_tx_context.options import (
+    TRANSACTION_OPTIONS_KEY,
+    AppliedTransactionOptions,
+    TransactionOptions,
+)
+from sqlalchemy_tx_context.sharding import SHARD_ID_KEY
+from sqlalchemy_tx_context.watchdog import ContextKind, OpenContext
+
+if TYPE_CHECKING:
+    from sqlalchemy_tx_context.context import SQLAlchemyTransactionContext
+
+SavepointMode = Literal["always", "never", "on_error_handling"]
+
+# `Session.info` key marking sessions bound to a read replica by `session(read_only=True)`.
+REPLICA_SESSION_KEY = "sqlalchemy_tx_context_replica"
+
+# `Session.info` key set when an exception escaped a flattened nested block in "on_error_handling" mode.
+_ROLLBACK_ONLY_KEY = "sqlalchemy_tx_context_rollback_only"
+
+_TRANSACTION_EVENTS = (
+    ContextEventKind.TRANSACTION_BEGIN,
+    ContextEventKind.TRANSACTION_COMMIT,
+    ContextEventKind.TRANSACTION_ROLLBACK,
+)
+_SAVEPOINT_EVENTS = (
+    ContextEventKind.SAVEPOINT_BEGIN,
+    ContextEventKind.SAVEPOINT_RELEASE,
+    ContextEventKind.SAVEPOINT_ROLLBACK,
+)
+
+
+class SessionContextManager:
+    """
+    Async context manager returned by `session()` and `new_session()`.
+
+    Instances are single-use, like the context managers returned by `async_sessionmaker`.
+
+    :ivar primary: If True, a current session bound to a read replica is not reused;
+        a new session overrides it for the duration of the block instead. Set by `transaction()`.
+    """
+
+    __slots__ = (
+        "_db",
+        "_session_maker",
+        "_reuse_if_exists",
+        "_read_only",
+        "_name",
+        "_new",
+        "_priority",
+        "_shard_id",
+        "primary",
+        "_context",
+        "_token",
+        "_admitted",
+        "_replica_index",
+        "_scope_token",
+        "_watched",
+        "_started",
+    )
+
+    _db: "SQLAlchemyTransactionContext"
+    _session_maker: Optional[async_sessionmaker[AsyncSession]]
+    _reuse_if_exists: bool
+    _read_only: bool
+    _name: Optional[str]
+    _new: bool
+    _priority: int
+    _shard_id: Optional[str]
+    primary: bool
+    _context: Optional[AbstractAsyncContextManager[AsyncSession]]
+    _token: Optional[Token[AsyncSession]]
+    _admitted: bool
+    _replica_index: Optional[int]
+    _scope_token: Optional[Token[_Scope]]
+    _watched: Optional[OpenContext]
+    _started: float
+
+    def __init__(
+        self,
+        db: "SQLAlchemyTransactionContext",
+        session_maker: Optional[async_sessionmaker[AsyncSession]],
+        reuse_if_exists: bool,
+        read_only: bool,
+        name: Optional[str],
+        new: bool,
+        priority: int,
+        shard_id: Optional[str],
+    ) -> None:
+        self._db = db
+        self._session_maker = session_maker
+        self._reuse_if_exists = reuse_if_exists
+        self._read_only = read_only
+        self._name = name
+        self._new = new
+        self._priority = priority
+        self._shard_id = shard_id
+        self.primary = False
+        self._context = None
+        self._token = None
+        self._admitted = False
+        self._replica_index = None
+        self._scope_token = None
+        self._watched = None
+
+    async def __aenter__(self) -> AsyncSession:
+        db = self._db
+
+        if not self._new:
+            current_session = db._session_var.get(None)
+            if current_session is not None:
+                if not self._reuse_if_exists:
+                    raise SessionAlreadyActiveError()
+                if (
+                    self._shard_id is not None
+                    and current_session.info.get(SHARD_ID_KEY) != self._shard_id
+                ):
+                    raise ShardMismatchError()
+                if not (self.primary and REPLICA_SESSION_KEY in current_session.info):
+                    return current_session
+
+        waited = None
+        if db._admission is not None:
+            waited = await db._admission.acquire(self._priority)
+            self._admitted = True
+
+        session_maker = self._session_maker
+        if self._read_only and session_maker is None:
+            self._replica_index = db._acquire_replica()
+            if self._replica_index is not None:
+                session_maker = db._replica_session_makers[self._replica_index]
+
+        try:
+            if db._instrumented:
+                self._scope_token = db._scope_var.set(
+                    db._scope_var.get().child(self._name),
+                )
+                if waited is not None:
+                    db._emit(ContextEventKind.ADMISSION_WAIT, waited)
+                self._started = perf_counter()
+            context = db._resolve_session_maker(session_maker)
+            session = await context.__aenter__()
+        except BaseException:
+            self._release()
+            raise
+
+        if self._scope_token is not None:
+            db._emit(ContextEventKind.SESSION_OPEN, perf_counter() - self._started)
+
+        self._context = context
+        if self._shard_id is not None:
+            session.info[SHARD_ID_KEY] = self._shard_id
+        if self._replica_index is not None:
+            session.info[REPLICA_SESSION_KEY] = True
+        self._token = db._session_var.set(session)
+        if db._watchdog is not None:
+            self._watched = db._watchdog.track("session", session, self._name)
+        return session
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        context = self._context
+        if context is None:
+            return
+        self._context = None
+
+        db = self._db
+        if self._token is not None:
+            db._session_var.reset(self._token)
+            self._token = None
+
+        try:
+            if self._scope_token is None:
+                await context.__aexit__(exc_type, exc_value, traceback)
+            else:
+                closing = perf_counter()
+                await context.__aexit__(exc_type, exc_value, traceback)
+                closed = perf_counter()
+                db._emit(
+                    ContextEventKind.SESSION_CLOSE,
+                    closed - closing,
+                    closed - self._started,
+                )
+        finally:
+            self._release()
+
+    def _release(self) -> None:
+        """
+        Restore the scope, stop watching the block, return the replica to the balancing policy
+        and free the admission slot.
+        """
+
+        if self._scope_token is not None:
+            self._db._scope_var.reset(self._scope_token)
+            self._scope_token = None
+        if self._watched is not None:
+            assert self._db._watchdog is not None
+            self._db._watchdog.untrack(self._watched)
+            self._watched = None
+        if self._replica_index is not None:
+            self._db._release_replica(self._replica_index)
+            self._replica_index = None
+        if self._admitted:
+            self._admitted = False
+            assert self._db._admission is not None
+            self._db._admission.release()
+
+
+class TransactionContextManager:
+    """
+    Async context manager returned by `transaction()` and `new_transaction()`.
+
+    Wraps a session context manager and begins a transaction, or a savepoint
+    when the session already has an active transaction. Depending on the savepoint mode,
+    a nested block may instead join the outer transaction without a savepoint ("flattened").
+
+    :ivar committed: Whether the transaction (or savepoint) of the block was committed on exit.
+        An error raised out of a committed block, e.g. by an `on_commit` callback, comes after the commit.
+    """
+
+    __slots__ = (
+        "_db",
+        "_session_context",
+        "_allow_nested_transactions",
+        "_name",
+        "_savepoint",
+        "_options",
+        "_flattened_session",
+        "_transaction",
+        "_nested",
+        "_tracks_writes",
+        "_callbacks",
+        "_scope_token",
+        "_watched",
+        "_started",
+        "committed",
+    )
+
+    _db: "SQLAlchemyTransactionContext"
+    _session_context: AbstractAsyncContextManager[AsyncSession]
+    _allow_nested_transactions: bool
+    _name: Optional[str]
+    _savepoint: SavepointMode
+    _options: Optional[TransactionOptions]
+    _flattened_session: Optional[AsyncSession]
+    _transaction: Optional[AsyncSessionTransaction]
+    _nested: bool
+    _tracks_writes: bool
+    _callbacks: Optional[TransactionCallbacks]
+    _scope_token: Optional[Token[_Scope]]
+    _watched: Optional[OpenContext]
+    _started: Optional[float]
+    committed: bool
+
+    def __init__(
+        self,
+        db: "SQLAlchemyTransactionContext",
+        session_context: AbstractAsyncContextManager[AsyncSession],
+        allow_nested_transactions: bool,
+        name: Optional[str],
+        savepoint: SavepointMode,
+        options: Optional[TransactionOptions],
+    ) -> None:
+        self._db = db
+        self._session_context = session_context
+        self._allow_nested_transactions = allow_nested_transactions
+        self._name = name
+        self._savepoint = savepoint
+        self._options = options
+        self._flattened_session = None
+        self._transaction = None
+        self._nested = False
+        self._tracks_writes = False
+        self._callbacks = None
+        self._scope_token = None
+        self._watched = None
+        self._started = None
+        self.committed = False
+
+    async def __aenter__(self) -> AsyncSession:
+        db = self._db
+        instrumented = db._instrumented
+        current_session = db._session_var.get(None) if instrumented else None
+
+        session = await self._session_context.__aenter__()
+        try:
+            nested = self._nested = session.in_transaction()
+            if nested:
+                if self._allow_nested_transactions is False:
+                    raise TransactionAlreadyActiveError()
+                if self._is_read_only(session):
+                    # Nothing to roll back separately, so the savepoint round trips are skipped.
+                    self._savepoint = "never"
+                if self._savepoint != "always":
+                    if instrumented and session is current_session:
+                        self._scope_token = db._scope_var.set(
+                            db._scope_var.get().child(self._name),
+                        )
+                    self._flattened_session = session
+                    self._watch("flattened", session)
+                    return session
+                transaction = session.begin_nested()
+                self._callbacks = session.info.get(CALLBACKS_KEY)
+                if self._callbacks is not None:
+                    self._callbacks.push()
+            else:
+                transaction = session.begin()
+                session.info.pop(_ROLLBACK_ONLY_KEY, None)
+                session.info.pop(TRANSACTION_OPTIONS_KEY, None)
+                session.info.pop(QUERY_SHAPES_KEY, None)
+                self._callbacks = session.info[CALLBACKS_KEY] = TransactionCallbacks()
+                if db._result_cache is not None:
+                    session.info[WRITTEN_TABLES_KEY] = set()
+                    self._tracks_writes = True
+
+            if instrumented:
+                if session is current_session:
+                    self._scope_token = db._scope_var.set(
+                        db._scope_var.get().child(self._name),
+                    )
+                started = perf_counter()
+                await transaction.__aenter__()
+                if not nested:
+                    # Timed as part of the begin event instead of the first statement.
+                    await self._begin_connection(session, transaction)
+                self._started = started
+                db._emit(
+                    (_SAVEPOINT_EVENTS if nested else _TRANSACTION_EVENTS)[0],
+                    perf_counter() - started,
+                )
+            else:
+                await transaction.__aenter__()
+                if self._options is not None and not nested:
+                    await self._begin_connection(session, transaction)
+            self._watch("savepoint" if nested else "transaction", session)
+        except BaseException:
+            if self._tracks_writes:
+                self._tracks_writes = False
+                session.info.pop(WRITTEN_TABLES_KEY, None)
+            self._finish_callbacks(session, committed=False)
+            self._reset_scope()
+            await self._session_context.__aexit__(*sys.exc_info())
+            raise
+
+        self._transaction = transaction
+        return session
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        if self._flattened_session is not None:
+            await self._exit_flattened(exc_type, exc_value, traceback)
+            return
+
+        transaction = self._transaction
+        assert transaction is not None
+        self._transaction = None
+
+        rollback_only: Optional[TransactionRollbackOnlyError] = None
+        if (
+            not self._nested
+            and transaction.session.info.pop(_ROLLBACK_ONLY_KEY, False)
+            and exc_type is None
+        ):
+            rollback_only = TransactionRollbackOnlyError()
+            exc_type, exc_value, traceback = type(rollback_only), rollback_only, None
+
+        try:
+            if self._started is None:
+                await transaction.__aexit__(exc_type, exc_value, traceback)
+            else:
+                await self._exit_instrumented(
+                    transaction,
+                    exc_type,
+                    exc_value,
+                    traceback,
+                )
+            self.committed = exc_type is None
+            if self._tracks_writes:
+                self._tracks_writes = False
+                written = transaction.session.info.pop(WRITTEN_TABLES_KEY, None)
+                # Nothing is invalidated on rollback.
+                if written and exc_type is None:
+                    await self._db._invalidate_result_cache(written)
+        except BaseException:
+            if self._tracks_writes:
+                self._tracks_writes = False
+                transaction.session.info.pop(WRITTEN_TABLES_KEY, None)
+            callbacks = self._finish_callbacks(transaction.session, committed=False)
+            self._reset_scope()
+            await self._session_context.__aexit__(*sys.exc_info())
+            if callbacks:
+                await self._db._run_callbacks(callbacks)
+            raise
+
+        callbacks = self._finish_callbacks(
+            transaction.session,
+            committed=exc_type is None,
+        )
+        self._reset_scope()
+        await self._session_context.__aexit__(exc_type, exc_value, traceback)
+        if callbacks:
+            await self._db._run_callbacks(callbacks)
+        if rollback_only is not None:
+            raise rollback_only
+
+    def _finish_callbacks(
+        self,
+        session: AsyncSession,
+        committed: bool,
+    ) -> Optional[list[TransactionCallback]]:
+        """
+        Close the callback frame of a savepoint, or return the callbacks to run after the outermost transaction.
+        """
+
+        callbacks = self._callbacks
+        if callbacks is None:
+            return None
+        self._callbacks = None
+        if self._nested:
+            callbacks.pop(committed)
+            return None
+        session.info.pop(CALLBACKS_KEY, None)
+        session.info.pop(TRANSACTION_OPTIONS_KEY, None)
+        return callbacks.take(committed)
+
+    def _is_read_only(self, session: AsyncSession) -> bool:
+        """
+        Check whether this block or the transaction it is nested in was declared read-only.
+        """
+
+        if self._options is not None and self._options.read_only:
+            return True
+        applied: Optional[AppliedTransactionOptions] = session.info.get(
+            TRANSACTION_OPTIONS_KEY,
+        )
+        return applied is not None and applied.options.read_only
+
+    async def _begin_connection(
+        self,
+        session: AsyncSession,
+        transaction: AsyncSessionTransaction,
+    ) -> None:
+        """
+        Acquire the connection of an outermost transaction that has just begun, applying the transaction
+        options. Rolls the transaction back if that fails.
+        """
+
+        try:
+            if self._options is not None:
+                await self._apply_options(session, self._options)
+            else:
+                # Sessions binding mappers to several engines choose the connection per statement.
+                with suppress(UnboundExecutionError):
+                    await session.connection()
+        except BaseException:
+            await transaction.rollback()
+            raise
+
+    @staticmethod
+    async def _apply_options(
+        session: AsyncSession,
+        options: TransactionOptions,
+    ) -> None:
+        """
+        Apply transaction options to the connection of a transaction that has just begun.
+        """
+
+        applied = options.resolve(session.get_bind().dialect.name)
+        if applied.execution_options:
+            await session.connection(execution_options=dict(applied.execution_options))
+        for statement in applied.statements:
+            await session.execute(text(statement))
+        session.info[TRANSACTION_OPTIONS_KEY] = applied
+
+    async def _exit_flattened(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        """
+        Leave a nested block that joined the outer transaction without a savepoint.
+        """
+
+        session = self._flattened_session
+        assert session is not None
+        self._flattened_session = None
+
+        if exc_type is not None and self._savepoint == "on_error_handling":
+            # The changes of the block cannot be rolled back separately anymore,
+            # so the outer transaction must not commit them.
+            session.info[_ROLLBACK_ONLY_KEY] = True
+        self._reset_scope()
+        await self._session_context.__aexit__(exc_type, exc_value, traceback)
+
+    async def _exit_instrumented(
+        self,
+        transaction: AsyncSessionTransaction,
+        exc_type: Optional[type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        """
+        Commit or roll back the transaction and report the timing to listeners.
+        """
+
+        assert self._started is not None
+        _, commit_kind, rollback_kind = (
+            _SAVEPOINT_EVENTS if self._nested else _TRANSACTION_EVENTS
+        )
+
+        ending = perf_counter()
+        kind: Any = rollback_kind if exc_type is not None else commit_kind
+        try:
+            await transaction.__aexit__(exc_type, exc_value, traceback)
+        except BaseException:
+            kind = rollback_kind
+            raise
+        finally:
+            ended = perf_counter()
+            self._db._emit(kind, ended - ending, ended - self._started)
+
+    def _watch(self, kind: ContextKind, session: AsyncSession) -> None:
+        watchdog = self._db._watchdog
+        if watchdog is not None:
+            self._watched = watchdog.track(kind, session, self._name)
+
+    def _reset_scope(self) -> None:
+        """
+        Restore the scope and stop watching the block.
+        """
+
+        if self._scope_token is not None:
+            self._db._scope_var.reset(self._scope_token)
+            self._scope_token = None
+        if self._watched is not None:
+            assert self._db._watchdog is not None
+            self._db._watchdog.untrack(self._watched)
+            self._watched = None
+
+
+class TimedSessionContextManager(SessionContextManager):
+    """
+    Session context manager with a wall-clock deadline, returned by `session(timeout=...)`
+    and `new_session(timeout=...)`.
+    """
+
+    __slots__ = ("_deadline",)
+
+    _deadline: Deadline
+
+    def __init__(
+        self,
+        db: "SQLAlchemyTransactionContext",
+        session_maker: Optional[async_sessionmaker[AsyncSession]],
+        reuse_if_exists: bool,
+        read_only: bool,
+        name: Optional[str],
+        new: bool,
+        priority: int,
+        shard_id: Optional[str],
+        timeout: float,
+    ) -> None:
+        super().__init__(
+            db,
+            session_maker,
+            reuse_if_exists,
+            read_only,
+            name,
+            new,
+            priority,
+            shard_id,
+        )
+        self._deadline = Deadline(timeout)
+
+    async def __aenter__(self) -> AsyncSession:
+        return await _enter_timed(self._deadline, super().__aenter__())
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        await _exit_timed(
+            self._deadline,
+            super().__aexit__(exc_type, exc_value, traceback),
+            exc_value,
+        )
+
+
+class TimedTransactionContextManager(TransactionContextManager):
+    """
+    Transaction context manager with a wall-clock deadline, returned by `transaction(timeout=...)`
+    and `new_transaction(timeout=...)`.
+    """
+
+    __slots__ = ("_deadline",)
+
+    _deadline: Deadline
+
+    def __init__(
+        self,
+        db: "SQLAlchemyTransactionContext",
+        session_context: AbstractAsyncContextManager[AsyncSession],
+        allow_nested_transactions: bool,
+        name: Optional[str],
+        savepoint: SavepointMode,
+        options: Optional[TransactionOptions],
+        timeout: float,
+    ) -> None:
+        super().__init__(
+            db,
+            session_context,
+            allow_nested_transactions,
+            name,
+            savepoint,
+            options,
+        )
+        self._deadline = Deadline(timeout)
+
+    async def __aenter__(self) -> AsyncSession:
+        return await _enter_timed(self._deadline, super().__aenter__())
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        await _exit_timed(
+            self._deadline,
+            super().__aexit__(exc_type, exc_value, traceback),
+            exc_value,
+        )
+
+
+class ConnectionContextManager:
+    """
+    Async context manager returned by `connection()`.
+
+    Opens an `AsyncConnection` on the primary engine and makes it the context-local connection.
+    """
+
+    __slots__ = (
+        "_db",
+        "_reuse_if_exists",
+        "_priority",
+        "_connection",
+        "_token",
+        "_admitted",
+    )
+
+    _db: "SQLAlchemyTransactionContext"
+    _reuse_if_exists: bool
+    _priority: int
+    _connection: Optional[AsyncConnection]
+    _token: Optional[Token[AsyncConnection]]
+    _admitted: bool
+
+    def __init__(
+        self,
+        db: "SQLAlchemyTransactionContext",
+        reuse_if_exists: bool,
+        priority: int,
+    ) -> None:
+        self._db = db
+        self._reuse_if_exists = reuse_if_exists
+        self._priority = priority
+        self._connection = None
+        self._token = None
+        self._admitted = False
+
+    async def __aenter__(self) -> AsyncConnection:
+        db = self._db
+
+        if db._session_var.get(None) is not None:
+            raise SessionAlreadyActiveError()
+        current_connection = db._connection_var.get(None)
+        if current_connection is not None:
+            if not self._reuse_if_exists:
+                raise SessionAlreadyActiveError()
+            return current_connection
+
+        if db._admission is not None:
+            await db._admission.acquire(self._priority)
+            self._admitted = True
+        try:
+            connection = db._engine.connect()
+            await connection.start()
+        except BaseException:
+            self._release()
+            raise
+
+        if db._result_cache is not None:
+            connection.info[WRITTEN_TABLES_KEY] = set()
+        self._connection = connection
+        self._token = db._connection_var.set(connection)
+        return connection
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        connection = self._connection
+        if connection is None:
+            return
+        self._connection = None
+
+        db = self._db
+        if self._token is not None:
+            db._connection_var.reset(self._token)
+            self._token = None
+
+        written = connection.info.pop(WRITTEN_TABLES_KEY, None)
+        # `AsyncConnection.info` outlives the block with the pooled connection.
+        connection.info.pop(QUERY_SHAPES_KEY, None)
+        try:
+            await connection.close()
+        finally:
+            self._release()
+        # Writes may have been committed by any transaction of the block, so they always invalidate.
+        if written:
+            await db._invalidate_result_cache(written)
+
+    def _release(self) -> None:
+        if self._admitted:
+            self._admitted = False
+            assert self._db._admission is not None
+            self._db._admission.release()
+
+
+class ConnectionTransactionContextManager:
+    """
+    Async context manager returned by `connection_transaction()`.
+
+    Wraps a connection context manager and begins a transaction, or a savepoint
+    when the connection already has an active transaction.
+    """
+
+    __slots__ = (
+        "_connection_context",
+        "_allow_nested_transactions",
+        "_transaction",
+    )
+
+    _connection_context: ConnectionContextManager
+    _allow_nested_transactions: bool
+    _transaction: Optional[AsyncTransaction]
+
+    def __init__(
+        self,
+        connection_context: ConnectionContextManager,
+        allow_nested_transactions: bool,
+    ) -> None:
+        self._connection_context = connection_context
+        self._allow_nested_transactions = allow_nested_transactions
+        self._transaction = None
+
+    async def __aenter__(self) -> AsyncConnection:
+        connection = await self._connection_context.__aenter__()
+        try:
+            if connection.in_transaction():
+                if self._allow_nested_transactions is False:
+                    raise TransactionAlreadyActiveError()
+                transaction = connection.begin_nested()
+            else:
+                transaction = connection.begin()
+            await transaction.__aenter__()
+        except BaseException:
+            await self._connection_context.__aexit__(*sys.exc_info())
+            raise
+
+        self._transaction = transaction
+        return connection
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        transaction = self._transaction
+        assert transaction is not None
+        self._transaction = None
+
+        try:
+            await transaction.__aexit__(exc_type, exc_value, traceback)
+        except BaseException:
+            await self._connection_context.__aexit__(*sys.exc_info())
+            raise
+        await self._connection_context.__aexit__(exc_type, exc_value, traceback)
+
+
+async def _enter_timed(
+    deadline: Deadline,
+    enter: Coroutine[Any, Any, AsyncSession],
+) -> AsyncSession:
+    """
+    Start the deadline, then enter the block; the deadline covers admission, session open and `BEGIN`.
+    """
+
+    deadline.start()
+    try:
+        session = await enter
+    except BaseException as exc:
+        error = deadline.stop(exc)
+        if error is None:
+            raise
+        raise error from exc
+    deadline.bind(session)
+    return session
+
+
+async def _exit_timed(
+    deadline: Deadline,
+    exit_: Coroutine[Any, Any, None],
+    exc_value: Optional[BaseException],
+) -> None:
+    """
+    Leave the block, then stop the deadline, raising `DeadlineExceededError` if it expired.
+    """
+
+    deadline.unbind()
+    try:
+        await exit_
+    except BaseException as exc:
+        error = deadline.stop(exc)
+        if error is None:
+            raise
+        raise error from exc
+    error = deadline.stop(exc_value)
+    if error is not None:
+        raise error from exc_value
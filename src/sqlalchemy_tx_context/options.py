@@ -0,0 +1,67 @@
+from collections.abc import Mapping
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from sqlalchemy.engine.interfaces import IsolationLevel
+
+# `Session.info` key holding the `AppliedTransactionOptions` of the current outermost `transaction()`.
+TRANSACTION_OPTIONS_KEY = "sqlalchemy_tx_context_transaction_options"
+
+# Dialects starting a read-only transaction with a statement instead of an execution option.
+_READ_ONLY_STATEMENT_DIALECTS = frozenset(("mysql", "mariadb", "oracle"))
+
+
+@dataclass(frozen=True)
+class TransactionOptions:
+    """
+    Characteristics requested for a transaction.
+
+    :ivar read_only: Whether the transaction does not write.
+    :ivar isolation_level: Isolation level, e.g. `"SERIALIZABLE"`.
+    :ivar deferrable: Whether a serializable read-only transaction may wait for a safe snapshot (PostgreSQL).
+    """
+
+    read_only: bool = False
+    isolation_level: Optional[IsolationLevel] = None
+    deferrable: bool = False
+
+    def resolve(self, dialect_name: str) -> "AppliedTransactionOptions":
+        """
+        Translate the options into what the dialect supports.
+
+        - `isolation_level` becomes the `isolation_level` connection execution option on every dialect.
+        - PostgreSQL uses the `postgresql_readonly` and `postgresql_deferrable` execution options.
+        - MySQL, MariaDB and Oracle start read-only transactions with `SET TRANSACTION READ ONLY`.
+
+        Options a dialect does not support are left out.
+
+        :param dialect_name: Name of the dialect, e.g. `"postgresql"`.
+        """
+
+        execution_options: dict[str, Any] = {}
+        statements: list[str] = []
+        if self.isolation_level is not None:
+            execution_options["isolation_level"] = self.isolation_level
+        if dialect_name == "postgresql":
+            if self.read_only:
+                execution_options["postgresql_readonly"] = True
+            if self.deferrable:
+                execution_options["postgresql_deferrable"] = True
+        elif self.read_only and dialect_name in _READ_ONLY_STATEMENT_DIALECTS:
+            statements.append("SET TRANSACTION READ ONLY")
+        return AppliedTransactionOptions(self, execution_options, tuple(statements))
+
+
+@dataclass(frozen=True)
+class AppliedTransactionOptions:
+    """
+    Transaction options as applied to a connection, returned by `get_transaction_options()`.
+
+    :ivar options: Requested options.
+    :ivar execution_options: Connection execution options set when the transaction began.
+    :ivar statements: Statements executed at the start of the transaction.
+    """
+
+    options: TransactionOptions
+    execution_options: Mapping[str, Any]
+    statements: tuple[str, ...]
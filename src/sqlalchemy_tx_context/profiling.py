@@ -0,0 +1,199 @@
+from collections import deque
+from collections.abc import Mapping, Sequence
+from dataclasses import asdict, dataclass
+from typing import Any, Optional, cast
+
+from sqlalchemy import Executable
+from sqlalchemy.engine import Dialect
+from sqlalchemy.engine.interfaces import (
+    _CoreAnyExecuteParams,  # type: ignore[reportPrivateUsage]
+)
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlalchemy.sql.compiler import SQLCompiler
+from sqlalchemy.sql.elements import ClauseElement
+
+# Prefixes turning a statement into a request for its query plan, by dialect name.
+EXPLAIN_PREFIXES: Mapping[str, str] = {
+    "sqlite": "EXPLAIN QUERY PLAN ",
+    "postgresql": "EXPLAIN (FORMAT JSON) ",
+    "mysql": "EXPLAIN FORMAT=JSON ",
+    "mariadb": "EXPLAIN FORMAT=JSON ",
+}
+
+
+@dataclass(frozen=True)
+class SlowQuery:
+    """
+    A statement recorded by `SlowQueryProfiler`.
+
+    :ivar sql: SQL rendered for the dialect, with bound parameter placeholders.
+    :ivar parameters: Type name of every bound parameter value, by parameter name; values are not kept.
+    :ivar rows: Number of parameter sets, more than 1 for executemany.
+    :ivar duration: Execution time in seconds.
+    :ivar label: `name=...` label of the innermost enclosing block.
+    :ivar plan: Rows returned by the dialect's EXPLAIN, or None if not captured.
+    :ivar explain_error: Why the plan could not be captured, if it could not.
+    :ivar recorded_at: Unix time of the recording.
+    """
+
+    sql: str
+    parameters: dict[str, str]
+    rows: int
+    duration: float
+    label: Optional[str]
+    plan: Optional[list[tuple[Any, ...]]]
+    explain_error: Optional[str]
+    recorded_at: float
+
+
+class SlowQueryProfiler:
+    """
+    Opt-in profiler recording statements executed through `execute(...)` that take longer than `threshold`.
+
+    For every slow statement, the dialect's EXPLAIN variant (`EXPLAIN QUERY PLAN` on SQLite,
+    `EXPLAIN (FORMAT JSON)` on PostgreSQL, `EXPLAIN FORMAT=JSON` on MySQL and MariaDB) is run on a separate
+    connection of the same engine, outside admission control and listeners, and the plan is kept with the statement in a ring buffer
+    of the last `capacity` records.
+
+    The plan is captured while the caller waits, so a slow statement costs one more round trip.
+    """
+
+    __slots__ = ("threshold", "explain", "_records")
+
+    threshold: float
+    explain: bool
+    _records: "deque[SlowQuery]"
+
+    def __init__(
+        self,
+        threshold: float = 1.0,
+        *,
+        capacity: int = 100,
+        explain: bool = True,
+    ) -> None:
+        """
+        :param threshold: Statements running at least this many seconds are recorded.
+        :param capacity: Number of records kept; the oldest record is dropped first.
+        :param explain: Whether to capture query plans.
+
+        :raise ValueError: If `capacity` is less than 1.
+        """
+
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.threshold = threshold
+        self.explain = explain
+        self._records = deque(maxlen=capacity)
+
+    @property
+    def records(self) -> list[SlowQuery]:
+        """
+        Recorded statements, oldest first.
+        """
+
+        return list(self._records)
+
+    def record(self, query: SlowQuery) -> None:
+        """
+        Add a record, dropping the oldest one when the buffer is full.
+
+        :param query: Record to add.
+        """
+
+        self._records.append(query)
+
+    def dump(self) -> list[dict[str, Any]]:
+        """
+        Return the records as dictionaries, oldest first, e.g. for logging as JSON.
+        """
+
+        return [asdict(query) for query in self._records]
+
+    def clear(self) -> None:
+        """
+        Drop all records.
+        """
+
+        self._records.clear()
+
+
+def compile_for_profile(
+    statement: Executable,
+    params: Optional[_CoreAnyExecuteParams],
+    dialect: Dialect,
+) -> tuple[str, dict[str, Any], Optional[Sequence[str]], int]:
+    """
+    Compile a statement and resolve the values of its bound parameters.
+
+    Expanding parameters, e.g. of `in_()`, are rendered as one placeholder per value, so the SQL can be
+    run by EXPLAIN as is.
+
+    :param statement: Executed statement.
+    :param params: Parameters passed to `execute(...)`: None, a mapping, or a sequence of mappings.
+    :param dialect: Dialect the statement ran on.
+
+    :return: SQL, bound values of the first parameter set, names of the positional placeholders
+        for positional dialects, and the number of parameter sets.
+    """
+
+    element = cast(ClauseElement, statement)
+    rows = 1
+    first: Optional[Mapping[str, Any]] = None
+    if isinstance(params, Mapping):
+        first = params
+    elif params:
+        rows = len(params)
+        first = params[0]
+    if first:
+        # Values passed along with the statement are not known at compile time, so the placeholders are
+        # expanded after compiling.
+        compiler = cast(SQLCompiler, element.compile(dialect=dialect))
+        state = compiler.construct_expanded_state(first)
+        return state.statement, dict(state.parameters), state.positiontup, rows
+    compiler = cast(
+        SQLCompiler,
+        element.compile(dialect=dialect, compile_kwargs={"render_postcompile": True}),
+    )
+    return (
+        compiler.string,
+        dict(compiler.construct_params()),
+        compiler.positiontup,
+        rows,
+    )
+
+
+def parameters_shape(bound: Mapping[str, Any]) -> dict[str, str]:
+    """
+    Describe bound values by their type names.
+
+    :param bound: Bound values by parameter name.
+    """
+
+    return {name: type(value).__name__ for name, value in bound.items()}
+
+
+async def explain(
+    connection: AsyncConnection,
+    sql: str,
+    bound: Mapping[str, Any],
+    positions: Optional[Sequence[str]] = None,
+) -> Optional[list[tuple[Any, ...]]]:
+    """
+    Run the EXPLAIN variant of a statement.
+
+    :param connection: Connection to run EXPLAIN on.
+    :param sql: SQL returned by `compile_for_profile`.
+    :param bound: Bound values by parameter name.
+    :param positions: Names of the positional placeholders, for positional dialects.
+
+    :return: Rows of the plan, or None if the dialect has no supported EXPLAIN variant.
+    """
+
+    prefix = EXPLAIN_PREFIXES.get(connection.dialect.name)
+    if prefix is None:
+        return None
+    parameters: Any = (
+        tuple(bound[name] for name in positions) if positions else dict(bound)
+    )
+    result = await connection.exec_driver_sql(prefix + sql, parameters)
+    return [tuple(row) for row in result]
@@ -0,0 +1,144 @@
+import random
+
+from collections.abc import Callable, Mapping
+from typing import Any, Optional
+
+from sqlalchemy.exc import DBAPIError
+
+RetryablePredicate = Callable[[DBAPIError], bool]
+
+
+def sqlstate_predicate(*codes: str) -> RetryablePredicate:
+    """
+    Match driver errors by SQLSTATE, as exposed by psycopg, psycopg2 and asyncpg.
+
+    :param codes: SQLSTATE codes to match, e.g. `"40001"`.
+    """
+
+    expected = frozenset(codes)
+
+    def predicate(exc: DBAPIError) -> bool:
+        orig: Any = exc.orig
+        code = getattr(orig, "sqlstate", None) or getattr(orig, "pgcode", None)
+        return code in expected
+
+    return predicate
+
+
+def errno_predicate(*codes: int) -> RetryablePredicate:
+    """
+    Match driver errors by the numeric error code passed as the first exception argument,
+    as done by MySQL and MariaDB drivers.
+
+    :param codes: Error numbers to match, e.g. `1213`.
+    """
+
+    expected = frozenset(codes)
+
+    def predicate(exc: DBAPIError) -> bool:
+        args: Any = getattr(exc.orig, "args", ())
+        return bool(args) and args[0] in expected
+
+    return predicate
+
+
+def message_predicate(*fragments: str) -> RetryablePredicate:
+    """
+    Match driver errors by a fragment of the error message.
+
+    :param fragments: Case-insensitive message fragments.
+    """
+
+    expected = tuple(fragment.lower() for fragment in fragments)
+
+    def predicate(exc: DBAPIError) -> bool:
+        message = str(exc.orig).lower()
+        return any(fragment in message for fragment in expected)
+
+    return predicate
+
+
+DEFAULT_RETRYABLE_ERRORS: Mapping[str, RetryablePredicate] = {
+    # serialization_failure, deadlock_detected, lock_not_available
+    "postgresql": sqlstate_predicate("40001", "40P01", "55P03"),
+    # ER_LOCK_DEADLOCK, ER_LOCK_WAIT_TIMEOUT
+    "mysql": errno_predicate(1213, 1205),
+    "mariadb": errno_predicate(1213, 1205),
+    "sqlite": message_predicate("database is locked", "database table is locked"),
+    "mssql": message_predicate("(1205)", "deadlock"),
+    "oracle": message_predicate("ORA-00060", "ORA-08177"),
+}
+
+
+class RetryPolicy:
+    """
+    Describes when and how a transactional unit of work is re-run.
+
+    Delays grow exponentially from `backoff` up to `max_backoff`; with `jitter` enabled
+    a random delay between zero and the computed value is used ("full jitter").
+    """
+
+    __slots__ = ("retries", "backoff", "max_backoff", "jitter", "retryable_errors")
+
+    retries: int
+    backoff: float
+    max_backoff: float
+    jitter: bool
+    retryable_errors: Mapping[str, RetryablePredicate]
+
+    def __init__(
+        self,
+        *,
+        retries: int = 3,
+        backoff: float = 0.05,
+        max_backoff: float = 2.0,
+        jitter: bool = True,
+        retryable_errors: Optional[Mapping[str, RetryablePredicate]] = None,
+    ) -> None:
+        """
+        :param retries: Maximum number of additional attempts after the first one.
+        :param backoff: Base delay in seconds before the first retry.
+        :param max_backoff: Upper bound of a single delay in seconds.
+        :param jitter: Whether to randomize delays.
+        :param retryable_errors:
+            Mapping of dialect name to a predicate deciding whether a `DBAPIError` is retryable.
+            Defaults to `DEFAULT_RETRYABLE_ERRORS` (serialization failures, deadlocks and lock timeouts).
+            Errors of dialects missing from the mapping are never retried.
+        """
+
+        if retries < 0:
+            raise ValueError("retries must not be negative")
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.retryable_errors = (
+            DEFAULT_RETRYABLE_ERRORS if retryable_errors is None else retryable_errors
+        )
+
+    def is_retryable(self, exc: BaseException, dialect_name: str) -> bool:
+        """
+        Check whether the error may succeed when the unit of work is re-run.
+
+        :param exc: Raised exception.
+        :param dialect_name: Name of the dialect the error comes from.
+        """
+
+        if not isinstance(exc, DBAPIError):
+            return False
+        predicate = self.retryable_errors.get(dialect_name)
+        return predicate is not None and predicate(exc)
+
+    def delay(self, attempt: int) -> float:
+        """
+        Return the delay before the given retry.
+
+        :param attempt: Retry number, starting at 1.
+
+        :return: Delay in seconds.
+        """
+
+        delay = min(self.max_backoff, self.backoff * 2 ** (attempt - 1))
+        if self.jitter:
+            return random.uniform(0, delay)
+        return delay
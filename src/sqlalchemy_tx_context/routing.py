@@ -0,0 +1,145 @@
+import random
+
+from abc import ABC, abstractmethod
+from collections.abc import Sequence
+from typing import Optional
+
+
+class ReplicaBalancingPolicy(ABC):
+    """
+    Strategy used to pick a read replica for a new read-only session.
+
+    Policies are stateful and bound to a single `SQLAlchemyTransactionContext`.
+    The context calls `attach(...)` once it is constructed, `choose(...)` when a replica session is opened,
+    then `on_acquire(...)` and `on_release(...)` around its lifetime.
+    """
+
+    def attach(self, replica_count: int) -> None:  # noqa: B027
+        """
+        Called when the policy is passed to a context.
+
+        :param replica_count: Number of configured replicas.
+
+        :raise ValueError: If the policy cannot serve that number of replicas.
+        """
+
+    @abstractmethod
+    def choose(self, replica_count: int) -> int:
+        """
+        Select the replica that should serve the next read-only session.
+
+        :param replica_count: Number of configured replicas (always greater than zero).
+
+        :return: Index of the selected replica.
+        """
+
+    def on_acquire(self, index: int) -> None:  # noqa: B027
+        """
+        Called when a session bound to the replica at `index` is opened.
+
+        :param index: Index of the replica.
+        """
+
+    def on_release(self, index: int) -> None:  # noqa: B027
+        """
+        Called when a session bound to the replica at `index` is closed.
+
+        :param index: Index of the replica.
+        """
+
+
+class RoundRobinPolicy(ReplicaBalancingPolicy):
+    """
+    Cycles through replicas in order.
+    """
+
+    _next: int
+
+    def __init__(self) -> None:
+        self._next = 0
+
+    def choose(self, replica_count: int) -> int:
+        index = self._next % replica_count
+        self._next = index + 1
+        return index
+
+
+class LeastInFlightPolicy(ReplicaBalancingPolicy):
+    """
+    Picks the replica with the fewest currently open sessions.
+
+    Ties are resolved in favour of the replica with the lowest index.
+    """
+
+    _in_flight: list[int]
+
+    def __init__(self) -> None:
+        self._in_flight = []
+
+    def choose(self, replica_count: int) -> int:
+        self._ensure_size(replica_count)
+        in_flight = self._in_flight
+        return min(range(replica_count), key=in_flight.__getitem__)
+
+    def on_acquire(self, index: int) -> None:
+        self._ensure_size(index + 1)
+        self._in_flight[index] += 1
+
+    def on_release(self, index: int) -> None:
+        self._in_flight[index] -= 1
+
+    def in_flight(self) -> tuple[int, ...]:
+        """
+        Return the number of open sessions per replica.
+
+        :return: Tuple of counters indexed by replica.
+        """
+
+        return tuple(self._in_flight)
+
+    def _ensure_size(self, size: int) -> None:
+        missing = size - len(self._in_flight)
+        if missing > 0:
+            self._in_flight.extend([0] * missing)
+
+
+class WeightedPolicy(ReplicaBalancingPolicy):
+    """
+    Picks replicas randomly, proportionally to the configured weights.
+    """
+
+    _weights: tuple[float, ...]
+    _random: random.Random
+
+    def __init__(
+        self,
+        weights: Sequence[float],
+        *,
+        rng: Optional[random.Random] = None,
+    ) -> None:
+        """
+        :param weights: Relative weight of each replica, in the same order as the replicas.
+        :param rng: Optional random generator, mostly useful for deterministic tests.
+
+        :raise ValueError: If no weights are given or any weight is not positive.
+        """
+
+        if not weights or any(weight <= 0 for weight in weights):
+            raise ValueError("weights must be positive")
+        self._weights = tuple(weights)
+        self._random = rng or random.Random()
+
+    def attach(self, replica_count: int) -> None:
+        if replica_count != len(self._weights):
+            raise ValueError(
+                f"WeightedPolicy has {len(self._weights)} weights "
+                f"but {replica_count} replicas are configured",
+            )
+
+    def choose(self, replica_count: int) -> int:
+        if replica_count != len(self._weights):
+            raise ValueError(
+                f"WeightedPolicy has {len(self._weights)} weights "
+                f"but {replica_count} replicas are configured",
+            )
+        return self._random.choices(range(replica_count), weights=self._weights)[0]
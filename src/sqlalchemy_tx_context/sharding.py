@@ -0,0 +1,65 @@
+import hashlib
+
+from bisect import bisect
+from collections.abc import Callable, Iterable
+from typing import Any
+
+# Maps a shard key, e.g. a tenant or user id, to the id of the shard holding its data.
+ShardResolver = Callable[[Any], str]
+
+# `Session.info` key holding the id of the shard a session is bound to.
+SHARD_ID_KEY = "sqlalchemy_tx_context_shard_id"
+
+
+class ConsistentHashRing:
+    """
+    Consistent hash ring mapping shard keys to shard ids.
+
+    Every shard is placed on the ring at `vnodes` points; a key belongs to the first point
+    following its hash. Adding or removing a shard only remaps the keys of the neighbouring points,
+    about `1 / len(shard_ids)` of all keys.
+
+    Keys are hashed by their `str()` value, so `42` and `"42"` map to the same shard.
+    """
+
+    __slots__ = ("_points", "_shard_ids")
+
+    _points: list[int]
+    _shard_ids: list[str]
+
+    def __init__(self, shard_ids: Iterable[str], *, vnodes: int = 160) -> None:
+        """
+        :param shard_ids: Ids of the shards.
+        :param vnodes: Number of ring points per shard; more points spread keys more evenly.
+
+        :raise ValueError: If there are no shards or `vnodes` is less than 1.
+        """
+
+        if vnodes < 1:
+            raise ValueError("vnodes must be at least 1")
+        ring = sorted(
+            (_hash(f"{shard_id}#{index}"), shard_id)
+            for shard_id in dict.fromkeys(shard_ids)
+            for index in range(vnodes)
+        )
+        if not ring:
+            raise ValueError("at least one shard is required")
+        self._points = [point for point, _ in ring]
+        self._shard_ids = [shard_id for _, shard_id in ring]
+
+    def __call__(self, shard_key: Any) -> str:
+        """
+        Return the id of the shard owning the key.
+
+        :param shard_key: Shard key.
+        """
+
+        index = bisect(self._points, _hash(str(shard_key)))
+        return self._shard_ids[index % len(self._shard_ids)]
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(
+        hashlib.blake2b(value.encode(), digest_size=8).digest(),
+        "big",
+    )
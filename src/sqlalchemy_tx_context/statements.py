@@ -0,0 +1,16 @@
+from sqlalchemy import CompoundSelect, Executable, Select
+
+
+def is_readonly_statement(statement: Executable) -> bool:
+    """
+    Check whether the statement is read-only (e.g., SELECT).
+
+    Shared by the async and sync contexts to decide when a transaction is optional
+    during automatic context creation.
+
+    :param statement: SQLAlchemy Executable.
+
+    :return: True for instances of `Select` and `CompoundSelect`.
+    """
+
+    return isinstance(statement, (Select, CompoundSelect))
@@ -0,0 +1,131 @@
+import asyncio
+
+from collections.abc import Awaitable, Callable
+from contextlib import AsyncExitStack
+from types import TracebackType
+from typing import Any, Generic, Optional, TypeVar, Union, cast
+
+from sqlalchemy.ext.asyncio import AsyncResult, AsyncScalarResult
+
+_R = TypeVar("_R")
+
+_StreamOpener = Callable[
+    [AsyncExitStack],
+    Awaitable[Union[AsyncResult[Any], AsyncScalarResult[Any]]],
+]
+
+
+class ResultStream(Generic[_R]):
+    """
+    Async iterator over a server-side cursor opened by `stream(...)` or `stream_scalars(...)`.
+
+    The statement is executed lazily, on the first iteration or when entering the `async with` block.
+    If the stream had to create its own session (auto-context), that session and its connection
+    stay open only while the stream is open and are released as soon as iteration is exhausted,
+    fails, or the `async with` block is left.
+
+    Prefer the `async with` form when the loop may be left early (`break`, `return`),
+    so the connection is released deterministically. An abandoned stream that was not closed
+    is released by the garbage collector on a best-effort basis.
+    """
+
+    __slots__ = ("_opener", "_stack", "_result", "_closed", "__weakref__")
+
+    _opener: Optional[_StreamOpener]
+    _stack: AsyncExitStack
+    _result: Optional[Union[AsyncResult[Any], AsyncScalarResult[Any]]]
+    _closed: bool
+
+    def __init__(self, opener: _StreamOpener) -> None:
+        """
+        :param opener: Coroutine function executing the statement. Resources it acquires
+            must be registered on the given exit stack.
+        """
+
+        self._opener = opener
+        self._stack = AsyncExitStack()
+        self._result = None
+        self._closed = False
+
+    async def __aenter__(self) -> "ResultStream[_R]":
+        await self._start()
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        await self._close(exc_type, exc_value, traceback)
+
+    def __aiter__(self) -> "ResultStream[_R]":
+        return self
+
+    async def __anext__(self) -> _R:
+        if self._closed:
+            raise StopAsyncIteration
+        if self._result is None:
+            await self._start()
+        assert self._result is not None
+        try:
+            return cast(_R, await self._result.__anext__())
+        except StopAsyncIteration:
+            await self.aclose()
+            raise
+        except BaseException as exc:
+            await self._close(type(exc), exc, exc.__traceback__)
+            raise
+
+    async def aclose(self) -> None:
+        """
+        Close the cursor and release the session created for the stream, if any.
+        """
+
+        await self._close(None, None, None)
+
+    @property
+    def closed(self) -> bool:
+        """
+        True once the stream has been closed.
+        """
+
+        return self._closed
+
+    async def _start(self) -> None:
+        if self._closed:
+            raise RuntimeError("The stream is already closed")
+        if self._result is not None or self._opener is None:
+            return
+        opener, self._opener = self._opener, None
+        try:
+            self._result = await opener(self._stack)
+        except BaseException as exc:
+            await self._close(type(exc), exc, exc.__traceback__)
+            raise
+
+    async def _close(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._opener = None
+        result, self._result = self._result, None
+        try:
+            if result is not None:
+                await result.close()
+        finally:
+            await self._stack.__aexit__(exc_type, exc_value, traceback)
+
+    def __del__(self) -> None:
+        if self._closed or self._result is None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        loop.create_task(self.aclose())
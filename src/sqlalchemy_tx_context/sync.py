@@ -0,0 +1,410 @@
+import sys
+
+from collections.abc import Callable
+from contextlib import AbstractContextManager
+from contextvars import ContextVar, Token
+from types import TracebackType
+from typing import Any, Optional, TypeVar, cast
+
+from sqlalchemy import CursorResult, Engine, Executable, UpdateBase, util
+from sqlalchemy.engine import Result
+from sqlalchemy.engine.interfaces import (
+    _CoreAnyExecuteParams,  # type: ignore[reportPrivateUsage]
+)
+from sqlalchemy.orm import Session, SessionTransaction, sessionmaker
+from sqlalchemy.orm._typing import (
+    OrmExecuteOptionsParameter,  # type: ignore[reportPrivateUsage]
+)
+from sqlalchemy.sql.selectable import TypedReturnsRows
+from typing_extensions import Literal, overload
+
+from sqlalchemy_tx_context.exceptions import (
+    NoSessionError,
+    SessionAlreadyActiveError,
+    TransactionAlreadyActiveError,
+)
+from sqlalchemy_tx_context.statements import is_readonly_statement
+
+_T = TypeVar("_T", covariant=True, bound=Any)
+
+
+class SQLTransactionContext:
+    """
+    Transaction and session manager for synchronous SQLAlchemy `Session` using context-local state.
+
+    Synchronous counterpart of `SQLAlchemyTransactionContext` for code that does not run in an event loop,
+    such as batch workers in process pools, where it avoids the greenlet bridging of `AsyncSession`.
+    `session()`, `transaction()`, `new_session()`, `new_transaction()` and `execute(...)`
+    follow the same rules as their async versions.
+    """
+
+    _engine: Engine
+    _default_session_maker: sessionmaker[Session]
+    _auto_context_on_execute: bool
+    _auto_context_force_transaction: bool
+    _session_var: ContextVar[Session]
+
+    def __init__(
+        self,
+        engine: Engine,
+        *,
+        default_session_maker: Optional[sessionmaker[Session]] = None,
+        auto_context_on_execute: bool = False,
+        auto_context_force_transaction: bool = False,
+    ):
+        """
+        Initialize a transaction context manager.
+
+        :param engine: SQLAlchemy Engine instance.
+        :param default_session_maker: Optional custom session factory.
+        :param auto_context_on_execute:
+            If True, allows `execute(...)` to work even when no session is currently active,
+            see `SQLAlchemyTransactionContext`.
+        :param auto_context_force_transaction:
+            If True, `execute(...)` without an active session always runs in a transaction.
+            If False, only statements other than `Select` and `CompoundSelect` do.
+        """
+
+        self._engine = engine
+        if default_session_maker is None:
+            default_session_maker = sessionmaker(
+                self._engine,
+                class_=Session,
+                expire_on_commit=False,
+            )
+        self._default_session_maker = default_session_maker
+        self._auto_context_on_execute = auto_context_on_execute
+        self._auto_context_force_transaction = auto_context_force_transaction
+        self._session_var = ContextVar("sqlalchemy_tx_context_sync_session")
+
+    def session(
+        self,
+        *,
+        session_maker: Optional[sessionmaker[Session]] = None,
+        reuse_if_exists: bool = False,
+    ) -> "SyncSessionContextManager":
+        """
+        Enter a new session context or reuse the current one.
+
+        :param session_maker: Optional custom session maker to use.
+        :param reuse_if_exists: If True, reuses existing context-local session if present.
+
+        :return: Context manager yielding a Session instance.
+
+        :raise SessionAlreadyActiveError: If session already exists and `reuse_if_exists` is False.
+        """
+
+        return SyncSessionContextManager(self, session_maker, reuse_if_exists, False)
+
+    def transaction(
+        self,
+        *,
+        session_maker: Optional[sessionmaker[Session]] = None,
+        reuse_if_exists: bool = True,
+        allow_nested_transactions: bool = True,
+    ) -> "SyncTransactionContextManager":
+        """
+        Enter a transaction context. Creates a new session if needed.
+
+        If a transaction is already active, creates a nested transaction (savepoint) unless explicitly forbidden.
+
+        :param session_maker: Optional custom session maker.
+        :param reuse_if_exists: Whether to reuse current session if available.
+        :param allow_nested_transactions: Whether to allow nested transactions.
+
+        :return: Context manager yielding a Session with active transaction.
+
+        :raise SessionAlreadyActiveError: If session already exists and `reuse_if_exists` is False.
+        :raise TransactionAlreadyActiveError: If transaction is already active and nesting is disabled.
+        """
+
+        return SyncTransactionContextManager(
+            self.session(
+                session_maker=session_maker,
+                reuse_if_exists=reuse_if_exists,
+            ),
+            allow_nested_transactions,
+        )
+
+    def new_session(
+        self,
+        *,
+        session_maker: Optional[sessionmaker[Session]] = None,
+    ) -> "SyncSessionContextManager":
+        """
+        Start a new independent session, even if another is already active.
+
+        This overrides the current context-local session during the block.
+
+        :param session_maker: Optional custom session factory.
+
+        :return: Context manager yielding a new Session.
+        """
+
+        return SyncSessionContextManager(self, session_maker, False, True)
+
+    def new_transaction(
+        self,
+        *,
+        session_maker: Optional[sessionmaker[Session]] = None,
+    ) -> "SyncTransactionContextManager":
+        """
+        Start a new transaction in a fresh, independent session.
+
+        Overrides the current session in the context for the duration.
+
+        :param session_maker: Optional custom session factory.
+
+        :return: Context manager yielding a new Session with active transaction.
+        """
+
+        return SyncTransactionContextManager(
+            self.new_session(session_maker=session_maker),
+            True,
+        )
+
+    @overload
+    def get_session(self, strict: Literal[True] = True) -> Session: ...
+
+    @overload
+    def get_session(self, strict: Literal[False]) -> Optional[Session]: ...
+
+    @overload
+    def get_session(self, strict: bool) -> Optional[Session]: ...
+
+    def get_session(self, strict: bool = True) -> Optional[Session]:
+        """
+        Return the current context-local session, or raise if none exists.
+
+        :param strict: If True, raises NoSessionError if session is not set.
+
+        :return: Session or None.
+
+        :raise NoSessionError: If no session is active and `strict=True`.
+        """
+
+        session = self._session_var.get(None)
+        if session is None and strict is True:
+            raise NoSessionError()
+        return session
+
+    @overload
+    def execute(
+        self,
+        statement: TypedReturnsRows[_T],
+        params: Optional[_CoreAnyExecuteParams] = None,
+        *,
+        force_transaction: Optional[bool] = None,
+        execution_options: OrmExecuteOptionsParameter = util.EMPTY_DICT,
+        bind_arguments: Optional[dict[str, Any]] = None,
+    ) -> Result[_T]: ...
+
+    @overload
+    def execute(
+        self,
+        statement: UpdateBase,
+        params: Optional[_CoreAnyExecuteParams] = None,
+        *,
+        force_transaction: Optional[bool] = None,
+        execution_options: OrmExecuteOptionsParameter = util.EMPTY_DICT,
+        bind_arguments: Optional[dict[str, Any]] = None,
+    ) -> CursorResult[Any]: ...
+
+    @overload
+    def execute(
+        self,
+        statement: Executable,
+        params: Optional[_CoreAnyExecuteParams] = None,
+        *,
+        force_transaction: Optional[bool] = None,
+        execution_options: OrmExecuteOptionsParameter = util.EMPTY_DICT,
+        bind_arguments: Optional[dict[str, Any]] = None,
+    ) -> Result[Any]: ...
+
+    def execute(
+        self,
+        statement: Executable,
+        params: Optional[_CoreAnyExecuteParams] = None,
+        *,
+        force_transaction: Optional[bool] = None,
+        execution_options: OrmExecuteOptionsParameter = util.EMPTY_DICT,
+        bind_arguments: Optional[dict[str, Any]] = None,
+        **kw: Any,
+    ) -> Result[Any]:
+        """
+        Execute a SQLAlchemy statement using the current context-bound session.
+
+        If auto_context_on_execute is True and no session is active, a new session or transaction
+        will be created depending on the statement type; the rows of its result are fetched before it closes.
+
+        :param statement: SQLAlchemy Executable (e.g., select, insert, update).
+        :param params: Optional bound parameters.
+        :param force_transaction: Overrides the default behavior defined by `auto_context_force_transaction`
+               for this specific call.
+        :param execution_options: SQLAlchemy execution options.
+        :param bind_arguments: Additional bind arguments.
+        :param kw: Additional arguments passed to `session.execute`.
+
+        :return: SQLAlchemy Result object.
+
+        :raise NoSessionError: If no session is currently active.
+        """
+
+        session = self.get_session(strict=not self._auto_context_on_execute)
+        if session is None:
+            transactional = (
+                self._auto_context_force_transaction
+                if force_transaction is None
+                else force_transaction
+            ) or not is_readonly_statement(statement)
+            session_factory = cast(
+                Callable[..., AbstractContextManager[Session]],
+                self.transaction if transactional else self.session,
+            )
+            with session_factory() as session:
+                # The result outlives its session, so its rows are fetched before the session closes,
+                # as `AsyncSession.execute` always does.
+                return session.execute(
+                    statement,
+                    params,
+                    execution_options={"prebuffer_rows": True, **execution_options},
+                    bind_arguments=bind_arguments,
+                    **kw,
+                )
+
+        return session.execute(
+            statement,
+            params,
+            execution_options=execution_options,
+            bind_arguments=bind_arguments,
+            **kw,
+        )
+
+
+class SyncSessionContextManager:
+    """
+    Context manager returned by `SQLTransactionContext.session()` and `new_session()`.
+    """
+
+    __slots__ = (
+        "_db",
+        "_session_maker",
+        "_reuse_if_exists",
+        "_new",
+        "_session",
+        "_token",
+    )
+
+    _db: SQLTransactionContext
+    _session_maker: Optional[sessionmaker[Session]]
+    _reuse_if_exists: bool
+    _new: bool
+    _session: Optional[Session]
+    _token: Optional[Token[Session]]
+
+    def __init__(
+        self,
+        db: SQLTransactionContext,
+        session_maker: Optional[sessionmaker[Session]],
+        reuse_if_exists: bool,
+        new: bool,
+    ) -> None:
+        self._db = db
+        self._session_maker = session_maker
+        self._reuse_if_exists = reuse_if_exists
+        self._new = new
+        self._session = None
+        self._token = None
+
+    def __enter__(self) -> Session:
+        db = self._db
+
+        if not self._new:
+            current_session = db._session_var.get(None)  # type: ignore[reportPrivateUsage]
+            if current_session is not None:
+                if self._reuse_if_exists:
+                    return current_session
+                raise SessionAlreadyActiveError()
+
+        session_maker = self._session_maker or db._default_session_maker  # type: ignore[reportPrivateUsage]
+        session = self._session = session_maker()
+        self._token = db._session_var.set(session)  # type: ignore[reportPrivateUsage]
+        return session
+
+    def __exit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        session = self._session
+        if session is None:
+            return
+        self._session = None
+
+        if self._token is not None:
+            self._db._session_var.reset(self._token)  # type: ignore[reportPrivateUsage]
+            self._token = None
+        session.close()
+
+
+class SyncTransactionContextManager:
+    """
+    Context manager returned by `SQLTransactionContext.transaction()` and `new_transaction()`.
+
+    Wraps a session context manager and begins a transaction, or a savepoint
+    when the session already has an active transaction.
+    """
+
+    __slots__ = (
+        "_session_context",
+        "_allow_nested_transactions",
+        "_transaction",
+    )
+
+    _session_context: AbstractContextManager[Session]
+    _allow_nested_transactions: bool
+    _transaction: Optional[SessionTransaction]
+
+    def __init__(
+        self,
+        session_context: AbstractContextManager[Session],
+        allow_nested_transactions: bool,
+    ) -> None:
+        self._session_context = session_context
+        self._allow_nested_transactions = allow_nested_transactions
+        self._transaction = None
+
+    def __enter__(self) -> Session:
+        session = self._session_context.__enter__()
+        try:
+            if session.in_transaction():
+                if self._allow_nested_transactions is False:
+                    raise TransactionAlreadyActiveError()
+                transaction = session.begin_nested()
+            else:
+                transaction = session.begin()
+            transaction.__enter__()
+        except BaseException:
+            self._session_context.__exit__(*sys.exc_info())
+            raise
+
+        self._transaction = transaction
+        return session
+
+    def __exit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        transaction = self._transaction
+        assert transaction is not None
+        self._transaction = None
+
+        try:
+            transaction.__exit__(exc_type, exc_value, traceback)
+        except BaseException:
+            self._session_context.__exit__(*sys.exc_info())
+            raise
+        self._session_context.__exit__(exc_type, exc_value, traceback)
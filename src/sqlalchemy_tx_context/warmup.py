@@ -0,0 +1,172 @@
+import asyncio
+
+from collections.abc import Iterable, Mapping, Sequence
+from contextlib import AsyncExitStack
+from typing import Any, Union, cast
+
+from sqlalchemy import Connection, event
+from sqlalchemy.engine.interfaces import CacheStats
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.sql import ClauseElement, Executable
+
+# A statement to pre-compile, optionally paired with example parameters. Parameters matter for statements
+# whose compiled form depends on the parameter names, such as `insert(table)` executed with a dict of values;
+# only their keys are used.
+WarmupStatement = Union[
+    Executable,
+    tuple[Executable, Union[Mapping[str, Any], Sequence[Mapping[str, Any]]]],
+]
+
+
+class CompiledCacheStats:
+    """
+    Counts compiled-cache hits and misses of statements executed on the observed engines.
+
+    Counters accumulate until `reset()`; poll `snapshot()` periodically to follow them over time.
+    """
+
+    __slots__ = ("hits", "misses", "uncached", "_engines")
+
+    hits: int
+    misses: int
+    uncached: int
+    _engines: list[AsyncEngine]
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self.uncached = 0
+        self._engines = []
+
+    def attach(self, engine: AsyncEngine) -> None:
+        """
+        Start observing statements executed on the engine.
+
+        :param engine: Engine to observe.
+        """
+
+        if engine in self._engines:
+            return
+        event.listen(engine.sync_engine, "after_cursor_execute", self._on_execute)
+        self._engines.append(engine)
+
+    def detach(self) -> None:
+        """
+        Stop observing all engines.
+        """
+
+        for engine in self._engines:
+            event.remove(engine.sync_engine, "after_cursor_execute", self._on_execute)
+        self._engines.clear()
+
+    @property
+    def hit_ratio(self) -> float:
+        """
+        Share of cacheable executions served from the compiled cache, 0.0 if there were none.
+        """
+
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def snapshot(self) -> dict[str, float]:
+        """
+        Return the current counters, the hit ratio and the total number of compiled-cache entries.
+        """
+
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "uncached": self.uncached,
+            "hit_ratio": self.hit_ratio,
+            "size": sum(
+                len(cache)
+                for cache in (_compiled_cache(engine) for engine in self._engines)
+                if cache is not None
+            ),
+        }
+
+    def reset(self) -> None:
+        """
+        Reset the counters.
+        """
+
+        self.hits = 0
+        self.misses = 0
+        self.uncached = 0
+
+    def _on_execute(self, *args: Any) -> None:
+        # after_cursor_execute(conn, cursor, statement, parameters, context, executemany)
+        cache_hit = getattr(args[4], "cache_hit", None)
+        if cache_hit is CacheStats.CACHE_HIT:
+            self.hits += 1
+        elif cache_hit is CacheStats.CACHE_MISS:
+            self.misses += 1
+        else:
+            self.uncached += 1
+
+
+def _compiled_cache(engine: AsyncEngine) -> Any:
+    return engine.get_execution_options().get(
+        "compiled_cache",
+        engine.sync_engine._compiled_cache,  # type: ignore[reportPrivateUsage]
+    )
+
+
+def _ping(connection: Connection) -> None:
+    dbapi_connection = connection.connection.dbapi_connection
+    if dbapi_connection is not None:
+        connection.dialect.do_ping(dbapi_connection)
+
+
+async def ping_connections(engine: AsyncEngine, connections: int) -> None:
+    """
+    Check out `connections` pooled connections at the same time, ping each and return them to the pool.
+
+    :param engine: Engine whose pool is warmed up.
+    :param connections: Number of connections.
+    """
+
+    async with AsyncExitStack() as stack:
+        opened = await asyncio.gather(
+            *(stack.enter_async_context(engine.connect()) for _ in range(connections)),
+        )
+        await asyncio.gather(*(connection.run_sync(_ping) for connection in opened))
+
+
+def precompile(engine: AsyncEngine, statements: Iterable[WarmupStatement]) -> int:
+    """
+    Compile statements into the compiled cache of the engine, the same way execution does.
+
+    The dialect must be initialized, i.e. the engine must have connected at least once.
+
+    :param engine: Engine whose compiled cache is populated.
+    :param statements: Statements, optionally with example parameters.
+
+    :return: Number of statements that were not cached yet.
+    """
+
+    compiled_cache = _compiled_cache(engine)
+    if compiled_cache is None:
+        return 0
+
+    compiled = 0
+    for item in statements:
+        if isinstance(item, tuple):
+            statement, params = item
+            multiparams = [params] if isinstance(params, Mapping) else list(params)
+        else:
+            statement, multiparams = item, []
+        options = {
+            **engine.get_execution_options(),
+            **statement.get_execution_options(),
+        }
+        *_, cache_hit = cast(ClauseElement, statement)._compile_w_cache(  # type: ignore[reportPrivateUsage]
+            dialect=engine.dialect,
+            compiled_cache=compiled_cache,
+            column_keys=sorted(multiparams[0]) if multiparams else [],
+            for_executemany=len(multiparams) > 1,
+            schema_translate_map=options.get("schema_translate_map"),
+        )
+        if cache_hit is CacheStats.CACHE_MISS:
+            compiled += 1
+    return compiled
@@ -0,0 +1,400 @@
+import asyncio
+import logging
+import os
+import sys
+
+from collections.abc import Callable
+from contextlib import suppress
+from dataclasses import dataclass
+from time import monotonic
+from types import FrameType
+from typing import Any, Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import Session
+from typing_extensions import Literal
+
+# `Session.info` key (and `Connection.info` key while the session holds the connection)
+# of the `_SessionActivity` of a watched session.
+ACTIVITY_KEY = "sqlalchemy_tx_context_activity"
+
+ContextKind = Literal["session", "transaction", "savepoint", "flattened"]
+ReportKind = Literal["long_running", "idle_in_transaction"]
+
+_logger = logging.getLogger("sqlalchemy_tx_context")
+
+_PACKAGE_DIR = os.path.dirname(__file__)
+_SKIPPED_FILES = frozenset(
+    (os.path.normcase(os.path.join(os.path.dirname(os.__file__), "contextlib.py")),),
+)
+
+
+class OpenContext:
+    """
+    A `session()` or `transaction()` block that is currently open.
+
+    :ivar kind: `"session"`, `"transaction"` (outermost), `"savepoint"` or `"flattened"`
+        (nested block joined without a savepoint).
+    :ivar name: Label passed as `name=...`.
+    :ivar depth: Nesting depth within the session, 0 for the session block itself.
+    :ivar started: Clock reading when the block was entered.
+    :ivar call_site: `"file:line in function"` of the code that entered the block, if captured.
+    :ivar session: Session of the block.
+    """
+
+    __slots__ = (
+        "kind",
+        "name",
+        "depth",
+        "started",
+        "call_site",
+        "session",
+    )
+
+    kind: ContextKind
+    name: Optional[str]
+    depth: int
+    started: float
+    call_site: Optional[str]
+    session: AsyncSession
+
+    def __init__(
+        self,
+        kind: ContextKind,
+        name: Optional[str],
+        depth: int,
+        started: float,
+        call_site: Optional[str],
+        session: AsyncSession,
+    ) -> None:
+        self.kind = kind
+        self.name = name
+        self.depth = depth
+        self.started = started
+        self.call_site = call_site
+        self.session = session
+
+    def __repr__(self) -> str:
+        return (
+            f"<OpenContext kind={self.kind} name={self.name!r} depth={self.depth} "
+            f"call_site={self.call_site!r}>"
+        )
+
+
+@dataclass(frozen=True)
+class WatchdogReport:
+    """
+    A block found open for too long by `TransactionWatchdog.check()`.
+
+    :ivar kind: `"long_running"` if the block is open longer than `max_duration`,
+        `"idle_in_transaction"` if its session holds a transaction without running a statement for longer
+        than `max_idle`.
+    :ivar context: The block; for idle sessions, the innermost open block of the session.
+    :ivar elapsed: Time the block has been open, or the session has been idle, in seconds.
+    """
+
+    kind: ReportKind
+    context: OpenContext
+    elapsed: float
+
+
+class _SessionActivity:
+    __slots__ = ("stack", "last_activity", "executing", "reported_idle", "reported")
+
+    stack: list[OpenContext]
+    reported: set[OpenContext]
+    last_activity: float
+    executing: int
+    reported_idle: bool
+
+    def __init__(self, now: float) -> None:
+        self.stack = []
+        self.last_activity = now
+        self.executing = 0
+        self.reported_idle = False
+        self.reported = set()
+
+
+def log_report(report: WatchdogReport) -> None:
+    """
+    Default reporter logging a warning to the `sqlalchemy_tx_context` logger.
+
+    :param report: Report to log.
+    """
+
+    context = report.context
+    _logger.warning(
+        "%s: %s block %r at depth %d for %.3fs, opened at %s",
+        report.kind,
+        context.kind,
+        context.name,
+        context.depth,
+        report.elapsed,
+        context.call_site or "<unknown>",
+    )
+
+
+class TransactionWatchdog:
+    """
+    Tracks open `session()` / `transaction()` blocks and reports long-running blocks
+    and sessions idling inside a transaction.
+
+    Idle time is measured between statements on the connection held by the session,
+    including statements executed directly through the session.
+    Call `check()` on demand or `start()` a background task calling it every `interval` seconds.
+    Each block is reported as long-running once; a session is reported as idle once per idle period.
+    """
+
+    __slots__ = (
+        "max_duration",
+        "max_idle",
+        "interval",
+        "capture_call_site",
+        "_reporter",
+        "_clock",
+        "_activities",
+        "_engines",
+        "_task",
+    )
+
+    max_duration: Optional[float]
+    max_idle: Optional[float]
+    interval: float
+    capture_call_site: bool
+    _reporter: Callable[[WatchdogReport], Any]
+    _clock: Callable[[], float]
+    _activities: dict[int, _SessionActivity]
+    _engines: list[AsyncEngine]
+    _task: Optional["asyncio.Task[None]"]
+
+    def __init__(
+        self,
+        *,
+        max_duration: Optional[float] = 30.0,
+        max_idle: Optional[float] = 5.0,
+        interval: float = 1.0,
+        capture_call_site: bool = True,
+        reporter: Optional[Callable[[WatchdogReport], Any]] = None,
+        clock: Optional[Callable[[], float]] = None,
+    ) -> None:
+        """
+        :param max_duration: Blocks open longer than this many seconds are reported; None disables the check.
+        :param max_idle: Sessions holding a transaction without running a statement for longer than this
+            many seconds are reported; None disables the check.
+        :param interval: Seconds between checks of the background task started by `start()`.
+        :param capture_call_site: Whether to record the call site of every block. Costs a frame walk per block.
+        :param reporter: Callable receiving every `WatchdogReport`. Defaults to logging a warning.
+        :param clock: Monotonic clock returning seconds. Defaults to `time.monotonic`.
+
+        :raise ValueError: If `interval` is not positive.
+        """
+
+        if interval <= 0:
+            raise ValueError("interval must be positive")
+        self.max_duration = max_duration
+        self.max_idle = max_idle
+        self.interval = interval
+        self.capture_call_site = capture_call_site
+        self._reporter = reporter or log_report
+        self._clock = clock or monotonic
+        self._activities = {}
+        self._engines = []
+        self._task = None
+
+    def attach(self, engine: AsyncEngine) -> None:
+        """
+        Start observing statements executed on the engine.
+
+        :param engine: Engine to observe.
+        """
+
+        if not event.contains(Session, "after_begin", _on_after_begin):
+            event.listen(Session, "after_begin", _on_after_begin)
+        if engine in self._engines:
+            return
+        sync_engine = engine.sync_engine
+        event.listen(sync_engine, "before_cursor_execute", self._on_before_execute)
+        event.listen(sync_engine, "after_cursor_execute", self._on_after_execute)
+        event.listen(sync_engine, "handle_error", self._on_error)
+        self._engines.append(engine)
+
+    def detach(self) -> None:
+        """
+        Stop observing all engines.
+        """
+
+        for engine in self._engines:
+            sync_engine = engine.sync_engine
+            event.remove(sync_engine, "before_cursor_execute", self._on_before_execute)
+            event.remove(sync_engine, "after_cursor_execute", self._on_after_execute)
+            event.remove(sync_engine, "handle_error", self._on_error)
+        self._engines.clear()
+
+    def open_contexts(self) -> list[OpenContext]:
+        """
+        Return all open blocks, oldest first.
+        """
+
+        return sorted(
+            (
+                context
+                for activity in self._activities.values()
+                for context in activity.stack
+            ),
+            key=lambda context: context.started,
+        )
+
+    def check(self) -> list[WatchdogReport]:
+        """
+        Find long-running blocks and idle sessions not reported yet and pass them to the reporter.
+
+        :return: New reports.
+        """
+
+        now = self._clock()
+        reports: list[WatchdogReport] = []
+        for activity in list(self._activities.values()):
+            if not activity.stack:
+                continue
+            if self.max_duration is not None:
+                for context in activity.stack:
+                    elapsed = now - context.started
+                    if context not in activity.reported and elapsed > self.max_duration:
+                        activity.reported.add(context)
+                        reports.append(WatchdogReport("long_running", context, elapsed))
+            if (
+                self.max_idle is not None
+                and not activity.reported_idle
+                and not activity.executing
+                and activity.stack[0].session.in_transaction()
+            ):
+                idle = now - activity.last_activity
+                if idle > self.max_idle:
+                    activity.reported_idle = True
+                    reports.append(
+                        WatchdogReport("idle_in_transaction", activity.stack[-1], idle),
+                    )
+        for report in reports:
+            self._reporter(report)
+        return reports
+
+    def start(self) -> None:
+        """
+        Start the background task calling `check()` every `interval` seconds.
+
+        Must be called with a running event loop. Does nothing if the task is already running.
+        """
+
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        Stop the background task.
+        """
+
+        task, self._task = self._task, None
+        if task is None:
+            return
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+
+    def track(
+        self,
+        kind: ContextKind,
+        session: AsyncSession,
+        name: Optional[str],
+    ) -> OpenContext:
+        """
+        Register an entered block. Called by the context managers.
+
+        :param kind: Block kind.
+        :param session: Session of the block.
+        :param name: Block label.
+        """
+
+        now = self._clock()
+        activity: Optional[_SessionActivity] = session.info.get(ACTIVITY_KEY)
+        if activity is None:
+            activity = session.info[ACTIVITY_KEY] = _SessionActivity(now)
+            self._activities[id(session)] = activity
+        context = OpenContext(
+            kind,
+            name,
+            len(activity.stack),
+            now,
+            _call_site() if self.capture_call_site else None,
+            session,
+        )
+        activity.stack.append(context)
+        if kind == "transaction":
+            activity.last_activity = now
+            activity.reported_idle = False
+        return context
+
+    def untrack(self, context: OpenContext) -> None:
+        """
+        Unregister a block that has been left. Called by the context managers.
+
+        :param context: Block returned by `track(...)`.
+        """
+
+        activity: Optional[_SessionActivity] = context.session.info.get(ACTIVITY_KEY)
+        if activity is None:
+            return
+        if context in activity.stack:
+            activity.stack.remove(context)
+        activity.reported.discard(context)
+        if not activity.stack:
+            self._activities.pop(id(context.session), None)
+            context.session.info.pop(ACTIVITY_KEY, None)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            self.check()
+
+    def _on_before_execute(self, conn: Any, *_args: Any) -> None:
+        activity: Optional[_SessionActivity] = conn.info.get(ACTIVITY_KEY)
+        if activity is not None:
+            activity.executing += 1
+            activity.last_activity = self._clock()
+            activity.reported_idle = False
+
+    def _on_after_execute(self, conn: Any, *_args: Any) -> None:
+        activity: Optional[_SessionActivity] = conn.info.get(ACTIVITY_KEY)
+        if activity is not None and activity.executing:
+            activity.executing -= 1
+            activity.last_activity = self._clock()
+
+    def _on_error(self, exception_context: Any) -> None:
+        connection = exception_context.connection
+        if connection is not None and exception_context.cursor is not None:
+            self._on_after_execute(connection)
+
+
+def _on_after_begin(
+    session: Session,
+    transaction: Any,  # noqa: ARG001
+    connection: Any,
+) -> None:
+    activity = session.info.get(ACTIVITY_KEY)
+    if activity is not None:
+        connection.info[ACTIVITY_KEY] = activity
+    else:
+        connection.info.pop(ACTIVITY_KEY, None)
+
+
+def _call_site() -> Optional[str]:
+    frame: Optional[FrameType] = sys._getframe(1)  # type: ignore[reportPrivateUsage]
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if (
+            os.path.dirname(filename) != _PACKAGE_DIR
+            and os.path.normcase(filename) not in _SKIPPED_FILES
+        ):
+            return f"{filename}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return None
@@ -1,16 +1,67 @@
 import asyncio
 import sys
+import time
 
-from collections.abc import Sequence
+from collections.abc import Awaitable, Callable, Sequence
 from typing import Any, Optional, cast
+from unittest.mock import patch
 
 import pytest
 
-from sqlalchemy import CursorResult, Row, Table, delete, insert, select, update
-from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy import (
+    CursorResult,
+    MetaData,
+    Row,
+    Table,
+    bindparam,
+    delete,
+    event,
+    func,
+    insert,
+    select,
+    update,
+)
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlalchemy.ext.asyncio import (
+    AsyncConnection,
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.orm import Session
 
-from sqlalchemy_tx_context import SQLAlchemyTransactionContext
-from sqlalchemy_tx_context.exceptions import NoSessionError
+from sqlalchemy_tx_context import (
+    AdmissionController,
+    ContextEvent,
+    ContextEventKind,
+    ContextListener,
+    InMemoryResultCache,
+    LatencyAggregator,
+    NPlusOneDetector,
+    NPlusOneReport,
+    Priority,
+    RetryPolicy,
+    SlowQueryProfiler,
+    SQLAlchemyTransactionContext,
+    TransactionOptions,
+    TransactionWatchdog,
+    WatchdogReport,
+    WeightedPolicy,
+)
+from sqlalchemy_tx_context.deadline import DEADLINE_KEY
+from sqlalchemy_tx_context.exceptions import (
+    ConnectionActiveError,
+    DeadlineExceededError,
+    NoSessionError,
+    NoTransactionError,
+    NPlusOneQueryError,
+    SessionAlreadyActiveError,
+    ShardMismatchError,
+    TransactionAlreadyActiveError,
+    TransactionRollbackOnlyError,
+)
 from tests.integration.fixtures.models import ExampleModel
 from tests.integration.types import ExampleTupleType
 
@@ -188,3 +239,1338 @@ async def test_execute_typing(sqlite_engine: AsyncEngine) -> None:
         typed_rows = update_result.all()
 
         assert_type(typed_rows, Sequence[Row[tuple[int, str]]])
+
+
+async def test_replica_routing(
+    sqlite_engine: AsyncEngine,
+    metadata: MetaData,
+    example_table: Table,
+) -> None:
+    replica_engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with replica_engine.begin() as conn:
+        await conn.run_sync(metadata.create_all)
+        await conn.execute(insert(example_table).values(value="replica"))
+
+    db = SQLAlchemyTransactionContext(
+        sqlite_engine,
+        auto_context_on_execute=True,
+        replica_engines=[replica_engine],
+    )
+
+    try:
+        await db.execute(insert(example_table).values(value="primary"))
+
+        result = await db.execute(select(example_table.c.value))
+        assert result.scalars().all() == ["replica"]
+
+        async with db.session(read_only=True):
+            result = await db.execute(select(example_table.c.value))
+            assert result.scalars().all() == ["replica"]
+
+        async with db.transaction():
+            result = await db.execute(select(example_table.c.value))
+            assert result.scalars().all() == ["primary"]
+
+        async with db.session(read_only=True) as replica_session:
+            async with db.transaction() as session:
+                assert session is not replica_session
+                await db.execute(insert(example_table).values(value="write"))
+            assert db.get_session() is replica_session
+            result = await db.execute(select(example_table.c.value))
+            assert result.scalars().all() == ["replica"]
+
+        async with db.transaction():
+            result = await db.execute(select(example_table.c.value))
+            assert result.scalars().all() == ["primary", "write"]
+
+        with pytest.raises(ValueError):
+            SQLAlchemyTransactionContext(
+                sqlite_engine,
+                replica_engines=[replica_engine],
+                replica_policy=WeightedPolicy([1, 1]),
+            )
+    finally:
+        await replica_engine.dispose()
+
+
+class RecordingListener(ContextListener):
+    def __init__(self) -> None:
+        self.events: list[ContextEvent] = []
+
+    def on_event(self, event: ContextEvent) -> None:
+        self.events.append(event)
+
+
+async def test_listener_events(
+    sqlite_engine: AsyncEngine,
+    example_table: Table,
+) -> None:
+    listener = RecordingListener()
+    db = SQLAlchemyTransactionContext(
+        sqlite_engine,
+        auto_context_on_execute=True,
+        listeners=[listener],
+    )
+
+    async with db.transaction(name="checkout"):
+        await db.execute(insert(example_table).values(value="outer"))
+        with pytest.raises(RuntimeError):
+            async with db.transaction():
+                raise RuntimeError("rollback savepoint")
+
+    assert [
+        (event.kind, event.depth, event.label, event.auto_context)
+        for event in listener.events
+    ] == [
+        (ContextEventKind.SESSION_OPEN, 1, "checkout", False),
+        (ContextEventKind.TRANSACTION_BEGIN, 1, "checkout", False),
+        (ContextEventKind.EXECUTE, 1, "checkout", False),
+        (ContextEventKind.SAVEPOINT_BEGIN, 2, "checkout", False),
+        (ContextEventKind.SAVEPOINT_ROLLBACK, 2, "checkout", False),
+        (ContextEventKind.TRANSACTION_COMMIT, 1, "checkout", False),
+        (ContextEventKind.SESSION_CLOSE, 1, "checkout", False),
+    ]
+    assert all(event.duration >= 0 for event in listener.events)
+    assert listener.events[-1].elapsed is not None
+
+    listener.events.clear()
+    await db.execute(select(example_table.c.id))
+
+    assert [(event.kind, event.auto_context) for event in listener.events] == [
+        (ContextEventKind.SESSION_OPEN, True),
+        (ContextEventKind.EXECUTE, True),
+        (ContextEventKind.SESSION_CLOSE, True),
+    ]
+
+    aggregator = LatencyAggregator()
+    db.remove_listener(listener)
+    db.add_listener(aggregator)
+
+    async with db.new_transaction(name="report"):
+        await db.execute(select(example_table.c.id))
+
+    execute_histogram = aggregator.histogram(ContextEventKind.EXECUTE, "report")
+    assert execute_histogram is not None
+    assert execute_histogram.count == 1
+
+
+async def test_listener_events_time_checkout_in_begin(
+    sqlite_engine: AsyncEngine,
+    example_table: Table,
+) -> None:
+    listener = RecordingListener()
+    db = SQLAlchemyTransactionContext(sqlite_engine, listeners=[listener])
+
+    def slow_checkout(*_args: Any) -> None:
+        time.sleep(0.05)
+
+    event.listen(sqlite_engine.sync_engine, "checkout", slow_checkout)
+    try:
+        async with db.transaction():
+            await db.execute(select(example_table.c.id))
+    finally:
+        event.remove(sqlite_engine.sync_engine, "checkout", slow_checkout)
+
+    durations = {event.kind: event.duration for event in listener.events}
+    assert durations[ContextEventKind.TRANSACTION_BEGIN] >= 0.05
+    assert durations[ContextEventKind.EXECUTE] < 0.05
+
+
+async def test_execute_many(
+    sqlite_engine: AsyncEngine,
+    example_table: Table,
+) -> None:
+    listener = RecordingListener()
+    db = SQLAlchemyTransactionContext(
+        sqlite_engine,
+        auto_context_on_execute=True,
+        listeners=[listener],
+    )
+
+    count = await db.execute_many(
+        insert(example_table),
+        ({"value": f"value {index}"} for index in range(25)),
+        chunk_size=10,
+    )
+
+    assert count == 25
+    assert [event.kind for event in listener.events].count(
+        ContextEventKind.EXECUTE,
+    ) == 3
+    assert [event.kind for event in listener.events].count(
+        ContextEventKind.TRANSACTION_COMMIT,
+    ) == 1
+
+    assert await db.execute_many(insert(example_table), [], chunk_size=10) == 0
+
+
+async def test_execute_many_transaction_per_chunk(
+    sqlite_engine: AsyncEngine,
+    example_table: Table,
+) -> None:
+    db = SQLAlchemyTransactionContext(sqlite_engine, auto_context_on_execute=True)
+
+    rows = [{"id": index, "value": "value"} for index in (1, 2, 3, 4, 4)]
+
+    with pytest.raises(IntegrityError):
+        await db.execute_many(
+            insert(example_table),
+            rows,
+            chunk_size=2,
+            transaction_per_chunk=True,
+        )
+
+    result = await db.execute(select(example_table.c.id).order_by(example_table.c.id))
+    assert result.scalars().all() == [1, 2, 3, 4]
+
+    with pytest.raises(NoSessionError):
+        await SQLAlchemyTransactionContext(sqlite_engine).execute_many(
+            insert(example_table),
+            rows,
+        )
+
+
+async def test_stream(
+    sqlite_engine: AsyncEngine,
+    example_table: Table,
+) -> None:
+    closed_sessions: list[AsyncSession] = []
+
+    class TrackingSession(AsyncSession):
+        async def close(self) -> None:
+            closed_sessions.append(self)
+            await super().close()
+
+    db = SQLAlchemyTransactionContext(
+        sqlite_engine,
+        default_session_maker=async_sessionmaker(
+            sqlite_engine,
+            class_=TrackingSession,
+        ),
+        auto_context_on_execute=True,
+    )
+    await db.execute_many(
+        insert(example_table),
+        [{"value": f"value {index}"} for index in range(10)],
+    )
+    closed_sessions.clear()
+
+    rows = db.stream(select(example_table.c.value), yield_per=3)
+    values = [row.value async for row in rows]
+    assert len(values) == 10
+    assert rows.closed
+    assert len(closed_sessions) == 1
+
+    async with db.stream_scalars(select(example_table.c.id), yield_per=3) as ids:
+        async for _ in ids:
+            assert db.get_session(strict=False) is None
+            break
+        assert len(closed_sessions) == 1
+    assert ids.closed
+    assert len(closed_sessions) == 2
+
+    async with db.session() as session:
+        ids = db.stream_scalars(select(example_table.c.id))
+        assert sorted([value async for value in ids]) == list(range(1, 11))
+        assert db.get_session() is session
+    assert len(closed_sessions) == 3
+
+    with pytest.raises(NoSessionError):
+        async for _ in SQLAlchemyTransactionContext(sqlite_engine).stream(
+            select(example_table.c.id),
+        ):
+            pass
+
+
+async def test_run_in_transaction_retry(
+    sqlite_engine: AsyncEngine,
+    example_table: Table,
+) -> None:
+    db = SQLAlchemyTransactionContext(
+        sqlite_engine,
+        retry_policy=RetryPolicy(retries=2, backoff=0),
+    )
+    attempts: list[int] = []
+
+    async def insert_value(value: str) -> int:
+        attempts.append(len(attempts))
+        await db.execute(insert(example_table).values(value=value))
+        if len(attempts) < 3:
+            raise OperationalError("INSERT", {}, Exception("database is locked"))
+        return len(attempts)
+
+    assert await db.run_in_transaction(insert_value, "value") == 3
+
+    async with db.session():
+        result = await db.execute(select(example_table.c.value))
+        assert result.scalars().all() == ["value"]
+
+    attempts.clear()
+    with pytest.raises(OperationalError):
+        await db.run_in_transaction(
+            insert_value,
+            "failed",
+            retry=RetryPolicy(retries=1, backoff=0),
+        )
+    assert len(attempts) == 2
+
+    @db.transactional(retry=RetryPolicy(backoff=0))
+    async def insert_values(name: str) -> None:
+        await insert_value(name)
+
+    attempts.clear()
+    await insert_values(name="decorated")
+    assert len(attempts) == 3
+
+    attempts.clear()
+    with pytest.raises(OperationalError):
+        async with db.transaction():
+            await insert_values(name="nested")
+    assert len(attempts) == 1
+
+
+async def test_run_in_transaction_does_not_retry_after_commit(
+    sqlite_engine: AsyncEngine,
+    example_table: Table,
+) -> None:
+    db = SQLAlchemyTransactionContext(
+        sqlite_engine,
+        retry_policy=RetryPolicy(retries=2, backoff=0),
+    )
+    attempts: list[int] = []
+
+    def fail() -> None:
+        raise OperationalError("COMMIT", {}, Exception("database is locked"))
+
+    async def insert_value() -> None:
+        attempts.append(len(attempts))
+        await db.execute(insert(example_table).values(value="committed"))
+        db.on_commit(fail)
+
+    with pytest.raises(OperationalError):
+        await db.run_in_transaction(insert_value)
+    assert len(attempts) == 1
+
+    async with db.session():
+        result = await db.execute(select(example_table.c.value))
+        assert result.scalars().all() == ["committed"]
+
+
+async def test_auto_context_coalesce_reads(
+    sqlite_engine: AsyncEngine,
+    example_table: Table,
+) -> None:
+    opened_sessions: list[AsyncSession] = []
+    closed_sessions: list[AsyncSession] = []
+
+    class TrackingSession(AsyncSession):
+        def __init__(self, *args: Any, **kwargs: Any) -> None:
+            super().__init__(*args, **kwargs)
+            opened_sessions.append(self)
+
+        async def close(self) -> None:
+            closed_sessions.append(self)
+            await super().close()
+
+    db = SQLAlchemyTransactionContext(
+        sqlite_engine,
+        default_session_maker=async_sessionmaker(
+            sqlite_engine,
+            class_=TrackingSession,
+        ),
+        auto_context_on_execute=True,
+        auto_context_coalesce_reads=True,
+        auto_context_coalesce_idle_timeout=0.05,
+    )
+
+    async def read_many() -> None:
+        for _ in range(5):
+            await db.execute(select(example_table.c.id))
+        assert db.get_session(strict=False) is None
+
+    await asyncio.create_task(read_many())
+    await asyncio.sleep(0)
+    await db.close_coalesced_sessions()
+    assert len(opened_sessions) == 1
+    assert len(closed_sessions) == 1
+
+    await asyncio.gather(read_many(), read_many())
+    assert len(opened_sessions) == 3
+
+    await db.execute(insert(example_table).values(value="value"))
+    assert len(opened_sessions) == 4
+
+    await db.execute(select(example_table.c.id))
+    assert len(opened_sessions) == 5
+
+    await asyncio.sleep(0.15)
+    assert len(closed_sessions) == 5
+
+    isolation_levels: list[Optional[str]] = []
+
+    def on_execute(conn: Any, *_args: Any) -> None:
+        isolation_levels.append(conn.get_execution_options().get("isolation_level"))
+
+    event.listen(sqlite_engine.sync_engine, "before_cursor_execute", on_execute)
+    try:
+        await asyncio.create_task(read_many())
+    finally:
+        event.remove(sqlite_engine.sync_engine, "before_cursor_execute", on_execute)
+    await db.close_coalesced_sessions()
+    # Coalesced sessions do not keep a transaction open between reads.
+    assert isolation_levels == ["AUTOCOMMIT"] * 5
+
+
+async def test_auto_context_coalesce_reads_detach_objects(
+    sqlite_engine: AsyncEngine,
+    example_table: Table,
+) -> None:
+    db = SQLAlchemyTransactionContext(
+        sqlite_engine,
+        auto_context_on_execute=True,
+        auto_context_coalesce_reads=True,
+    )
+    await db.execute(insert(example_table).values(id=1, value="a"))
+
+    async def read_and_modify() -> None:
+        model = (await db.execute(select(ExampleModel))).scalar_one()
+        model.value = "local-only"
+        result = await db.execute(select(example_table.c.value))
+        assert result.scalar_one() == "a"
+
+    async def read_after_update() -> None:
+        model = (await db.execute(select(ExampleModel))).scalar_one()
+        await db.execute(update(example_table).values(value="b"))
+        fresh = (await db.execute(select(ExampleModel))).scalar_one()
+        assert fresh is not model
+        assert fresh.value == "b"
+
+    await asyncio.create_task(read_and_modify())
+    await asyncio.create_task(read_after_update())
+    await db.close_coalesced_sessions()
+    assert (await db.execute(select(example_table.c.value))).scalar_one() == "b"
+
+
+async def test_loader(
+    sqlite_engine: AsyncEngine,
+    example_table: Table,
+) -> None:
+    db = SQLAlchemyTransactionContext(sqlite_engine, auto_context_on_execute=True)
+    await db.execute(
+        insert(example_table),
+        [{"id": 1, "value": "first"}, {"id": 2, "value": "second"}],
+    )
+
+    statements: list[str] = []
+
+    def record(*args: Any) -> None:
+        statements.append(args[2])
+
+    event.listen(sqlite_engine.sync_engine, "before_cursor_execute", record)
+
+    async with db.session():
+        loader = db.loader(ExampleModel)
+        first, second, duplicate, missing = await asyncio.gather(
+            loader.load(1),
+            db.loader(ExampleModel).load(2),
+            loader.load(2),
+            loader.load(3),
+        )
+    assert first is not None and first.value == "first"
+    assert second is not None and second.value == "second"
+    assert duplicate is second
+    assert missing is None
+    assert len(statements) == 1
+
+    statements.clear()
+    models = await db.loader(ExampleModel, max_batch_size=2).load_many([2, 1, 3])
+    assert [model and model.id for model in models] == [2, 1, None]
+    assert len(statements) == 2
+
+
+async def test_result_cache(
+    sqlite_engine: AsyncEngine,
+    example_table: Table,
+) -> None:
+    cache = InMemoryResultCache()
+    db = SQLAlchemyTransactionContext(
+        sqlite_engine,
+        auto_context_on_execute=True,
+        result_cache=cache,
+    )
+    await db.execute(insert(example_table).values(id=1, value="first"))
+
+    statements: list[str] = []
+
+    def record(*args: Any) -> None:
+        statements.append(args[2])
+
+    event.listen(sqlite_engine.sync_engine, "before_cursor_execute", record)
+
+    query = select(example_table.c.value).execution_options(result_cache=True)
+    assert (await db.execute(query)).scalars().all() == ["first"]
+    assert (await db.execute(query)).scalars().all() == ["first"]
+    assert len(statements) == 1
+
+    async with db.session():
+        model = (
+            await db.execute(
+                select(ExampleModel)
+                .where(ExampleModel.id == 1)
+                .execution_options(result_cache=True),
+            )
+        ).scalar_one()
+        cached_model = (
+            await db.execute(
+                select(ExampleModel)
+                .where(ExampleModel.id == 1)
+                .execution_options(result_cache=True),
+            )
+        ).scalar_one()
+    assert cached_model is model
+    assert len(statements) == 2
+
+    with pytest.raises(RuntimeError):
+        async with db.transaction():
+            await db.execute(update(example_table).values(value="rolled back"))
+            raise RuntimeError()
+    assert (await db.execute(query)).scalars().all() == ["first"]
+    assert len(statements) == 3
+
+    async with db.transaction():
+        async with db.transaction():
+            await db.execute(update(example_table).values(value="second"))
+        assert (await db.execute(query)).scalars().all() == ["second"]
+        assert len(statements) == 7
+        assert len(cache) == 2
+    assert len(cache) == 0
+
+    assert (await db.execute(query)).scalars().all() == ["second"]
+
+    async with db.transaction():
+        db.get_session().add(ExampleModel(id=2, value="third"))
+    assert (await db.execute(query)).scalars().all() == ["second", "third"]
+
+
+async def test_result_cache_without_session(
+    sqlite_engine: AsyncEngine,
+    example_table: Table,
+) -> None:
+    cache = InMemoryResultCache()
+    db = SQLAlchemyTransactionContext(
+        sqlite_engine,
+        auto_context_on_execute=True,
+        result_cache=cache,
+    )
+    await db.execute(insert(example_table).values(id=1, value="first"))
+    query = select(ExampleModel).execution_options(result_cache=True)
+
+    first = (await db.execute(query)).scalar_one()
+    first.value = "changed"
+    second = (await db.execute(query)).scalar_one()
+    assert second is not first
+    assert second.value == "first"
+    assert len(cache) == 1
+
+    strict = SQLAlchemyTransactionContext(sqlite_engine, result_cache=cache)
+    with pytest.raises(NoSessionError):
+        await strict.execute(query)
+
+
+async def test_warmup(
+    sqlite_engine: AsyncEngine,
+    example_table: Table,
+) -> None:
+    db = SQLAlchemyTransactionContext(sqlite_engine, auto_context_on_execute=True)
+
+    compiled = await db.warmup(
+        statements=[
+            select(ExampleModel).where(ExampleModel.id == 1),
+            (insert(example_table), {"id": 1, "value": "value"}),
+        ],
+        connections=2,
+    )
+    assert compiled == 2
+    assert await db.warmup(statements=[select(ExampleModel)]) == 1
+
+    stats = db.compiled_cache_stats
+    await db.execute(insert(example_table), {"id": 2, "value": "value"})
+    await db.execute(select(ExampleModel).where(ExampleModel.id == 2))
+    await db.execute(select(example_table.c.value))
+    assert (stats.hits, stats.misses) == (2, 1)
+    assert stats.snapshot()["hit_ratio"] == 2 / 3
+
+    stats.reset()
+    assert stats.snapshot()["hits"] == 0
+
+    with pytest.raises(ValueError):
+        await db.warmup(connections=0)
+
+
+async def test_savepoint_modes(
+    sqlite_engine: AsyncEngine,
+    example_table: Table,
+) -> None:
+    db = SQLAlchemyTransactionContext(sqlite_engine, savepoint="on_error_handling")
+
+    statements: list[str] = []
+
+    def record(*args: Any) -> None:
+        statements.append(args[2])
+
+    event.listen(sqlite_engine.sync_engine, "before_cursor_execute", record)
+
+    async with db.transaction():
+        async with db.transaction():
+            await db.execute(insert(example_table).values(value="flattened"))
+        async with db.transaction(savepoint="always"):
+            await db.execute(insert(example_table).values(value="savepoint"))
+    assert [statement.split()[0] for statement in statements] == [
+        "INSERT",
+        "SAVEPOINT",
+        "INSERT",
+        "RELEASE",
+    ]
+
+    with pytest.raises(TransactionRollbackOnlyError):
+        async with db.transaction():
+            await db.execute(insert(example_table).values(value="rolled back"))
+            with pytest.raises(RuntimeError):
+                async with db.transaction():
+                    raise RuntimeError()
+
+    async with db.transaction():
+        await db.execute(insert(example_table).values(value="committed"))
+        with pytest.raises(RuntimeError):
+            async with db.transaction(savepoint="never"):
+                raise RuntimeError()
+
+    async with db.session():
+        values = (await db.execute(select(example_table.c.value))).scalars().all()
+    assert values == ["flattened", "savepoint", "committed"]
+
+
+async def test_transaction_callbacks(
+    sqlite_engine: AsyncEngine,
+    example_table: Table,
+) -> None:
+    db = SQLAlchemyTransactionContext(sqlite_engine, callback_concurrency=2)
+    calls: list[str] = []
+
+    def callback(name: str) -> Callable[[], Awaitable[None]]:
+        async def run() -> None:
+            assert db.get_session(strict=False) is None
+            calls.append(name)
+
+        return run
+
+    async with db.transaction():
+        await db.execute(insert(example_table).values(value="value"))
+        db.on_commit(callback("commit"))
+        db.on_rollback(callback("rollback"))
+        with pytest.raises(RuntimeError):
+            async with db.transaction():
+                db.on_commit(callback("savepoint commit"))
+                db.on_rollback(callback("savepoint rollback"))
+                raise RuntimeError()
+        async with db.transaction():
+            db.on_commit(lambda: calls.append("released savepoint commit"))
+        assert calls == []
+    assert sorted(calls) == [
+        "commit",
+        "released savepoint commit",
+        "savepoint rollback",
+    ]
+
+    calls.clear()
+    with pytest.raises(RuntimeError):
+        async with db.transaction():
+            db.on_commit(callback("commit"))
+            db.on_rollback(callback("rollback"))
+            raise RuntimeError()
+    assert calls == ["rollback"]
+
+    with pytest.raises(NoTransactionError):
+        async with db.session():
+            db.on_commit(callback("commit"))
+    with pytest.raises(NoSessionError):
+        db.on_commit(callback("commit"))
+
+
+async def test_transaction_options(
+    sqlite_engine: AsyncEngine,
+    example_table: Table,
+) -> None:
+    db = SQLAlchemyTransactionContext(sqlite_engine)
+
+    statements: list[str] = []
+
+    def record(*args: Any) -> None:
+        statements.append(args[2])
+
+    event.listen(sqlite_engine.sync_engine, "before_cursor_execute", record)
+
+    async with db.transaction(
+        read_only=True,
+        isolation_level="READ UNCOMMITTED",
+    ) as session:
+        applied = db.get_transaction_options()
+        assert applied is not None
+        assert applied.options == TransactionOptions(
+            read_only=True,
+            isolation_level="READ UNCOMMITTED",
+        )
+        assert applied.execution_options == {"isolation_level": "READ UNCOMMITTED"}
+        assert applied.statements == ()
+        connection = await session.connection()
+        assert await connection.get_isolation_level() == "READ UNCOMMITTED"
+
+        async with db.transaction():
+            await db.execute(select(example_table.c.id))
+    assert not any(statement.startswith("SAVEPOINT") for statement in statements)
+
+    async with db.transaction():
+        assert db.get_transaction_options() is None
+        async with db.transaction(read_only=True):
+            await db.execute(select(example_table.c.id))
+        async with db.transaction():
+            await db.execute(select(example_table.c.id))
+    assert len([s for s in statements if s.startswith("SAVEPOINT")]) == 1
+
+
+async def test_admission_control(
+    sqlite_engine: AsyncEngine,
+    example_table: Table,
+) -> None:
+    aggregator = LatencyAggregator()
+    admission = AdmissionController(1)
+    db = SQLAlchemyTransactionContext(
+        sqlite_engine,
+        auto_context_on_execute=True,
+        admission_control=admission,
+        listeners=[aggregator],
+    )
+    running = 0
+    peak = 0
+
+    async def work(priority: int) -> None:
+        nonlocal running, peak
+        async with db.transaction(priority=priority):
+            running += 1
+            peak = max(peak, running)
+            await db.execute(insert(example_table).values(value="value"))
+            await asyncio.sleep(0.01)
+            running -= 1
+
+    await asyncio.gather(
+        work(Priority.BACKGROUND),
+        work(Priority.INTERACTIVE),
+        db.execute(select(example_table.c.id)),
+    )
+    async with db.stream(select(example_table.c.id)) as rows:
+        assert len([row async for row in rows]) == 2
+
+    assert peak == 1
+    assert admission.in_use == 0
+    assert admission.admitted == 4
+    wait_histogram = aggregator.histogram(ContextEventKind.ADMISSION_WAIT)
+    assert wait_histogram is not None
+    assert wait_histogram.count == 3
+
+
+async def test_watchdog(
+    sqlite_engine: AsyncEngine,
+    example_table: Table,
+) -> None:
+    now = 0.0
+    reports: list[WatchdogReport] = []
+    watchdog = TransactionWatchdog(
+        max_duration=10.0,
+        max_idle=2.0,
+        reporter=reports.append,
+        clock=lambda: now,
+    )
+    db = SQLAlchemyTransactionContext(sqlite_engine, watchdog=watchdog)
+
+    async with db.session(name="outer"), db.transaction(name="tx"):
+        assert [
+            (context.kind, context.name, context.depth)
+            for context in watchdog.open_contexts()
+        ] == [("session", "outer", 0), ("transaction", "tx", 1)]
+        call_site = watchdog.open_contexts()[1].call_site
+        assert call_site is not None
+        assert call_site.startswith(__file__)
+        assert "test_watchdog" in call_site
+
+        now = 1.5
+        await db.execute(insert(example_table).values(value="value"))
+        now = 3.0
+        assert watchdog.check() == []
+
+        now = 4.0
+        (idle,) = watchdog.check()
+        assert (idle.kind, idle.context.name, idle.elapsed) == (
+            "idle_in_transaction",
+            "tx",
+            2.5,
+        )
+
+        async with db.transaction(name="savepoint"):
+            now = 11.0
+            reports.clear()
+            assert sorted(
+                (report.kind, report.context.kind) for report in watchdog.check()
+            ) == [("long_running", "session"), ("long_running", "transaction")]
+            assert watchdog.check() == []
+
+    assert watchdog.open_contexts() == []
+    assert len(reports) == 2
+    watchdog.detach()
+
+
+async def test_sharding(
+    sqlite_engine: AsyncEngine,
+    metadata: MetaData,
+    example_table: Table,
+) -> None:
+    shard_engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with shard_engine.begin() as conn:
+        await conn.run_sync(metadata.create_all)
+
+    db = SQLAlchemyTransactionContext(
+        sqlite_engine,
+        shards={"a": sqlite_engine, "b": shard_engine},
+        shard_resolver=lambda key: "a" if key < 100 else "b",
+    )
+
+    try:
+        async with db.transaction(shard_key=1):
+            assert db.get_shard_id() == "a"
+            await db.execute(insert(example_table).values(value="a"))
+            async with db.transaction(shard_key=2):
+                await db.execute(insert(example_table).values(value="a2"))
+            with pytest.raises(ShardMismatchError):
+                async with db.transaction(shard_key=100):
+                    pass
+
+        async with db.transaction(shard_key=100):
+            assert db.get_shard_id() == "b"
+            await db.execute(insert(example_table).values(value="b"))
+
+        async with db.session(shard_key=101):
+            result = await db.execute(select(example_table.c.value))
+            assert result.scalars().all() == ["b"]
+
+        result = await db.execute_on_all_shards(
+            select(example_table.c.value).order_by(example_table.c.id),
+        )
+        assert result.scalars().all() == ["a", "a2", "b"]
+
+        result = await db.execute_on_all_shards(
+            update(example_table).values(value="updated"),
+        )
+        assert cast(CursorResult[Any], result).rowcount == 3
+        assert db.get_shard_id() is None
+
+        with pytest.raises(ValueError, match="session_maker"):
+            db.session(shard_key=1, session_maker=async_sessionmaker(shard_engine))
+    finally:
+        await shard_engine.dispose()
+
+
+async def test_run_sync(sqlite_engine: AsyncEngine) -> None:
+    db = SQLAlchemyTransactionContext(sqlite_engine, auto_context_on_execute=True)
+
+    def add(session: Session, values: list[str]) -> int:
+        session.add_all(ExampleModel(value=value) for value in values)
+        session.flush()
+        return len(values)
+
+    def rename(session: Session, suffix: str) -> list[str]:
+        models = session.scalars(select(ExampleModel).order_by(ExampleModel.id)).all()
+        for model in models:
+            model.value += suffix
+        return [model.value for model in models]
+
+    assert await db.run_sync(add, ["a", "b"]) == 2
+
+    async with db.transaction():
+        assert await db.run_sync(rename, suffix="!") == ["a!", "b!"]
+
+    result = await db.execute(select(ExampleModel.value).order_by(ExampleModel.id))
+    assert result.scalars().all() == ["a!", "b!"]
+
+    db = SQLAlchemyTransactionContext(sqlite_engine)
+    with pytest.raises(NoSessionError):
+        await db.run_sync(rename, "?")
+
+
+async def test_iterate_chunks(
+    sqlite_engine: AsyncEngine,
+    example_table: Table,
+) -> None:
+    db = SQLAlchemyTransactionContext(sqlite_engine, auto_context_on_execute=True)
+    await db.execute_many(
+        insert(example_table),
+        [{"value": str(index)} for index in range(7)],
+    )
+    statement = select(ExampleModel).order_by(ExampleModel.value.desc())
+
+    chunk_sizes: list[int] = []
+    sessions: set[AsyncSession] = set()
+    async with db.iterate_chunks(
+        statement,
+        key=ExampleModel.id,
+        chunk_size=3,
+        transaction_per_chunk=True,
+    ) as chunks:
+        async for chunk in chunks:
+            chunk_sizes.append(len(chunk))
+            session = db.get_session()
+            sessions.add(session)
+            for (model,) in chunk:
+                model.value = f"v{model.value}"
+            assert len(session.identity_map) == len(chunk)
+    assert chunk_sizes == [3, 3, 1]
+    assert len(sessions) == 3
+    assert db.get_session(strict=False) is None
+
+    async with db.session() as session:
+        seen: list[int] = []
+        async for chunk in db.iterate_chunks(
+            select(example_table.c.id, example_table.c.value).where(
+                example_table.c.value.startswith("v"),
+            ),
+            key=example_table.c.id,
+            chunk_size=2,
+            expunge=True,
+            commit_per_chunk=True,
+        ):
+            assert all(len(row) == 2 for row in chunk)
+            seen.extend(row.id for row in chunk)
+            session.add(ExampleModel(value="new"))
+        assert seen == list(range(1, 8))
+        assert len(session.identity_map) == 0
+
+    result = await db.execute(
+        select(func.count()).where(example_table.c.value == "new"),
+    )
+    assert result.scalar_one() == 4
+
+    async with db.transaction():
+        with pytest.raises(TransactionAlreadyActiveError):
+            async for _ in db.iterate_chunks(
+                statement,
+                key=ExampleModel.id,
+                commit_per_chunk=True,
+            ):
+                pass
+
+
+async def test_timeout(
+    sqlite_engine: AsyncEngine,
+    example_table: Table,
+) -> None:
+    db = SQLAlchemyTransactionContext(sqlite_engine, auto_context_on_execute=True)
+
+    with pytest.raises(DeadlineExceededError):
+        async with db.transaction(timeout=0.05):
+            await db.execute(insert(example_table).values(value="lost"))
+            await asyncio.sleep(1)
+    assert db.get_session(strict=False) is None
+
+    async with db.transaction(timeout=5) as session:
+        deadline = session.info[DEADLINE_KEY]
+        async with db.transaction(timeout=60):
+            assert session.info[DEADLINE_KEY] == deadline
+        async with db.transaction(timeout=1):
+            assert session.info[DEADLINE_KEY] < deadline
+            await db.execute(insert(example_table).values(value="kept"), timeout=1)
+        assert session.info[DEADLINE_KEY] == deadline
+        with pytest.raises(DeadlineExceededError):
+            async with db.transaction(timeout=0.05):
+                await db.execute(insert(example_table).values(value="savepoint"))
+                await asyncio.sleep(1)
+    assert DEADLINE_KEY not in session.info
+
+    with pytest.raises(DeadlineExceededError):
+        async with db.session(timeout=0.05):
+            await asyncio.sleep(1)
+
+    result = await db.execute(select(example_table.c.value), timeout=1)
+    assert result.scalars().all() == ["kept"]
+
+    with pytest.raises(ValueError):
+        db.transaction(timeout=0)
+
+
+async def test_timeout_statement_pushdown(
+    sqlite_engine: AsyncEngine,
+    example_table: Table,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    settings = {"statement_timeout": "0"}
+
+    def set_config(name: str, value: str, is_local: bool) -> str:  # noqa: ARG001
+        settings[name] = value
+        return value
+
+    def register(connection: Connection) -> None:
+        dbapi_connection: Any = connection.connection.dbapi_connection
+        dbapi_connection.create_function("set_config", 3, set_config)
+        dbapi_connection.create_function("current_setting", 1, settings.__getitem__)
+
+    async with sqlite_engine.connect() as conn:
+        await conn.run_sync(register)
+    monkeypatch.setattr(
+        "sqlalchemy_tx_context.deadline._STATEMENT_TIMEOUT_DIALECTS",
+        frozenset(("sqlite",)),
+    )
+    db = SQLAlchemyTransactionContext(sqlite_engine)
+    other_engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    SQLAlchemyTransactionContext(other_engine)
+    statement = select(example_table.c.value)
+
+    async with db.transaction():
+        await db.execute(insert(example_table).values(value="untimed"))
+        assert settings["statement_timeout"] == "0"
+        assert not sqlite_engine.sync_engine.dispatch.before_cursor_execute
+
+        await db.execute(statement, timeout=5)
+        assert 0 < int(settings["statement_timeout"]) <= 5000
+        await db.execute(statement)
+        assert settings["statement_timeout"] == "0"
+
+        async with db.transaction(timeout=5):
+            await db.execute(statement)
+            assert 0 < int(settings["statement_timeout"]) <= 5000
+        await db.execute(statement)
+        assert settings["statement_timeout"] == "0"
+    assert sqlite_engine.sync_engine.dispatch.before_cursor_execute
+    assert not other_engine.sync_engine.dispatch.before_cursor_execute
+
+
+async def test_slow_query_profiler(
+    sqlite_engine: AsyncEngine,
+    example_table: Table,
+) -> None:
+    profiler = SlowQueryProfiler(threshold=0, capacity=2)
+    db = SQLAlchemyTransactionContext(
+        sqlite_engine,
+        auto_context_on_execute=True,
+        profiler=profiler,
+    )
+    statement = select(example_table.c.value).where(example_table.c.id > 1)
+
+    await db.execute(statement)
+    async with db.session(name="report"):
+        await db.execute(statement, {"id_1": 5})
+        await db.execute(select(func.count()).select_from(example_table))
+
+    first, second = profiler.records
+    assert first.sql == str(statement.compile(sqlite_engine.sync_engine))
+    assert first.parameters == {"id_1": "int"}
+    assert first.rows == 1
+    assert first.label == "report"
+    assert first.plan
+    assert "example" in str(first.plan)
+    assert first.explain_error is None
+    assert second.plan is not None
+    assert [record["label"] for record in profiler.dump()] == ["report", "report"]
+
+    profiler.clear()
+    profiler.threshold = 60
+    await db.execute(statement)
+    assert profiler.records == []
+
+    with pytest.raises(ValueError):
+        SlowQueryProfiler(capacity=0)
+
+
+async def test_slow_query_profiler_with_admission_control(
+    sqlite_engine: AsyncEngine,
+    example_table: Table,
+) -> None:
+    profiler = SlowQueryProfiler(threshold=0)
+    db = SQLAlchemyTransactionContext(
+        sqlite_engine,
+        profiler=profiler,
+        admission_control=AdmissionController(1),
+    )
+
+    async def profiled() -> None:
+        async with db.session():
+            await db.execute(select(example_table.c.value))
+
+    await asyncio.wait_for(profiled(), timeout=5)
+    (record,) = profiler.records
+    assert record.plan
+    assert record.explain_error is None
+
+
+async def test_slow_query_profiler_explains_in(
+    sqlite_engine: AsyncEngine,
+    example_table: Table,
+) -> None:
+    profiler = SlowQueryProfiler(threshold=0)
+    db = SQLAlchemyTransactionContext(
+        sqlite_engine,
+        auto_context_on_execute=True,
+        profiler=profiler,
+    )
+
+    await db.execute(select(example_table).where(example_table.c.id.in_([1, 2])))
+    await db.execute(
+        select(example_table).where(
+            example_table.c.id.in_(bindparam("ids", expanding=True)),
+        ),
+        {"ids": [1, 2, 3]},
+    )
+
+    literal, passed = profiler.records
+    assert "IN (?, ?)" in literal.sql
+    assert literal.parameters == {"id_1_1": "int", "id_1_2": "int"}
+    assert "IN (?, ?, ?)" in passed.sql
+    assert passed.parameters == {"ids_1": "int", "ids_2": "int", "ids_3": "int"}
+    for record in profiler.records:
+        assert record.plan
+        assert record.explain_error is None
+
+
+async def test_n_plus_one_detector(
+    sqlite_engine: AsyncEngine,
+    example_table: Table,
+) -> None:
+    reports: list[NPlusOneReport] = []
+    detector = NPlusOneDetector(threshold=2, reporter=reports.append)
+    db = SQLAlchemyTransactionContext(
+        sqlite_engine,
+        auto_context_on_execute=True,
+        query_detector=detector,
+    )
+
+    async def load(item_id: int) -> None:
+        await db.execute(select(example_table).where(example_table.c.id == item_id))
+
+    for item_id in range(5):
+        await load(item_id)
+    assert reports == []
+
+    async with db.transaction():
+        await db.execute(select(func.count()).select_from(example_table))
+        for item_id in range(5):
+            await load(item_id)
+    assert len(reports) == 1
+    assert reports[0].count == 3
+    assert "WHERE example.id = ?" in reports[0].sql
+    assert len(reports[0].call_sites) == 1
+    assert __file__ in reports[0].call_sites[0]
+
+    async with db.transaction():
+        await load(1)
+        await load(2)
+    assert len(reports) == 1
+
+    detector.raise_error = True
+    async with db.session():
+        await load(1)
+        await load(2)
+        with pytest.raises(NPlusOneQueryError) as exc_info:
+            await load(3)
+    assert exc_info.value.count == 3
+    assert len(reports) == 2
+
+
+async def test_auto_context_autocommit(
+    sqlite_engine: AsyncEngine,
+    example_table: Table,
+) -> None:
+    db = SQLAlchemyTransactionContext(
+        sqlite_engine,
+        auto_context_on_execute=True,
+        auto_context_autocommit=True,
+    )
+    isolation_levels: list[Optional[str]] = []
+
+    def on_execute(conn: Any, *_args: Any) -> None:
+        isolation_levels.append(conn.get_execution_options().get("isolation_level"))
+
+    event.listen(sqlite_engine.sync_engine, "before_cursor_execute", on_execute)
+    try:
+        await db.execute(insert(example_table).values(value="a"))
+        result = await db.execute(select(example_table.c.value))
+        assert result.scalars().all() == ["a"]
+        assert isolation_levels == ["AUTOCOMMIT", "AUTOCOMMIT"]
+
+        isolation_levels.clear()
+        await db.execute(
+            insert(example_table).values(value="b"),
+            force_transaction=True,
+        )
+        async with db.transaction():
+            await db.execute(select(example_table.c.value))
+        assert isolation_levels == [None, None]
+    finally:
+        event.remove(sqlite_engine.sync_engine, "before_cursor_execute", on_execute)
+
+    with pytest.raises(IntegrityError):
+        await db.execute(insert(example_table).values(id=1, value="duplicate"))
+    result = await db.execute(select(func.count()).select_from(example_table))
+    assert result.scalar_one() == 2
+
+
+async def test_auto_context_autocommit_cache_and_precedence(
+    sqlite_engine: AsyncEngine,
+    example_table: Table,
+) -> None:
+    db = SQLAlchemyTransactionContext(
+        sqlite_engine,
+        auto_context_on_execute=True,
+        auto_context_autocommit=True,
+        result_cache=InMemoryResultCache(),
+    )
+    query = select(example_table.c.value).execution_options(result_cache=True)
+
+    assert (await db.execute(query)).scalars().all() == []
+    await db.execute(insert(example_table).values(value="a"))
+    assert (await db.execute(query)).scalars().all() == ["a"]
+
+    forced = SQLAlchemyTransactionContext(
+        sqlite_engine,
+        auto_context_on_execute=True,
+        auto_context_autocommit=True,
+        auto_context_force_transaction=True,
+    )
+    coalesced = SQLAlchemyTransactionContext(
+        sqlite_engine,
+        auto_context_on_execute=True,
+        auto_context_autocommit=True,
+        auto_context_coalesce_reads=True,
+    )
+    with patch.object(
+        SQLAlchemyTransactionContext,
+        "_autocommit_session",
+        side_effect=AssertionError,
+    ):
+        await forced.execute(insert(example_table).values(value="b"))
+        result = await coalesced.execute(select(example_table.c.value))
+        assert result.scalars().all() == ["a", "b"]
+    await coalesced.close_coalesced_sessions()
+
+
+async def test_connection(
+    sqlite_engine: AsyncEngine,
+    example_table: Table,
+) -> None:
+    cache = InMemoryResultCache()
+    db = SQLAlchemyTransactionContext(
+        sqlite_engine,
+        auto_context_on_execute=True,
+        result_cache=cache,
+    )
+    count = select(func.count()).select_from(example_table)
+    cached_count = count.execution_options(result_cache=True)
+    assert (await db.execute(cached_count)).scalar_one() == 0
+
+    async with db.connection_transaction() as connection:
+        assert db.get_connection() is connection
+        assert db.get_session(strict=False) is None
+        await db.execute(insert(example_table).values(value="a"))
+        result = await db.execute(cached_count)
+        assert result.scalar_one() == 1
+
+        with pytest.raises(ValueError):
+            async with db.connection_transaction():
+                await db.execute(insert(example_table).values(value="b"))
+                raise ValueError()
+
+        async with db.session() as session:
+            assert db.get_connection() is connection
+            assert db.get_session() is session
+
+        with pytest.raises(SessionAlreadyActiveError):
+            async with db.connection():
+                pass
+        async with db.connection(reuse_if_exists=True) as reused:
+            assert reused is connection
+
+    assert db.get_connection(strict=False) is None
+    assert (await db.execute(cached_count)).scalar_one() == 1
+
+    async with db.connection() as connection:
+        await db.execute(insert(example_table).values(value="rolled back"))
+    assert isinstance(connection, AsyncConnection)
+    assert (await db.execute(count)).scalar_one() == 1
+
+    async with db.session():
+        with pytest.raises(SessionAlreadyActiveError):
+            async with db.connection():
+                pass
+    with pytest.raises(NoSessionError):
+        db.get_connection()
+
+
+async def test_connection_execute_detector_and_profiler(
+    sqlite_engine: AsyncEngine,
+    example_table: Table,
+) -> None:
+    reports: list[NPlusOneReport] = []
+    profiler = SlowQueryProfiler(threshold=0)
+    db = SQLAlchemyTransactionContext(
+        sqlite_engine,
+        profiler=profiler,
+        query_detector=NPlusOneDetector(2, reporter=reports.append),
+    )
+    statement = select(example_table.c.value)
+
+    async with db.connection():
+        for _ in range(3):
+            await db.execute(statement)
+        with pytest.raises(ValueError):
+            await db.execute(statement, bind_arguments={"bind": sqlite_engine})
+    assert [report.count for report in reports] == [3]
+    assert len(profiler.records) == 3
+    assert profiler.records[0].plan
+
+    async with db.connection():
+        await db.execute(statement)
+    assert len(reports) == 1
+
+
+async def test_connection_session_helpers(
+    sqlite_engine: AsyncEngine,
+    example_table: Table,
+) -> None:
+    db = SQLAlchemyTransactionContext(sqlite_engine, auto_context_on_execute=True)
+    rows = [{"value": str(i)} for i in range(5)]
+
+    async with db.connection_transaction():
+        assert await db.execute_many(insert(example_table), rows, chunk_size=2) == 5
+        assert (
+            await db.execute_many(
+                insert(example_table),
+                rows,
+                chunk_size=2,
+                transaction_per_chunk=True,
+            )
+            == 5
+        )
+        async with db.stream_scalars(
+            select(example_table.c.value).order_by(example_table.c.id),
+            yield_per=3,
+        ) as values:
+            assert [value async for value in values] == ["0", "1", "2", "3", "4"] * 2
+
+        with pytest.raises(ConnectionActiveError):
+            await db.run_sync(lambda _: None)
+        with pytest.raises(ConnectionActiveError):
+            async for _ in db.iterate_chunks(
+                select(example_table),
+                key=example_table.c.id,
+            ):
+                pass
+        with pytest.raises(ConnectionActiveError):
+            await db.loader(ExampleModel).load(1)
+
+    count = select(func.count()).select_from(example_table)
+    assert (await db.execute(count)).scalar_one() == 10
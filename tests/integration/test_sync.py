@@ -0,0 +1,72 @@
+from collections.abc import Generator
+
+import pytest
+
+from sqlalchemy import Engine, MetaData, Table, create_engine, insert, select
+from sqlalchemy.pool import StaticPool
+
+from sqlalchemy_tx_context import SQLTransactionContext
+from sqlalchemy_tx_context.exceptions import (
+    NoSessionError,
+    SessionAlreadyActiveError,
+    TransactionAlreadyActiveError,
+)
+from tests.integration.fixtures.models import ExampleModel
+
+
+@pytest.fixture
+def sync_engine(metadata: MetaData) -> Generator[Engine, None, None]:
+    engine = create_engine("sqlite:///:memory:", poolclass=StaticPool)
+    metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+def test_sync_transaction(sync_engine: Engine, example_table: Table) -> None:
+    db = SQLTransactionContext(sync_engine)
+
+    with pytest.raises(NoSessionError):
+        db.execute(select(example_table.c.value))
+
+    with db.transaction() as session:
+        db.execute(insert(example_table).values(value="outer"))
+        with pytest.raises(RuntimeError), db.transaction() as nested:
+            assert nested is session
+            db.execute(insert(example_table).values(value="savepoint"))
+            raise RuntimeError("rollback savepoint")
+        not_nested = db.transaction(allow_nested_transactions=False)
+        with pytest.raises(TransactionAlreadyActiveError), not_nested:
+            pass
+        with pytest.raises(SessionAlreadyActiveError), db.session():
+            pass
+        with db.new_transaction() as independent:
+            assert independent is not session
+            assert db.get_session() is independent
+        assert db.get_session() is session
+
+    with pytest.raises(RuntimeError), db.transaction():
+        db.execute(insert(example_table).values(value="rolled back"))
+        raise RuntimeError("rollback")
+
+    assert db.get_session(strict=False) is None
+    with db.session():
+        assert db.execute(select(example_table.c.value)).scalars().all() == ["outer"]
+
+
+def test_sync_auto_context(sync_engine: Engine, example_table: Table) -> None:
+    db = SQLTransactionContext(sync_engine, auto_context_on_execute=True)
+
+    db.execute(insert(example_table).values(value="value"))
+    result = db.execute(select(example_table.c.value))
+
+    assert result.scalars().all() == ["value"]
+    assert db.get_session(strict=False) is None
+
+
+def test_sync_auto_context_orm(sync_engine: Engine, example_table: Table) -> None:
+    db = SQLTransactionContext(sync_engine, auto_context_on_execute=True)
+
+    db.execute(insert(example_table).values(id=1, value="value"))
+    models = db.execute(select(ExampleModel)).scalars().all()
+
+    assert [(model.id, model.value) for model in models] == [(1, "value")]
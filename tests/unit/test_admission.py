@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+
+from sqlalchemy_tx_context import AdmissionController, Priority
+from sqlalchemy_tx_context.exceptions import AdmissionTimeoutError
+
+
+async def test_admission_controller_priorities() -> None:
+    controller = AdmissionController(1)
+    order: list[str] = []
+
+    async def run(name: str, priority: int) -> None:
+        await controller.acquire(priority)
+        order.append(name)
+        await asyncio.sleep(0)
+        controller.release()
+
+    await controller.acquire()
+    tasks = [
+        asyncio.create_task(run("background", Priority.BACKGROUND)),
+        asyncio.create_task(run("normal", Priority.NORMAL)),
+        asyncio.create_task(run("interactive", Priority.INTERACTIVE)),
+        asyncio.create_task(run("interactive 2", Priority.INTERACTIVE)),
+    ]
+    await asyncio.sleep(0)
+    assert controller.waiting == 4
+
+    controller.release()
+    await asyncio.gather(*tasks)
+    assert order == ["interactive", "interactive 2", "normal", "background"]
+    assert (controller.in_use, controller.admitted) == (0, 5)
+
+    snapshot = controller.snapshot()
+    assert snapshot["wait_times"]["interactive"]["count"] == 2
+    assert snapshot["wait_times"]["normal"]["count"] == 2
+
+
+async def test_admission_controller_timeout_and_cancel() -> None:
+    controller = AdmissionController(1, timeout=0.01)
+    await controller.acquire()
+
+    with pytest.raises(AdmissionTimeoutError):
+        await controller.acquire()
+    assert (controller.waiting, controller.timed_out) == (0, 1)
+
+    controller.timeout = None
+    waiter = asyncio.create_task(controller.acquire())
+    await asyncio.sleep(0)
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    assert controller.waiting == 0
+
+    controller.release()
+    assert controller.in_use == 0
+
+
+async def test_admission_controller_cancel_before_release() -> None:
+    controller = AdmissionController(1)
+    await controller.acquire()
+
+    cancelled = asyncio.create_task(controller.acquire())
+    queued = asyncio.create_task(controller.acquire())
+    await asyncio.sleep(0)
+    cancelled.cancel()
+    controller.release()
+
+    with pytest.raises(asyncio.CancelledError):
+        await cancelled
+    await queued
+    assert (controller.waiting, controller.in_use) == (0, 1)
+
+    waiter = asyncio.create_task(controller.acquire())
+    await asyncio.sleep(0)
+    controller.release()
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    assert (controller.waiting, controller.in_use) == (0, 0)
@@ -0,0 +1,64 @@
+from typing import Any, cast
+from unittest.mock import patch
+
+from sqlalchemy import Column, Integer, MetaData, Table, bindparam, select
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.engine.result import FrozenResult
+from sqlalchemy.sql.elements import ClauseElement
+
+from sqlalchemy_tx_context import InMemoryResultCache
+from sqlalchemy_tx_context.caching import result_cache_key
+
+
+def frozen(value: int) -> FrozenResult[Any]:
+    return cast(FrozenResult[Any], value)
+
+
+async def test_in_memory_result_cache_lru_and_ttl() -> None:
+    now = 0.0
+    cache = InMemoryResultCache(max_size=2, ttl=10, clock=lambda: now)
+
+    await cache.set("a", frozen(1), {"users"})
+    await cache.set("b", frozen(2), {"orders"})
+    assert await cache.get("a") == 1
+    await cache.set("c", frozen(3), {"users", "orders"})
+
+    assert await cache.get("b") is None
+    assert len(cache) == 2
+
+    now = 10.0
+    assert await cache.get("a") is None
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+async def test_in_memory_result_cache_invalidate() -> None:
+    cache = InMemoryResultCache()
+
+    await cache.set("users", frozen(1), {"users"})
+    await cache.set("orders", frozen(2), {"orders"})
+    await cache.set("joined", frozen(3), {"users", "orders"})
+
+    await cache.invalidate({"users"})
+    assert await cache.get("users") is None
+    assert await cache.get("joined") is None
+    assert await cache.get("orders") == 2
+
+    await cache.clear()
+    assert len(cache) == 0
+
+
+def test_result_cache_key_compiles_once_per_structure() -> None:
+    table = Table("cached", MetaData(), Column("id", Integer))
+    dialect = sqlite.dialect()
+
+    def query(value: int) -> Any:
+        return select(table).where(table.c.id == value)
+
+    named = select(table).where(table.c.id == bindparam("id"))
+    first = result_cache_key(query(1), None, dialect)
+    first_named = result_cache_key(named, {"id": 1}, dialect)
+    with patch.object(ClauseElement, "compile", side_effect=AssertionError):
+        assert result_cache_key(query(1), None, dialect) == first
+        assert result_cache_key(query(2), None, dialect) != first
+        assert result_cache_key(named, {"id": 1}, dialect) == first_named
+        assert result_cache_key(named, {"id": 2}, dialect) != first_named
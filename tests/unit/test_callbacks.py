@@ -0,0 +1,49 @@
+import asyncio
+
+from collections.abc import Awaitable, Callable
+
+import pytest
+
+from sqlalchemy_tx_context.callbacks import TransactionCallbacks, run_callbacks
+
+
+def test_transaction_callbacks_frames() -> None:
+    callbacks = TransactionCallbacks()
+    callbacks.add(lambda: "commit", on_commit=True)
+    callbacks.push()
+    callbacks.add(lambda: "released", on_commit=True)
+    callbacks.pop(committed=True)
+    callbacks.push()
+    callbacks.add(lambda: "dropped", on_commit=True)
+    callbacks.add(lambda: "rolled back", on_commit=False)
+    callbacks.pop(committed=False)
+
+    assert [callback() for callback in callbacks.take(committed=True)] == [
+        "rolled back",
+        "commit",
+        "released",
+    ]
+
+
+async def test_run_callbacks_bounded_concurrency() -> None:
+    running = 0
+    peak = 0
+    calls: list[int] = []
+
+    def callback(index: int) -> Callable[[], Awaitable[None]]:
+        async def run() -> None:
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            calls.append(index)
+            if index == 0:
+                raise ValueError(index)
+
+        return run
+
+    with pytest.raises(ValueError):
+        await run_callbacks([callback(index) for index in range(5)], 2)
+    assert peak == 2
+    assert sorted(calls) == [0, 1, 2, 3, 4]
@@ -8,7 +8,7 @@ from sqlalchemy import Table, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.util import immutabledict
 
-from sqlalchemy_tx_context import SQLAlchemyTransactionContext
+from sqlalchemy_tx_context import LeastInFlightPolicy, SQLAlchemyTransactionContext
 from sqlalchemy_tx_context.exceptions import (
     NoSessionError,
     SessionAlreadyActiveError,
@@ -273,3 +273,68 @@ async def test_execute_with_auto_session(
         mock_transaction.assert_called_once()
 
         mock_async_session.reset_mock()
+
+
+@pytest.mark.asyncio
+async def test_replica_routing(
+    mock_engine: AsyncMock,
+    example_table: Table,
+    mock_async_session: AsyncMock,
+    mock_async_session_maker: MagicMock,
+) -> None:
+    replica_session = AsyncMock(spec=AsyncSession)
+    replica_cm = AsyncMock()
+    replica_cm.__aenter__.return_value = replica_session
+    replica_session_maker = MagicMock(return_value=replica_cm)
+
+    policy = LeastInFlightPolicy()
+    db = SQLAlchemyTransactionContext(
+        mock_engine,
+        default_session_maker=mock_async_session_maker,
+        auto_context_on_execute=True,
+        replica_session_makers=[replica_session_maker],
+        replica_policy=policy,
+    )
+
+    async with db.session(read_only=True) as session:
+        assert session is replica_session
+        assert policy.in_flight() == (1,)
+
+    assert policy.in_flight() == (0,)
+
+    async with db.session() as session:
+        assert session is mock_async_session
+
+    select_stmt = select(example_table.c.id)
+    await db.execute(select_stmt)
+    replica_session.execute.assert_called_once()
+    mock_async_session.execute.assert_not_called()
+
+    replica_session.reset_mock()
+
+    await db.execute(select_stmt, force_transaction=True)
+    replica_session.execute.assert_not_called()
+    mock_async_session.execute.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_context_restored_after_failed_enter(mock_engine: AsyncMock) -> None:
+    db = SQLAlchemyTransactionContext(mock_engine)
+
+    async with db.transaction() as session:
+        with pytest.raises(TransactionAlreadyActiveError):
+            async with db.transaction(allow_nested_transactions=False):
+                pass
+        assert db.get_session() is session
+        assert session.in_transaction() is True
+
+    assert db.get_session(strict=False) is None
+
+    async with db.new_transaction() as session:
+        with pytest.raises(RuntimeError):
+            async with db.new_transaction() as session2:
+                assert db.get_session() is session2
+                raise RuntimeError("fail")
+        assert db.get_session() is session
+
+    assert db.get_session(strict=False) is None
@@ -0,0 +1,49 @@
+from sqlalchemy_tx_context import (
+    ContextEvent,
+    ContextEventKind,
+    LatencyAggregator,
+    LatencyHistogram,
+)
+
+
+def test_latency_histogram() -> None:
+    histogram = LatencyHistogram([0.01, 0.1])
+
+    for value in (0.005, 0.005, 0.05, 0.5):
+        histogram.observe(value)
+
+    assert histogram.count == 4
+    assert histogram.counts == [2, 1, 1]
+    assert histogram.min == 0.005
+    assert histogram.max == 0.5
+    assert histogram.quantile(0.5) == 0.01
+    assert histogram.quantile(0.75) == 0.1
+    assert histogram.quantile(1.0) == 0.5
+    assert histogram.as_dict()["buckets"] == {"0.01": 2, "0.1": 1, "+Inf": 1}
+
+
+def test_latency_aggregator() -> None:
+    aggregator = LatencyAggregator()
+
+    for label in ("checkout", "checkout", None):
+        aggregator.on_event(
+            ContextEvent(
+                kind=ContextEventKind.TRANSACTION_COMMIT,
+                duration=0.002,
+                depth=1,
+                auto_context=False,
+                label=label,
+            ),
+        )
+
+    checkout = aggregator.histogram(ContextEventKind.TRANSACTION_COMMIT, "checkout")
+    assert checkout is not None
+    assert checkout.count == 2
+    assert aggregator.histogram(ContextEventKind.EXECUTE, "checkout") is None
+
+    snapshot = aggregator.snapshot()
+    assert snapshot["checkout"]["transaction_commit"]["count"] == 2
+    assert snapshot[None]["transaction_commit"]["count"] == 1
+
+    aggregator.reset()
+    assert aggregator.snapshot() == {}
@@ -0,0 +1,25 @@
+from sqlalchemy_tx_context import TransactionOptions
+
+
+def test_transaction_options_resolve() -> None:
+    options = TransactionOptions(
+        read_only=True,
+        isolation_level="SERIALIZABLE",
+        deferrable=True,
+    )
+
+    postgresql = options.resolve("postgresql")
+    assert postgresql.execution_options == {
+        "isolation_level": "SERIALIZABLE",
+        "postgresql_readonly": True,
+        "postgresql_deferrable": True,
+    }
+    assert postgresql.statements == ()
+
+    mysql = options.resolve("mysql")
+    assert mysql.execution_options == {"isolation_level": "SERIALIZABLE"}
+    assert mysql.statements == ("SET TRANSACTION READ ONLY",)
+
+    sqlite = TransactionOptions(read_only=True).resolve("sqlite")
+    assert sqlite.execution_options == {}
+    assert sqlite.statements == ()
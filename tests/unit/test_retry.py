@@ -0,0 +1,39 @@
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from sqlalchemy_tx_context import RetryPolicy
+
+
+class FakePgError(Exception):
+    def __init__(self, sqlstate: str) -> None:
+        super().__init__(sqlstate)
+        self.sqlstate = sqlstate
+
+
+def test_retry_policy_is_retryable() -> None:
+    policy = RetryPolicy()
+
+    serialization_failure = OperationalError("SELECT 1", {}, FakePgError("40001"))
+    unique_violation = IntegrityError("SELECT 1", {}, FakePgError("23505"))
+    deadlock = OperationalError("SELECT 1", {}, Exception(1213, "Deadlock found"))
+    locked = OperationalError("SELECT 1", {}, Exception("database is locked"))
+
+    assert policy.is_retryable(serialization_failure, "postgresql") is True
+    assert policy.is_retryable(unique_violation, "postgresql") is False
+    assert policy.is_retryable(deadlock, "mysql") is True
+    assert policy.is_retryable(locked, "sqlite") is True
+    assert policy.is_retryable(locked, "unknown") is False
+    assert policy.is_retryable(RuntimeError("database is locked"), "sqlite") is False
+
+    custom = RetryPolicy(
+        retryable_errors={"postgresql": lambda exc: exc.orig is not None},
+    )
+    assert custom.is_retryable(unique_violation, "postgresql") is True
+
+
+def test_retry_policy_delay() -> None:
+    policy = RetryPolicy(backoff=0.1, max_backoff=0.3, jitter=False)
+
+    assert [policy.delay(attempt) for attempt in (1, 2, 3)] == [0.1, 0.2, 0.3]
+
+    jittered = RetryPolicy(backoff=0.1, max_backoff=0.3)
+    assert all(0 <= jittered.delay(3) <= 0.3 for _ in range(20))
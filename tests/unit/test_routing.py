@@ -0,0 +1,48 @@
+import random
+
+import pytest
+
+from sqlalchemy_tx_context import (
+    LeastInFlightPolicy,
+    RoundRobinPolicy,
+    WeightedPolicy,
+)
+
+
+def test_round_robin_policy() -> None:
+    policy = RoundRobinPolicy()
+
+    assert [policy.choose(3) for _ in range(5)] == [0, 1, 2, 0, 1]
+
+
+def test_least_in_flight_policy() -> None:
+    policy = LeastInFlightPolicy()
+
+    first = policy.choose(2)
+    policy.on_acquire(first)
+    second = policy.choose(2)
+    policy.on_acquire(second)
+
+    assert (first, second) == (0, 1)
+    assert policy.in_flight() == (1, 1)
+
+    policy.on_release(second)
+
+    assert policy.choose(2) == 1
+
+
+def test_weighted_policy() -> None:
+    policy = WeightedPolicy([1, 1000], rng=random.Random(0))
+    policy.attach(2)
+
+    assert {policy.choose(2) for _ in range(20)} == {1}
+
+    with pytest.raises(ValueError):
+        policy.attach(3)
+    with pytest.raises(ValueError):
+        policy.choose(3)
+
+    with pytest.raises(ValueError):
+        WeightedPolicy([0, 1])
+    with pytest.raises(ValueError):
+        WeightedPolicy([-1, 2])
@@ -0,0 +1,25 @@
+import pytest
+
+from sqlalchemy_tx_context import ConsistentHashRing
+
+
+def test_consistent_hash_ring_distribution() -> None:
+    ring = ConsistentHashRing(["a", "b", "c"])
+    keys = range(3000)
+    owners = {key: ring(key) for key in keys}
+
+    counts = {shard_id: list(owners.values()).count(shard_id) for shard_id in "abc"}
+    assert all(700 < count < 1300 for count in counts.values())
+    assert ring("42") == ring(42)
+
+    grown = ConsistentHashRing(["a", "b", "c", "d"])
+    moved = [key for key in keys if grown(key) != owners[key]]
+    assert all(grown(key) == "d" for key in moved)
+    assert len(moved) < 1200
+
+
+def test_consistent_hash_ring_validation() -> None:
+    with pytest.raises(ValueError, match="shard"):
+        ConsistentHashRing([])
+    with pytest.raises(ValueError, match="vnodes"):
+        ConsistentHashRing(["a"], vnodes=0)